@@ -11,7 +11,6 @@ from .pyvo_performance import (
 )
 from .pyvo_error_handling import (
     handle_error,
-    log_error,
     get_error_summary,
     reset_error_data
 )
@@ -25,7 +24,6 @@ __all__ = [
     "log_performance_summary",  # Logs a performance summary
     "reset_performance_data",  # Resets performance data
     "handle_error",  # Handles errors in Pyvo functions
-    "log_error",  # Logs errors
     "get_error_summary",  # Retrieves error summary
     "reset_error_data",  # Resets error data
 ]
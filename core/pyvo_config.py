@@ -9,7 +9,27 @@ DEFAULT_CONFIG = {
     "enable_performance": True,
     "enable_error_handling": True,
     "log_level": "INFO",  # Logging level (INFO, DEBUG, ERROR, etc.)
-    "performance_logging_interval": 60  # In seconds
+    "performance_logging_interval": 60,  # In seconds
+    # Sampling of timed calls: {"mode": "always"}, {"mode": "fixed", "rate": N} (1-in-N calls)
+    # or {"mode": "adaptive", "max_per_second": N}; a bare mode name such as "always" also works.
+    # Per-function overrides go in "functions"; "sampling" itself may be a single setting for all
+    "sampling": {
+        "default": {"mode": "always"},
+        "functions": {}
+    },
+    # Instrument modules as they are imported: module names matching an "include" glob and no
+    # "exclude" glob get the listed kinds of instrumentation ("monitor", "performance")
+    "auto_instrument": {
+        "enabled": False,
+        "include": [],
+        "exclude": [],
+        "kinds": ["monitor"]
+    }
+}
+
+# Types accepted by update_config where the default's type is not the only valid one
+CONFIG_TYPES = {
+    "sampling": (dict, str),  # A bare mode name applies to every function
 }
 
 # File path for storing persistent configurations
@@ -62,13 +82,21 @@ class PyvoConfig:
         """
         if key in self.config:
             # Add type validation based on the key
-            expected_type = type(DEFAULT_CONFIG[key])
+            expected_type = CONFIG_TYPES.get(key, type(DEFAULT_CONFIG[key]))
             if isinstance(value, expected_type):
                 self.config[key] = value
                 self.save_config()
                 logging.info(f"Configuration updated: {key} = {value}")
+                if key == "sampling":
+                    # Imported lazily: the sampling module reads this configuration at import time
+                    from pyvo.core.pyvo_sampling import reload_sampling_policies
+                    reload_sampling_policies()
+                elif key == "auto_instrument":
+                    from pyvo.core.pyvo_import_hook import install_from_config
+                    install_from_config()
             else:
-                logging.warning(f"Invalid type for {key}: Expected {expected_type.__name__}, got {type(value).__name__}")
+                expected = " or ".join(t.__name__ for t in expected_type) if isinstance(expected_type, tuple) else expected_type.__name__
+                logging.warning(f"Invalid type for {key}: Expected {expected}, got {type(value).__name__}")
         else:
             logging.warning(f"Attempted to update unknown configuration key: {key}")
 
@@ -93,6 +121,12 @@ class PyvoConfig:
 # Singleton instance of PyvoConfig
 pyvo_config = PyvoConfig()
 
+# Install the import hook right away when the loaded configuration enables auto-instrumentation
+if (pyvo_config.get("auto_instrument") or {}).get("enabled"):
+    # Imported lazily: the import hook module reads the pyvo_config singleton created above
+    from pyvo.core.pyvo_import_hook import install_from_config
+    install_from_config()
+
 # Example usage of PyvoConfig class
 if __name__ == "__main__":
     # Example of updating and retrieving configuration values
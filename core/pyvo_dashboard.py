@@ -11,9 +11,11 @@ import threading
 from logging.handlers import RotatingFileHandler
 import pyvo
 from pyvo.core.pyvo_integration import PyvoIntegration
-from pyvo.core.pyvo_monitor import pyvo_monitor
-from pyvo.core.pyvo_error_handling import handle_error, get_error_summary
+from pyvo.core.pyvo_monitor import pyvo_monitor, INSTRUMENTATION_KIND as MONITOR_KIND
+from pyvo.core.pyvo_error_handling import handle_error, get_error_summary, subscribe_error_summary
 from pyvo.core.pyvo_performance import apply_performance_tracking, get_performance_summary, log_performance_summary, reset_performance_data
+from pyvo.core.pyvo_performance import INSTRUMENTATION_KIND as PERFORMANCE_KIND
+from pyvo.core.pyvo_instrument import set_kind_enabled
 
 # Initialize Pyvo Integration with default settings
 pyvo_integration = PyvoIntegration(enable_monitoring=True, enable_logging=True, enable_performance=True, enable_error_handling=True)
@@ -107,6 +109,12 @@ class PyvoDashboardApp:
         self.progress_bar = ttk.Progressbar(self.root, orient="horizontal", mode="indeterminate")
         self.progress_bar.pack(pady=10)
 
+        # Error overview, kept current from the error summary deltas
+        self.error_groups = {}
+        self.error_label = tk.Label(self.root, text="Errors: none recorded")
+        self.error_label.pack(pady=5)
+        subscribe_error_summary(self.on_error_summary_delta)
+
         # Start the background thread for automatic log updates
         self.start_auto_update()
 
@@ -159,9 +167,13 @@ class PyvoDashboardApp:
         }
         
         for key, value in settings.items():
-            setattr(pyvo_integration, f"enable_{key.lower()}", value)
+            setattr(pyvo_integration, f"enable_{key.lower().replace(' ', '_')}", value)
             logging.info(f"Updated {key}: {value}")
 
+        # Swap auto-decorated functions between their wrappers and the originals
+        set_kind_enabled(MONITOR_KIND, settings["Monitoring"])
+        set_kind_enabled(PERFORMANCE_KIND, settings["Performance"])
+
         messagebox.showinfo("Settings Update", "Pyvo settings updated successfully!")
 
     def test_function(self):
@@ -210,6 +222,16 @@ class PyvoDashboardApp:
         for line in summary:
             self.log_text.insert(tk.END, f"{line}\n")  # Insert summary line by line
 
+    def on_error_summary_delta(self, delta):
+        """Applies changed error groups (called from the publisher thread) and refreshes the error overview."""
+        for fingerprint in delta['removed']:
+            self.error_groups.pop(fingerprint, None)
+        for group in delta['groups']:
+            self.error_groups[group['fingerprint']] = group
+        occurrences = sum(group['count'] for group in self.error_groups.values())
+        text = f"Errors: {occurrences} occurrences in {len(self.error_groups)} distinct groups"
+        self.root.after(0, lambda: self.error_label.config(text=text))  # Update the label from the main thread
+
     def start_auto_update(self):
         """Start background thread for automatic log updates every 2 seconds."""
         threading.Thread(target=self.auto_update_logs_thread, daemon=True).start()
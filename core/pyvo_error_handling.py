@@ -1,117 +1,374 @@
+import hashlib
 import logging
+import threading
+import time
 import traceback
-import requests
-from pyvo.ui.dashboard import update_error_summary  # Assuming this function is used to update the dashboard error display
+from collections import OrderedDict
+from pyvo.core.pyvo_error_shipper import ErrorShipper
+from pyvo.core.pyvo_rate_limit import TokenBucket
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# A dictionary to store error information that can be accessed from the dashboard
+# Maximum number of distinct messages kept as samples per error group
+MAX_SAMPLE_MESSAGES = 5
+
+# Default bounds of the error store; least recently seen groups are evicted beyond them
+MAX_ERROR_GROUPS = 1000
+MAX_ERROR_BYTES = 4 * 1024 * 1024
+
+# Per-fingerprint rate limits for logging and reporting an error: average per second, burst
+ERROR_LOG_RATE = (1.0, 10)
+ERROR_REPORT_RATE = (0.2, 5)
+
+# Approximate fixed cost of a group and of one rendered traceback frame, in bytes
+_GROUP_OVERHEAD = 512
+_FRAME_OVERHEAD = 64
+
+def fingerprint_error(error, frames=None):
+    """
+    Computes a stable fingerprint for an exception from its type and normalized traceback frames.
+    Frames are reduced to file, function and source line, without line numbers, so the same
+    failure keeps its fingerprint when unrelated code above it moves.
+
+    :param frames: The exception's traceback.StackSummary; extracted from the error if omitted.
+    """
+    if frames is None:
+        frames = traceback.extract_tb(error.__traceback__)
+    error_type = type(error)
+    parts = [f"{error_type.__module__}.{error_type.__qualname__}"]
+    parts.extend(f"{frame.filename}:{frame.name}:{(frame.line or '').strip()}" for frame in frames)
+    return hashlib.sha1("\n".join(parts).encode("utf-8", "replace")).hexdigest()[:16]
+
+class ErrorGroup:
+    """
+    All occurrences of one failure: a representative trace, counts, timestamps and sample messages.
+    The trace is kept as a lightweight traceback.StackSummary (no frame objects or locals) and
+    rendered to a string only when `stack_trace` is first read. Logging and external reporting
+    of the group's occurrences are rate limited by token buckets; suppressed ones are counted.
+    """
+
+    def __init__(self, fingerprint, error_type, frames, timestamp):
+        self.fingerprint = fingerprint
+        self.error_type = error_type
+        self.frames = frames
+        self.count = 0
+        self.first_seen = timestamp
+        self.last_seen = timestamp
+        self.messages = []
+        self.log_limiter = TokenBucket(*ERROR_LOG_RATE)
+        self.report_limiter = TokenBucket(*ERROR_REPORT_RATE)
+        self._stack_trace = None
+        self.size = _GROUP_OVERHEAD + sum(
+            _FRAME_OVERHEAD + len(frame.filename) + len(frame.name) + len(frame.line or '') for frame in frames)
+
+    def add(self, error_message, timestamp):
+        """Counts one occurrence. Returns the number of bytes the group grew by."""
+        self.count += 1
+        self.last_seen = timestamp
+        if len(self.messages) < MAX_SAMPLE_MESSAGES and error_message not in self.messages:
+            self.messages.append(error_message)
+            self.size += len(error_message)
+            return len(error_message)
+        return 0
+
+    @property
+    def stack_trace(self):
+        """The representative traceback, formatted on first access."""
+        if self._stack_trace is None:
+            message = self.messages[0] if self.messages else ''
+            self._stack_trace = ("Traceback (most recent call last):\n" + "".join(self.frames.format())
+                                 + (f"{self.error_type}: {message}\n" if message else f"{self.error_type}\n"))
+        return self._stack_trace
+
+    def to_dict(self):
+        return {
+            'fingerprint': self.fingerprint,
+            'error_type': self.error_type,
+            'count': self.count,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'messages': list(self.messages),
+            'suppressed_logs': self.log_limiter.rejected,
+            'suppressed_reports': self.report_limiter.rejected,
+            'stack_trace': self.stack_trace,
+        }
+
+# Error groups keyed by fingerprint, accessible from the dashboard
 class ErrorStore:
-    def __init__(self):
-        self.general_errors = []
-        self.specific_errors = {}
+    """
+    Bounded store of error groups in least-recently-seen order. Once more than `max_groups`
+    groups or more than `max_bytes` (estimated) are held, the least recently seen groups are evicted.
+    """
+
+    def __init__(self, max_groups=MAX_ERROR_GROUPS, max_bytes=MAX_ERROR_BYTES):
+        self.max_groups = max_groups
+        self.max_bytes = max_bytes
+        self.groups = OrderedDict()
+        self.size = 0
+        self.evicted = 0
+        # Whether changes are collected for take_changes(); set while someone consumes them
+        self.tracking = False
+        self._changed = set()  # Fingerprints added or updated since the last take_changes()
+        self._removed = set()  # Fingerprints evicted or cleared since the last take_changes()
+        self._lock = threading.Lock()
+
+    def add_error(self, error, timestamp=None):
+        """
+        Records one occurrence of `error` in its group. Only the traceback's frame summary is
+        extracted here; formatting is left to whoever reads the group's stack_trace.
+
+        :return: The error's group.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        frames = traceback.extract_tb(error.__traceback__)
+        fingerprint = fingerprint_error(error, frames)
+        with self._lock:
+            group = self.groups.get(fingerprint)
+            if group is None:
+                group = self.groups[fingerprint] = ErrorGroup(fingerprint, type(error).__name__, frames, timestamp)
+                self.size += group.size
+            else:
+                self.groups.move_to_end(fingerprint)
+            self.size += group.add(str(error), timestamp)
+            if self.tracking:
+                self._changed.add(fingerprint)
+                self._removed.discard(fingerprint)
+            self._evict()
+        return group
+
+    def _evict(self):
+        """Drops least recently seen groups until the store is within its bounds. Called with the lock held."""
+        while len(self.groups) > 1 and (len(self.groups) > self.max_groups or self.size > self.max_bytes):
+            fingerprint, group = self.groups.popitem(last=False)
+            self.size -= group.size
+            self.evicted += 1
+            if self.tracking:
+                self._changed.discard(fingerprint)
+                self._removed.add(fingerprint)
 
-    def add_error(self, error_message, stack_trace, error_type):
-        # Add to general errors
-        self.general_errors.append({'message': error_message, 'stack_trace': stack_trace})
+    def summary(self):
+        """Returns the groups as dictionaries, most recently seen first."""
+        with self._lock:
+            groups = list(reversed(self.groups.values()))
+        return [group.to_dict() for group in groups]
 
-        # Add to specific errors
-        if error_type not in self.specific_errors:
-            self.specific_errors[error_type] = []
+    def take_changes(self):
+        """
+        Returns the groups added or updated since the previous call (as dictionaries) and the
+        fingerprints removed since then. Work is proportional to the number of changes.
+        """
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            removed, self._removed = self._removed, set()
+            groups = [self.groups[fingerprint] for fingerprint in changed]
+        return [group.to_dict() for group in groups], sorted(removed)
 
-        self.specific_errors[error_type].append({'message': error_message, 'stack_trace': stack_trace})
+    def set_tracking(self, tracking):
+        """Starts or stops collecting changes; stopping discards the changes not yet taken."""
+        with self._lock:
+            self.tracking = tracking
+            if not tracking:
+                self._changed.clear()
+                self._removed.clear()
+
+    def clear(self):
+        with self._lock:
+            if self.tracking:
+                self._removed.update(self.groups)
+            self._changed.clear()
+            self.groups.clear()
+            self.size = 0
 
 # Instantiate the error store globally
 error_store = ErrorStore()
 
+class ErrorSummaryPublisher:
+    """
+    Coalesces error summary updates. Recording an error only sets a dirty flag; a background
+    thread checks it at a fixed rate and publishes the groups that are new or changed since the
+    previous publish (plus the fingerprints that were evicted) to every subscriber. New
+    subscribers first receive the full current summary, then the deltas that follow it.
+
+    Without subscribers nothing is tracked, rendered or published: the store collects changes
+    and the thread starts only once the first subscriber arrives, which gets the full summary.
+    """
+
+    def __init__(self, store, interval=1.0):
+        """
+        :param store: The ErrorStore whose changes are published.
+        :param interval: Seconds between publishes.
+        """
+        self.store = store
+        self.interval = interval
+        self._subscribers = []
+        self._dirty = False
+        self._lock = threading.Lock()
+        # Serializes seeding new subscribers with publishing, so no change falls between the two
+        self._publish_lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """
+        Registers callback(delta), called from the publisher thread with a dictionary holding
+        'groups' (changed groups, as in get_error_summary) and 'removed' (evicted fingerprints).
+        The callback is called once right away, from the subscribing thread, with every current
+        group, so groups recorded before subscribing are not missed.
+        """
+        with self._publish_lock:
+            if not self._subscribers:
+                # Changes are collected from here on; the summary below covers everything before
+                self.store.set_tracking(True)
+            self._deliver(callback, {'groups': self.store.summary(), 'removed': []})
+            with self._lock:
+                self._subscribers.append(callback)
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="pyvo-error-summary", daemon=True)
+                    self._thread.start()
+
+    def unsubscribe(self, callback):
+        with self._publish_lock:
+            with self._lock:
+                if callback in self._subscribers:
+                    self._subscribers.remove(callback)
+                last = not self._subscribers
+            if last:
+                self.store.set_tracking(False)
+
+    def mark_dirty(self):
+        """Flags that errors changed; O(1), safe to call on every error."""
+        self._dirty = True
+
+    def publish(self):
+        """Publishes pending changes now, if there are any and anyone is subscribed."""
+        if not self._dirty or not self._subscribers:
+            return
+        with self._publish_lock:
+            self._dirty = False
+            groups, removed = self.store.take_changes()
+            if not groups and not removed:
+                return
+            delta = {'groups': groups, 'removed': removed}
+            with self._lock:
+                subscribers = list(self._subscribers)
+            for callback in subscribers:
+                self._deliver(callback, delta)
+
+    @staticmethod
+    def _deliver(callback, delta):
+        try:
+            callback(delta)
+        except Exception as e:
+            logger.error(f"Error in error summary subscriber {callback!r}: {e}")
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            self.publish()
+
+error_summary_publisher = ErrorSummaryPublisher(error_store)
+
+# Endpoint receiving batched error reports from the background shipper
+ERROR_SERVICE_URL = "https://example.com/error-reporting"
+
+error_shipper = ErrorShipper(ERROR_SERVICE_URL)
+
 def handle_error(error):
     """
     This function handles errors that occur within decorated functions.
     It logs the error details and stack trace for debugging purposes.
-    It also stores the error information in a global store for later access.
+    It also records the error in its fingerprint group in the global store for later access.
+    Logging and external reporting are rate limited per fingerprint; every occurrence is still counted.
 
     Args:
         error (Exception): The exception that was raised during function execution.
     """
-    # Log the error with a detailed traceback
-    error_message = str(error)
-    stack_trace = traceback.format_exc()
-    
-    logger.error(f"An error occurred at {time.time()}: {error_message}")
-    logger.error("Stack Trace:")
-    logger.error(stack_trace)  # Log the full stack trace of the error
-
-    # Store the error in the general errors list
-    error_store.add_error(error_message, stack_trace, "GeneralError")
-
-    # Dynamically categorize the error based on its type
-    error_type = type(error).__name__  # Get the type of the error dynamically
+    # Group the error with earlier occurrences of the same failure
+    group = error_store.add_error(error)
 
-    # Store the specific error type
-    error_store.add_error(error_message, stack_trace, error_type)
+    # Log the error with its traceback; handlers format the traceback only if the record is emitted.
+    # During an error storm each failure is logged at a limited rate and the skipped occurrences counted.
+    suppressed = group.log_limiter.acquire()
+    if suppressed is not None:
+        logger.error("An error occurred at %s: %s (%d similar errors suppressed) [%s]",
+                     time.time(), error, suppressed, group.fingerprint,
+                     exc_info=(type(error), error, error.__traceback__))
 
     # Optionally, send the error details to an external service for further analysis
-    send_error_to_service(error)
+    suppressed = group.report_limiter.acquire()
+    if suppressed is not None:
+        send_error_to_service(error, group, suppressed)
 
     # Update the dashboard error summary with the new error information
     update_error_summary()
 
-def send_error_to_service(error):
+def send_error_to_service(error, group=None, suppressed=0):
     """
     Optionally send the error details to an external error reporting service.
     This could be a service like Sentry, Rollbar, or your custom solution.
+    The report is queued and shipped in batches by a background worker, so this never blocks
+    on the network; use error_shipper.stats() for sent, dropped and failed counts.
 
     Args:
         error (Exception): The error to send to the external service.
+        group (ErrorGroup): The error's group, whose trace is rendered once and reused.
+        suppressed (int): Occurrences of the same error not reported since the previous report.
     """
     try:
-        # Example of sending error to an external service (this is a placeholder for actual implementation)
-        external_service_url = "https://example.com/error-reporting"
         payload = {
             "error_message": str(error),
-            "stack_trace": traceback.format_exc(),
+            "error_type": type(error).__name__,
+            "fingerprint": group.fingerprint if group is not None else fingerprint_error(error),
+            "stack_trace": group.stack_trace if group is not None else
+                           "".join(traceback.format_exception(type(error), error, error.__traceback__)),
+            "timestamp": time.time(),
+            "suppressed_occurrences": suppressed,
             "module": "pyvo"
         }
-
-        # Example of sending a POST request (you'd use actual request code in a real-world scenario)
-        response = requests.post(external_service_url, json=payload)
-        if response.status_code == 200:
-            logger.info("Error sent successfully to the external service.")
-        else:
-            logger.warning("Failed to send error to the external service.")
+        if not error_shipper.submit(payload):
+            logger.debug("Error report queue is full; report for %s dropped.", payload["error_type"])
     except Exception as e:
-        # Log any errors that happen while trying to send the error to the external service
+        # Log any errors that happen while trying to queue the error for the external service
         logger.error(f"Error while sending error to external service: {str(e)}")
 
 def get_error_summary():
     """
-    Get the summary of all errors, both general and type-specific.
+    Get the summary of all errors, grouped by fingerprint.
     This information will be used in the dashboard to display error information.
 
     Returns:
-        dict: A dictionary containing both general and specific error summaries.
+        dict: 'groups' holds one entry per distinct failure (type, count, first/last seen,
+        sample messages and a representative stack trace); 'error_counts' totals occurrences per error type.
     """
+    groups = error_store.summary()
+    error_counts = {}
+    for group in groups:
+        error_counts[group['error_type']] = error_counts.get(group['error_type'], 0) + group['count']
     return {
-        'general_errors': error_store.general_errors,
-        'specific_errors': error_store.specific_errors
+        'groups': groups,
+        'error_counts': error_counts
     }
 
+def reset_error_data():
+    """Discards all recorded error groups."""
+    error_store.clear()
+    update_error_summary()
+
+def subscribe_error_summary(callback):
+    """Registers callback(delta) to receive changed error groups; see ErrorSummaryPublisher.subscribe."""
+    error_summary_publisher.subscribe(callback)
+
+def unsubscribe_error_summary(callback):
+    error_summary_publisher.unsubscribe(callback)
+
 def update_error_summary():
     """
-    This function is responsible for updating the error summary in the dashboard.
-    It will trigger the update in the UI, allowing the user to view the most recent errors.
-    This could be implemented with a UI callback or a direct update to the dashboard's display logic.
+    Signals that the error summary changed. Updates are coalesced: subscribers such as the
+    dashboard receive only the new or changed error groups, at most once per publish interval.
     """
-    # Assuming there's a function in the dashboard that takes error data and updates the UI
-    # For example, we might send the error summary to a web UI or a dedicated error monitoring service
-    error_summary = get_error_summary()
+    error_summary_publisher.mark_dirty()
 
-    # Placeholder: Update the UI or dashboard with the error summary
-    # You would replace this with your actual UI update code
-    print(f"Error Summary: {error_summary}")
-    
 # Example usage:
 if __name__ == "__main__":
     # Sample function to test error handling
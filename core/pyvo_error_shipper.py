@@ -0,0 +1,150 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from pyvo.core.pyvo_rate_limit import CircuitBreaker
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+class ErrorShipper:
+    """
+    Ships error reports to an HTTP collector from a background worker thread.
+
+    submit() only appends the report to a bounded in-memory queue, so the failing call's
+    thread never waits on the network. The worker sends queued reports in batches as one
+    JSON POST ({"module": "pyvo", "errors": [...]}) over a pooled keep-alive session with
+    explicit connect/read timeouts. Reports that do not fit in the queue are dropped and
+    counted; batches the collector rejects or that time out are counted as failed.
+    After repeated failures a circuit breaker stops sending (reports stay queued) and
+    lets a single batch probe the collector once its reset timeout has passed.
+    Pending reports are flushed when the process exits.
+    """
+
+    def __init__(self, url, max_queue_size=1000, batch_size=50, flush_interval=1.0, timeout=(2.0, 5.0), session=None,
+                 breaker=None):
+        """
+        :param url: Endpoint receiving the batched error reports.
+        :param max_queue_size: Maximum number of reports waiting to be sent.
+        :param batch_size: Maximum number of reports per request.
+        :param flush_interval: Seconds the worker waits for a batch to fill up.
+        :param timeout: (connect, read) timeout in seconds for each request.
+        :param session: requests.Session to send with; a pooled session is created if omitted.
+        :param breaker: CircuitBreaker guarding the collector; by default it opens after 5
+                        consecutive failures and probes again after 30 seconds.
+        """
+        self.url = url
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=0)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+        self.session = session
+        self.breaker = breaker if breaker is not None else CircuitBreaker()
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._sent = 0
+        self._dropped = 0
+        self._failed = 0
+        self._stopped = False
+        self._worker = None
+
+    def submit(self, report):
+        """
+        Queues a JSON-serializable report for shipping without blocking.
+
+        :return: False if the queue was full and the report was dropped.
+        """
+        with self._condition:
+            if self._stopped or len(self._queue) >= self.max_queue_size:
+                self._dropped += 1
+                return False
+            self._queue.append(report)
+            if len(self._queue) >= self.batch_size:
+                self._condition.notify()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="pyvo-error-shipper", daemon=True)
+                self._worker.start()
+                atexit.register(self.close)
+        return True
+
+    def stats(self):
+        """Returns queued, sent, dropped and failed report counts and the circuit breaker state."""
+        with self._condition:
+            return {"queued": len(self._queue), "sent": self._sent, "dropped": self._dropped, "failed": self._failed,
+                    "circuit": self.breaker.state}
+
+    def flush(self, timeout=None):
+        """
+        Sends every queued report from the calling thread.
+
+        :param timeout: Seconds after which remaining reports are left in the queue; None waits for all.
+        :return: True if the queue was emptied.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self._send_batch():
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        with self._condition:
+            return not self._queue
+
+    def close(self, timeout=5.0):
+        """Stops accepting reports, then sends what is queued within `timeout` seconds."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._worker is not None and self._worker is not threading.current_thread():
+            self._worker.join(timeout=timeout)
+        if not self.flush(timeout=timeout):
+            logger.warning("Exiting with %d error reports not shipped.", self.stats()["queued"])
+
+    def _run(self):
+        while True:
+            with self._condition:
+                timeout = self.flush_interval if len(self._queue) < self.batch_size else 0.0
+                if self.breaker.state != CircuitBreaker.CLOSED:
+                    # Nothing can be sent before the breaker's retry time, however full the queue is
+                    timeout = max(timeout, min(self.flush_interval, self.breaker.retry_in()))
+                if not self._stopped and timeout > 0:
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    return
+            while self._send_batch():
+                pass
+
+    def _send_batch(self):
+        """Sends up to batch_size queued reports. Returns False when the queue was empty or the circuit is open."""
+        with self._send_lock:
+            with self._condition:
+                if not self._queue or not self.breaker.allow_request():
+                    return False
+                batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+
+            try:
+                response = self.session.post(self.url, json={"module": "pyvo", "errors": batch}, timeout=self.timeout)
+                delivered = 200 <= response.status_code < 300
+                if not delivered:
+                    logger.warning("Error collector rejected %d error reports with status %s.",
+                                   len(batch), response.status_code)
+            except requests.RequestException as e:
+                delivered = False
+                logger.warning("Failed to ship %d error reports: %s", len(batch), e)
+
+            with self._condition:
+                if delivered:
+                    self.breaker.record_success()
+                    self._sent += len(batch)
+                else:
+                    self.breaker.record_failure()
+                    self._failed += len(batch)
+            return True
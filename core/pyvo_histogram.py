@@ -0,0 +1,164 @@
+import math
+from array import array
+
+# Percentiles reported by default in performance summaries
+DEFAULT_PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+class LatencyHistogram:
+    """
+    A fixed-memory, log-bucketed latency histogram in the HDR style.
+
+    Values are recorded in seconds and stored as counts in buckets whose width grows
+    with the magnitude of the value, so the relative error of any reported percentile
+    stays within the configured number of significant figures. Memory depends only on
+    the configured range and precision, never on the number of recorded samples.
+    Exact count, sum, min and max are kept alongside the buckets.
+    """
+
+    def __init__(self, significant_figures=2, resolution=1e-6, highest_trackable_value=3600.0):
+        """
+        Initializes an empty histogram.
+
+        :param significant_figures: Number of significant decimal digits kept per value (1-5).
+        :param resolution: Smallest distinguishable value in seconds (default is one microsecond).
+        :param highest_trackable_value: Largest value in seconds tracked without clamping.
+        """
+        if not 1 <= significant_figures <= 5:
+            raise ValueError("significant_figures must be between 1 and 5.")
+        if resolution <= 0 or highest_trackable_value <= resolution:
+            raise ValueError("highest_trackable_value must be greater than a positive resolution.")
+
+        self.significant_figures = significant_figures
+        self.resolution = resolution
+        self.highest_trackable_value = highest_trackable_value
+
+        # Each power-of-two range is split linearly into sub-buckets fine enough for the requested precision
+        largest_single_unit_value = 2 * 10 ** significant_figures
+        self._sub_bucket_bits = max(1, math.ceil(math.log2(largest_single_unit_value)))
+        self._sub_bucket_count = 1 << self._sub_bucket_bits
+        self._sub_bucket_half_count = self._sub_bucket_count >> 1
+        self._highest_unit = max(1, int(highest_trackable_value / resolution))
+        self._bucket_count = self._index_for_unit(self._highest_unit) + 1
+        self._counts = array('Q', bytes(8 * self._bucket_count))
+
+        self.count = 0
+        self.total = 0.0
+        self._total_squares = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def _index_for_unit(self, unit):
+        """Maps an integer number of resolution units to its bucket index."""
+        if unit < self._sub_bucket_count:
+            return unit
+        exponent = unit.bit_length() - self._sub_bucket_bits
+        mantissa = unit >> exponent
+        return self._sub_bucket_count + (exponent - 1) * self._sub_bucket_half_count + (mantissa - self._sub_bucket_half_count)
+
+    def _highest_unit_for_index(self, index):
+        """Returns the largest integer unit value that falls into the given bucket."""
+        if index < self._sub_bucket_count:
+            return index
+        offset = index - self._sub_bucket_count
+        exponent = offset // self._sub_bucket_half_count + 1
+        mantissa = offset % self._sub_bucket_half_count + self._sub_bucket_half_count
+        return ((mantissa + 1) << exponent) - 1
+
+    def record(self, value, count=1):
+        """
+        Records a value (in seconds) `count` times.
+        Values above the trackable range are clamped into the last bucket; min/max stay exact.
+        """
+        unit = int(value / self.resolution) if value > 0 else 0
+        if unit > self._highest_unit:
+            unit = self._highest_unit
+        self._counts[self._index_for_unit(unit)] += count
+
+        self.count += count
+        self.total += value * count
+        self._total_squares += value * value * count
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """Adds all samples of another histogram with the same configuration into this one."""
+        if (other.significant_figures, other.resolution, other.highest_trackable_value) != \
+                (self.significant_figures, self.resolution, self.highest_trackable_value):
+            raise ValueError("Cannot merge histograms with different configurations.")
+        counts = self._counts
+        for index, bucket_count in enumerate(other._counts):
+            if bucket_count:
+                counts[index] += bucket_count
+        self.count += other.count
+        self.total += other.total
+        self._total_squares += other._total_squares
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def copy(self):
+        """Returns an independent histogram holding the same samples."""
+        return LatencyHistogram(self.significant_figures, self.resolution, self.highest_trackable_value).merge(self)
+
+    def reset(self):
+        """Clears all recorded samples while keeping the bucket memory."""
+        for index in range(self._bucket_count):
+            self._counts[index] = 0
+        self.count = 0
+        self.total = 0.0
+        self._total_squares = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def stddev(self):
+        """Sample standard deviation, matching `statistics.stdev`."""
+        if self.count < 2:
+            return 0.0
+        variance = (self._total_squares - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+    def buckets(self):
+        """Yields (upper bound in seconds, count) pairs for every non-empty bucket in ascending order."""
+        for index, bucket_count in enumerate(self._counts):
+            if bucket_count:
+                yield (self._highest_unit_for_index(index) + 1) * self.resolution, bucket_count
+
+    def value_at_percentile(self, percentile):
+        """Returns the value (in seconds) at or below which `percentile` percent of the samples fall."""
+        return self.values_at_percentiles((percentile,))[percentile]
+
+    def values_at_percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """
+        Computes several percentiles in a single pass over the buckets.
+
+        :param percentiles: Iterable of percentiles in the range 0-100.
+        :return: Dictionary mapping each percentile to its value in seconds.
+        """
+        percentiles = sorted(percentiles)
+        results = {}
+        if not self.count:
+            return {percentile: 0.0 for percentile in percentiles}
+
+        targets = [(percentile, max(1, math.ceil(self.count * percentile / 100.0))) for percentile in percentiles]
+        position = 0
+        running = 0
+        for index, bucket_count in enumerate(self._counts):
+            if not bucket_count:
+                continue
+            running += bucket_count
+            while position < len(targets) and running >= targets[position][1]:
+                value = (self._highest_unit_for_index(index) + 1) * self.resolution
+                results[targets[position][0]] = min(max(value, self.min), self.max)
+                position += 1
+            if position == len(targets):
+                break
+        for percentile, _ in targets[position:]:
+            results[percentile] = self.max
+        return results
@@ -0,0 +1,141 @@
+import fnmatch
+import importlib.abc
+import logging
+import re
+import sys
+import threading
+from pyvo.core.pyvo_config import pyvo_config
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# pyvo never instruments itself
+ALWAYS_EXCLUDED = ("pyvo", "pyvo.*")
+
+def _compile_patterns(patterns):
+    """Compiles glob patterns into one regular expression; None when there are no patterns."""
+    if not patterns:
+        return None
+    return re.compile("|".join(fnmatch.translate(pattern) for pattern in patterns))
+
+def _instrument_module(module, kinds):
+    # Imported lazily: the monitor and performance modules pull in most of pyvo
+    for kind in kinds:
+        if kind == "monitor":
+            from pyvo.core.pyvo_monitor import pyvo_monitor
+            pyvo_monitor.auto_decorate_functions(module, recursive=False)
+        elif kind == "performance":
+            from pyvo.core.pyvo_performance import apply_performance_tracking
+            apply_performance_tracking(module, recursive=False)
+        else:
+            logger.warning(f"Unknown auto-instrumentation kind: {kind}")
+
+class InstrumentingLoader(importlib.abc.Loader):
+    """Wraps a module's real loader and instruments the module right after it has executed."""
+
+    def __init__(self, loader, kinds):
+        self.loader = loader
+        self.kinds = kinds
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        self.loader.exec_module(module)
+        try:
+            _instrument_module(module, self.kinds)
+        except Exception as e:
+            logger.error(f"Error instrumenting module {module.__name__}: {e}")
+
+    def __getattr__(self, name):
+        # Everything else (get_code, is_package, resource readers, ...) comes from the real loader
+        return getattr(self.loader, name)
+
+class InstrumentingFinder(importlib.abc.MetaPathFinder):
+    """
+    sys.meta_path finder that instruments matching modules as they are imported.
+
+    For every import it decides once whether the module name matches an include glob and
+    no exclude glob; the decision is cached, so each module name is matched only once.
+    Matching modules are located by the remaining finders as usual and get their loader
+    wrapped in an InstrumentingLoader; other imports fall through untouched.
+    """
+
+    def __init__(self, include, exclude=(), kinds=("monitor",)):
+        """
+        :param include: Glob patterns of module names to instrument (e.g. "myapp.*").
+        :param exclude: Glob patterns of module names never to instrument.
+        :param kinds: Instrumentation to apply: "monitor" and/or "performance".
+        """
+        self.include = _compile_patterns(include)
+        self.exclude = _compile_patterns(list(exclude) + list(ALWAYS_EXCLUDED))
+        self.kinds = tuple(kinds)
+        self._decisions = {}
+        self._local = threading.local()
+
+    def matches(self, fullname):
+        """Returns whether a module name is to be instrumented (cached per name)."""
+        decision = self._decisions.get(fullname)
+        if decision is None:
+            decision = self._decisions[fullname] = bool(
+                self.include is not None and self.include.match(fullname) and not self.exclude.match(fullname))
+        return decision
+
+    def find_spec(self, fullname, path, target=None):
+        if not self.matches(fullname) or getattr(self._local, "searching", False):
+            return None
+
+        # Let the other finders locate the module, then wrap its loader
+        self._local.searching = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.searching = False
+
+        if spec.loader is None or not hasattr(spec.loader, "exec_module"):
+            return spec
+        spec.loader = InstrumentingLoader(spec.loader, self.kinds)
+        return spec
+
+# The finder installed by install_import_hook, if any
+_finder = None
+
+def install_import_hook(include=None, exclude=None, kinds=None):
+    """
+    Installs the instrumenting finder at the front of sys.meta_path, replacing a previous one.
+    Arguments default to the "auto_instrument" section of PyvoConfig. Modules imported
+    before this call are not affected; use PyvoMonitor.auto_decorate_functions for those.
+    """
+    global _finder
+    settings = pyvo_config.get("auto_instrument") or {}
+    finder = InstrumentingFinder(
+        include if include is not None else settings.get("include", []),
+        exclude if exclude is not None else settings.get("exclude", []),
+        kinds if kinds is not None else settings.get("kinds", ["monitor"]),
+    )
+    uninstall_import_hook()
+    sys.meta_path.insert(0, finder)
+    _finder = finder
+    return finder
+
+def uninstall_import_hook():
+    """Removes the instrumenting finder. Modules already instrumented stay instrumented."""
+    global _finder
+    if _finder is not None and _finder in sys.meta_path:
+        sys.meta_path.remove(_finder)
+    _finder = None
+
+def install_from_config():
+    """Installs or removes the import hook according to PyvoConfig "auto_instrument"."""
+    settings = pyvo_config.get("auto_instrument") or {}
+    if settings.get("enabled"):
+        install_import_hook()
+    else:
+        uninstall_import_hook()
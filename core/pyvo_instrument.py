@@ -0,0 +1,159 @@
+import inspect
+import logging
+import sys
+import threading
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Attribute set on every wrapper installed by instrument(): the kinds of instrumentation it carries
+MARKER = "__pyvo_instrumented__"
+
+# (module name, kind) -> list of (owner, attribute name, original value, installed wrapper)
+_patches = {}
+_lock = threading.Lock()
+
+# Instrumentation kinds switched off with set_kind_enabled(); their call sites hold the originals
+_disabled_kinds = set()
+
+def instrumented_kinds(obj):
+    """Returns the instrumentation kinds already applied to a function (empty if none)."""
+    if isinstance(obj, (staticmethod, classmethod)):
+        obj = obj.__func__
+    return getattr(obj, MARKER, ())
+
+def _defined_in(obj, module_name):
+    return getattr(obj, "__module__", None) == module_name
+
+def _target_modules(module, recursive):
+    """The module itself plus, for packages, its already imported submodules."""
+    modules = [module]
+    if recursive and hasattr(module, "__path__"):
+        prefix = module.__name__ + "."
+        modules.extend(sys.modules[name] for name in sorted(sys.modules)
+                       if name.startswith(prefix) and sys.modules[name] is not None)
+    return modules
+
+def _wrap(func, decorator, kind, wrapped):
+    """Decorates a plain function once per kind; aliases of the same function share one wrapper."""
+    if kind in instrumented_kinds(func):
+        return None
+    wrapper = wrapped.get(id(func))
+    if wrapper is None:
+        wrapper = decorator(func)
+        setattr(wrapper, MARKER, instrumented_kinds(func) + (kind,))
+        wrapped[id(func)] = wrapper
+    return wrapper
+
+def _instrument_namespace(owner, module_name, decorator, kind, patches, wrapped, seen, patched):
+    """Wraps the functions, static/class methods and nested classes defined in a module or class."""
+    for name, value in list(vars(owner).items()):
+        if (id(owner), name) in patched:
+            continue  # Already instrumented for this kind (possibly switched off)
+        replacement = None
+        if inspect.isfunction(value):
+            if _defined_in(value, module_name):
+                replacement = _wrap(value, decorator, kind, wrapped)
+        elif isinstance(value, (staticmethod, classmethod)):
+            if inspect.isfunction(value.__func__) and _defined_in(value.__func__, module_name):
+                wrapper = _wrap(value.__func__, decorator, kind, wrapped)
+                if wrapper is not None:
+                    replacement = type(value)(wrapper)
+        elif inspect.isclass(value) and _defined_in(value, module_name) and id(value) not in seen:
+            # Only classes defined in this module; imported (re-exported) classes are left alone
+            seen.add(id(value))
+            _instrument_namespace(value, module_name, decorator, kind, patches, wrapped, seen, patched)
+
+        if replacement is not None:
+            try:
+                if kind not in _disabled_kinds:
+                    setattr(owner, name, replacement)
+                patches.append((owner, name, value, replacement))
+            except (AttributeError, TypeError) as e:
+                logger.warning(f"Could not instrument {module_name}.{name}: {e}")
+
+def instrument(module, decorator, kind, recursive=True):
+    """
+    Applies `decorator` to the functions and methods (including staticmethods and classmethods)
+    defined in `module`, and, for packages with `recursive`, in their already imported submodules.
+
+    Names imported from other modules are skipped, and every wrapper is marked with `kind`,
+    so instrumenting the same module again for the same kind is a no-op. The originals are
+    remembered so that uninstrument() can restore them. While the kind is switched off with
+    set_kind_enabled(), the wrappers are prepared but only installed once it is switched on.
+
+    :param decorator: Callable taking a function and returning its wrapper.
+    :param kind: Name of the instrumentation (e.g. "monitor", "performance").
+    :return: Number of attributes that were wrapped.
+    """
+    count = 0
+    with _lock:
+        for target in _target_modules(module, recursive):
+            patches = _patches.setdefault((target.__name__, kind), [])
+            before = len(patches)
+            patched = {(id(owner), name) for owner, name, _, _ in patches}
+            _instrument_namespace(target, target.__name__, decorator, kind, patches, {}, set(), patched)
+            count += len(patches) - before
+    logger.info(f"Instrumented {count} functions in {module.__name__} for {kind}.")
+    return count
+
+def uninstrument(module, kind=None, recursive=True):
+    """
+    Restores the original functions replaced by instrument(), removing the wrappers' overhead.
+    Attributes that were reassigned since are left untouched; if another kind was instrumented
+    on top, the attribute is restored once that kind has been removed and this is called again.
+
+    :param kind: Instrumentation kind to remove; None removes every kind, newest first.
+    :return: Number of attributes restored.
+    """
+    count = 0
+    with _lock:
+        for target in _target_modules(module, recursive):
+            keys = [key for key in _patches if key[0] == target.__name__ and (kind is None or key[1] == kind)]
+            # Remove the most recently applied kinds first so stacked wrappers unwind cleanly
+            for key in reversed(keys):
+                remaining = []
+                for patch in reversed(_patches.pop(key)):
+                    owner, name, original, replacement = patch
+                    if vars(owner).get(name) is replacement:
+                        setattr(owner, name, original)
+                        count += 1
+                    elif vars(owner).get(name) is original:
+                        pass  # Switched off: the original is already in place
+                    elif key[1] in instrumented_kinds(vars(owner).get(name)):
+                        # Wrapped again since (e.g. by another kind): keep the patch so it can be restored later
+                        remaining.append(patch)
+                        logger.warning(f"Not restoring {target.__name__}.{name}: remove the instrumentation applied "
+                                       f"after {key[1]} first.")
+                    else:
+                        logger.warning(f"Not restoring {target.__name__}.{name}: it was replaced after instrumentation.")
+                if remaining:
+                    _patches[key] = remaining[::-1]
+    logger.info(f"Restored {count} functions in {module.__name__}.")
+    return count
+
+def set_kind_enabled(kind, enabled):
+    """
+    Hot-swaps every attribute instrumented for `kind` between its wrapper and the original
+    function. Switched off, calls go straight to the originals and cost nothing extra;
+    switched back on, the same wrappers are reinstalled. Attributes where another kind was
+    instrumented on top of this one keep their wrappers.
+
+    :return: Number of attributes swapped.
+    """
+    count = 0
+    with _lock:
+        if enabled:
+            _disabled_kinds.discard(kind)
+        else:
+            _disabled_kinds.add(kind)
+        for (_, patch_kind), patches in _patches.items():
+            if patch_kind != kind:
+                continue
+            for owner, name, original, replacement in patches:
+                current, target = (original, replacement) if enabled else (replacement, original)
+                if vars(owner).get(name) is current:
+                    setattr(owner, name, target)
+                    count += 1
+    logger.info(f"{'Enabled' if enabled else 'Disabled'} {kind} instrumentation on {count} functions.")
+    return count
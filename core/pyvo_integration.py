@@ -1,6 +1,34 @@
 import functools
+import inspect
 import time
 import logging
+from pyvo.core.pyvo_sampling import sampling_weight
+from pyvo.core.pyvo_registry import call_sites
+
+logger = logging.getLogger("pyvo_integration")
+
+# Bit flags for the features a PyvoIntegration applies at call time
+MONITORING = 1
+LOGGING = 2
+PERFORMANCE = 4
+ERROR_HANDLING = 8
+
+def _feature_flag(flag):
+    """Builds an enable_* property backed by a bit in the shared `_flags` mask."""
+    def getter(self):
+        return bool(self._flags & flag)
+
+    def setter(self, value):
+        previous = self._flags
+        self._flags = (previous | flag) if value else (previous & ~flag)
+        if bool(previous) != bool(self._flags):
+            # All features off: call sites go straight to the original functions; any on: wrappers return
+            if self._flags:
+                call_sites.rewrap(self)
+            else:
+                call_sites.unwrap(self)
+
+    return property(getter, setter)
 
 # Set up logging for function monitoring, performance, and error handling
 def setup_logging():
@@ -20,24 +48,156 @@ def setup_logging():
         logger.addHandler(file_handler)
 
 class PyvoIntegration:
+    # Feature switches are read by integrated functions on every call, so changing them
+    # (e.g. from the dashboard's update_settings) affects already-decorated functions too.
+    # Turning every feature off also rebinds their call sites to the original functions.
+    enable_monitoring = _feature_flag(MONITORING)
+    enable_logging = _feature_flag(LOGGING)
+    enable_performance = _feature_flag(PERFORMANCE)
+    enable_error_handling = _feature_flag(ERROR_HANDLING)
+
     def __init__(self, enable_monitoring=True, enable_logging=True, enable_performance=True, enable_error_handling=True):
+        self._flags = 0
         self.enable_monitoring = enable_monitoring
         self.enable_logging = enable_logging
         self.enable_performance = enable_performance
         self.enable_error_handling = enable_error_handling
 
     def integrate(self, target_func):
-        if self.enable_monitoring:
-            target_func = self.monitor(target_func)
-        if self.enable_error_handling:
-            target_func = self.error_handling(target_func)
-        if self.enable_logging:
-            target_func = self.logging(target_func)
-        if self.enable_performance:
-            target_func = self.performance(target_func)
-        return target_func
+        """
+        Wraps target_func in a single wrapper that runs the enabled features in one frame.
+        Behaves like stacking monitor, error_handling, logging and performance (innermost
+        first), but the enabled features are looked up from the runtime flags on each call.
+        A single enabled feature takes its own path without the others' checks. The feature
+        methods are bound when integrating, so override them in a subclass rather than on
+        the instance afterwards.
+        Coroutine functions get an async wrapper that covers the awaited call.
+        The wrapper is registered so that disabling every feature can unwrap its call site;
+        references the registry cannot rebind still pay for one wrapper call.
+        """
+        integration = self
+        func_name = target_func.__name__
+        # Bound once, so each call reads closure cells instead of globals and attributes
+        monitor_before, monitor_after = self.monitor_before, self.monitor_after
+        log_function_call, log_performance_data, handle_error = self.log_function_call, self.log_performance_data, self.handle_error
+        clock = time.time
+
+        if inspect.iscoroutinefunction(target_func):
+            @functools.wraps(target_func)
+            async def async_wrapper(*args, **kwargs):
+                flags = integration._flags
+                if not flags:
+                    return await target_func(*args, **kwargs)
+
+                # Single features skip the bookkeeping of the others, like their stacked wrappers
+                if flags == PERFORMANCE:
+                    weight = sampling_weight(func_name)
+                    if not weight:
+                        return await target_func(*args, **kwargs)
+                    start_time = clock()
+                    result = await target_func(*args, **kwargs)
+                    log_performance_data(target_func, start_time, weight)
+                    return result
+                if flags == ERROR_HANDLING:
+                    try:
+                        return await target_func(*args, **kwargs)
+                    except Exception as e:
+                        handle_error(e, target_func, args, kwargs)
+                        raise
+                if flags == LOGGING:
+                    result = await target_func(*args, **kwargs)
+                    log_function_call(target_func, args, kwargs, result)
+                    return result
+                if flags == MONITORING:
+                    monitor_before(target_func, args, kwargs)
+                    result = await target_func(*args, **kwargs)
+                    monitor_after(target_func, args, kwargs)
+                    return result
+
+                weight = sampling_weight(func_name) if flags & PERFORMANCE else 0
+                if weight:
+                    start_time = clock()
+                try:
+                    if flags & MONITORING:
+                        monitor_before(target_func, args, kwargs)
+                    result = await target_func(*args, **kwargs)
+                    if flags & MONITORING:
+                        monitor_after(target_func, args, kwargs)
+                except Exception as e:
+                    if flags & ERROR_HANDLING:
+                        handle_error(e, target_func, args, kwargs)
+                    raise
+                if flags & LOGGING:
+                    log_function_call(target_func, args, kwargs, result)
+                if weight:
+                    log_performance_data(target_func, start_time, weight)
+                return result
+
+            call_sites.register(self, target_func, async_wrapper)
+            return async_wrapper
+
+        @functools.wraps(target_func)
+        def wrapper(*args, **kwargs):
+            flags = integration._flags
+            if not flags:
+                return target_func(*args, **kwargs)
+
+            # Single features skip the bookkeeping of the others, like their stacked wrappers
+            if flags == PERFORMANCE:
+                weight = sampling_weight(func_name)
+                if not weight:
+                    return target_func(*args, **kwargs)
+                start_time = clock()
+                result = target_func(*args, **kwargs)
+                log_performance_data(target_func, start_time, weight)
+                return result
+            if flags == ERROR_HANDLING:
+                try:
+                    return target_func(*args, **kwargs)
+                except Exception as e:
+                    handle_error(e, target_func, args, kwargs)
+                    raise
+            if flags == LOGGING:
+                result = target_func(*args, **kwargs)
+                log_function_call(target_func, args, kwargs, result)
+                return result
+            if flags == MONITORING:
+                monitor_before(target_func, args, kwargs)
+                result = target_func(*args, **kwargs)
+                monitor_after(target_func, args, kwargs)
+                return result
+
+            weight = sampling_weight(func_name) if flags & PERFORMANCE else 0
+            if weight:
+                start_time = clock()
+            try:
+                if flags & MONITORING:
+                    monitor_before(target_func, args, kwargs)
+                result = target_func(*args, **kwargs)
+                if flags & MONITORING:
+                    monitor_after(target_func, args, kwargs)
+            except Exception as e:
+                if flags & ERROR_HANDLING:
+                    handle_error(e, target_func, args, kwargs)
+                raise
+            if flags & LOGGING:
+                log_function_call(target_func, args, kwargs, result)
+            if weight:
+                log_performance_data(target_func, start_time, weight)
+            return result
+
+        call_sites.register(self, target_func, wrapper)
+        return wrapper
 
     def monitor(self, func):
+        if inspect.iscoroutinefunction(func):
+            async def async_wrapper(*args, **kwargs):
+                self.monitor_before(func, args, kwargs)
+                result = await func(*args, **kwargs)
+                self.monitor_after(func, args, kwargs)
+                return result
+            return async_wrapper
+
         def wrapper(*args, **kwargs):
             self.monitor_before(func, args, kwargs)
             result = func(*args, **kwargs)
@@ -46,6 +206,13 @@ class PyvoIntegration:
         return wrapper
 
     def logging(self, func):
+        if inspect.iscoroutinefunction(func):
+            async def async_wrapper(*args, **kwargs):
+                result = await func(*args, **kwargs)
+                self.log_function_call(func, args, kwargs, result)
+                return result
+            return async_wrapper
+
         def wrapper(*args, **kwargs):
             result = func(*args, **kwargs)
             self.log_function_call(func, args, kwargs, result)
@@ -53,14 +220,37 @@ class PyvoIntegration:
         return wrapper
 
     def performance(self, func):
+        if inspect.iscoroutinefunction(func):
+            async def async_wrapper(*args, **kwargs):
+                weight = sampling_weight(func.__name__)
+                if not weight:
+                    return await func(*args, **kwargs)  # Not sampled: skip timing and logging
+                start_time = time.time()
+                result = await func(*args, **kwargs)
+                self.log_performance_data(func, start_time, weight)
+                return result
+            return async_wrapper
+
         def wrapper(*args, **kwargs):
+            weight = sampling_weight(func.__name__)
+            if not weight:
+                return func(*args, **kwargs)  # Not sampled: skip timing and logging
             start_time = time.time()
             result = func(*args, **kwargs)
-            self.log_performance_data(func, start_time)
+            self.log_performance_data(func, start_time, weight)
             return result
         return wrapper
 
     def error_handling(self, func):
+        if inspect.iscoroutinefunction(func):
+            async def async_wrapper(*args, **kwargs):
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    self.handle_error(e, func, args, kwargs)
+                    raise
+            return async_wrapper
+
         def wrapper(*args, **kwargs):
             try:
                 return func(*args, **kwargs)
@@ -70,21 +260,24 @@ class PyvoIntegration:
         return wrapper
 
     def monitor_before(self, func, args, kwargs):
-        logger.info(f"Monitoring before function: {func.__name__} with arguments: {args}, keyword arguments: {kwargs}")
+        logger.info("Monitoring before function: %s with arguments: %s, keyword arguments: %s", func.__name__, args, kwargs)
 
     def monitor_after(self, func, args, kwargs):
-        logger.info(f"Monitoring after function: {func.__name__} with arguments: {args}, keyword arguments: {kwargs}")
+        logger.info("Monitoring after function: %s with arguments: %s, keyword arguments: %s", func.__name__, args, kwargs)
 
     def log_function_call(self, func, args, kwargs, result):
-        logger.info(f"Function '{func.__name__}' called with arguments: {args}, keyword arguments: {kwargs}, returned: {result}")
+        logger.info("Function '%s' called with arguments: %s, keyword arguments: %s, returned: %s", func.__name__, args, kwargs, result)
 
-    def log_performance_data(self, func, start_time):
+    def log_performance_data(self, func, start_time, weight=1):
         execution_time = time.time() - start_time
-        logger.info(f"Function '{func.__name__}' executed in {execution_time:.4f} seconds")
+        if weight > 1:
+            logger.info("Function '%s' executed in %.4f seconds (sampled 1 in %d calls)", func.__name__, execution_time, weight)
+        else:
+            logger.info("Function '%s' executed in %.4f seconds", func.__name__, execution_time)
 
     def handle_error(self, error, func, args, kwargs):
-        logger.error(f"Error occurred in function: {func.__name__} with arguments: {args}, keyword arguments: {kwargs}")
-        logger.error(f"Error message: {str(error)}")
+        logger.error("Error occurred in function: %s with arguments: %s, keyword arguments: %s", func.__name__, args, kwargs)
+        logger.error("Error message: %s", error)
 
 # Example Usage
 if __name__ == "__main__":
@@ -0,0 +1,129 @@
+import functools
+import inspect
+import time
+
+def is_generator_function(func):
+    """Returns True for generator and async generator functions."""
+    return inspect.isgeneratorfunction(func) or inspect.isasyncgenfunction(func)
+
+class IterationStats:
+    """
+    Aggregated consumption statistics for a generator or async generator function:
+    time to first item, total consumption time and number of items produced.
+    """
+
+    def __init__(self):
+        self.iterator_count = 0
+        self.first_item_count = 0
+        self.total_first_item_time = 0.0
+        self.total_consumption_time = 0.0
+        self.total_items = 0
+
+    def record(self, consumption_time, first_item_time, items, weight=1):
+        """Adds one consumed iterator (standing for `weight` iterators when sampled)."""
+        self.iterator_count += weight
+        self.total_consumption_time += consumption_time * weight
+        self.total_items += items * weight
+        if first_item_time is not None:
+            self.first_item_count += weight
+            self.total_first_item_time += first_item_time * weight
+
+    def summary(self):
+        """Returns average time to first item, average consumption time, items per call and items per second."""
+        return {
+            "avg_first_item_time": self.total_first_item_time / self.first_item_count if self.first_item_count else 0.0,
+            "avg_consumption_time": self.total_consumption_time / self.iterator_count if self.iterator_count else 0.0,
+            "avg_items": self.total_items / self.iterator_count if self.iterator_count else 0.0,
+            "items_per_second": self.total_items / self.total_consumption_time if self.total_consumption_time else 0.0,
+        }
+
+def wrap_generator_function(func, start, finish):
+    """
+    Wraps a generator or async generator function so that consumption of the returned
+    iterator is measured. Values passed with send()/asend() and exceptions thrown in
+    are forwarded to the wrapped generator.
+
+    :param start: Called when a new iterator starts running; returns a token, or None to skip measurement.
+    :param finish: Called as finish(token, consumption_time, first_item_time, items, error) once
+                   the iterator is exhausted, closed or fails. first_item_time is None if nothing was produced.
+    """
+    if inspect.isasyncgenfunction(func):
+        @functools.wraps(func)
+        async def async_generator_wrapper(*args, **kwargs):
+            agen = func(*args, **kwargs)
+            token = start()
+            start_time = time.time()
+            first_item_time = None
+            items = 0
+            error = None
+            sent = None
+            thrown = None
+            try:
+                while True:
+                    try:
+                        if thrown is not None:
+                            value = await agen.athrow(thrown)
+                        else:
+                            value = await agen.asend(sent)
+                    except StopAsyncIteration:
+                        return
+                    except Exception as e:
+                        error = e
+                        raise
+                    items += 1
+                    if first_item_time is None:
+                        first_item_time = time.time() - start_time
+                    try:
+                        sent = yield value
+                        thrown = None
+                    except GeneratorExit:
+                        await agen.aclose()
+                        raise
+                    except BaseException as e:
+                        sent = None
+                        thrown = e
+            finally:
+                if token is not None:
+                    finish(token, time.time() - start_time, first_item_time, items, error)
+
+        return async_generator_wrapper
+
+    @functools.wraps(func)
+    def generator_wrapper(*args, **kwargs):
+        gen = func(*args, **kwargs)
+        token = start()
+        start_time = time.time()
+        first_item_time = None
+        items = 0
+        error = None
+        sent = None
+        thrown = None
+        try:
+            while True:
+                try:
+                    if thrown is not None:
+                        value = gen.throw(thrown)
+                    else:
+                        value = gen.send(sent)
+                except StopIteration as stop:
+                    return stop.value
+                except Exception as e:
+                    error = e
+                    raise
+                items += 1
+                if first_item_time is None:
+                    first_item_time = time.time() - start_time
+                try:
+                    sent = yield value
+                    thrown = None
+                except GeneratorExit:
+                    gen.close()
+                    raise
+                except BaseException as e:
+                    sent = None
+                    thrown = e
+        finally:
+            if token is not None:
+                finish(token, time.time() - start_time, first_item_time, items, error)
+
+    return generator_wrapper
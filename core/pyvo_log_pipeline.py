@@ -0,0 +1,239 @@
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from logging.handlers import BaseRotatingHandler
+
+# Loggers used by pyvo's core modules and bundled plugins
+PYVO_LOGGERS = (
+    "pyvo",
+    "pyvo_integration",
+    "pyvo_plugin_system",
+    "LoggingPlugin",
+    "PerformancePlugin",
+    "CustomPlugin",
+    "ExternalMonitorPlugin",
+)
+
+class _QueueingHandler(logging.Handler):
+    """Handler that hands unformatted records to an AsyncLogPipeline."""
+
+    def __init__(self, pipeline):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def handle(self, record):
+        # Skip Handler.handle's lock: enqueueing is already thread-safe
+        self.pipeline.enqueue(record)
+        return True
+
+    def emit(self, record):
+        self.pipeline.enqueue(record)
+
+class AsyncLogPipeline:
+    """
+    Opt-in asynchronous, batched delivery for pyvo's loggers.
+
+    Once installed on a set of loggers, records are appended to a bounded in-memory
+    queue on the caller's thread without being formatted. A background writer thread
+    drains the queue in batches, formats the records (this is where message arguments
+    are rendered) and writes each batch to stream and file handlers with a single
+    write and flush. When the queue is full, records are either dropped and counted
+    ("drop") or the caller waits for space up to `block_timeout` seconds ("block").
+
+    Because formatting is deferred, mutable arguments are rendered as they are when
+    the writer processes the record, not as they were when it was logged.
+    """
+
+    def __init__(self, max_queue_size=10000, policy="drop", batch_size=512, flush_interval=0.1, block_timeout=1.0):
+        """
+        :param max_queue_size: Maximum number of records waiting to be written.
+        :param policy: "drop" to discard records when the queue is full, "block" to wait for space.
+        :param batch_size: Maximum number of records written per batch.
+        :param flush_interval: Seconds the writer sleeps when the queue is empty.
+        :param block_timeout: With the "block" policy, seconds to wait before dropping anyway.
+        """
+        if policy not in ("drop", "block"):
+            raise ValueError("policy must be 'drop' or 'block'.")
+        self.max_queue_size = max_queue_size
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+
+        self._queue = deque()
+        self._dropped = 0
+        self._written = 0
+        self._stats_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._installed = {}  # logger name -> (logger, original handlers, original propagate)
+        self._stopped = threading.Event()
+        self._writer = None
+
+    def enqueue(self, record):
+        """Appends a record to the queue, applying the drop-or-block policy when it is full."""
+        queue = self._queue
+        if len(queue) >= self.max_queue_size:
+            if self.policy == "block" and not self._stopped.is_set():
+                deadline = time.monotonic() + self.block_timeout
+                while len(queue) >= self.max_queue_size and time.monotonic() < deadline:
+                    time.sleep(0.001)
+            if len(queue) >= self.max_queue_size:
+                with self._stats_lock:
+                    self._dropped += 1
+                return
+        queue.append(record)
+
+    def install(self, logger_names=PYVO_LOGGERS):
+        """
+        Routes the given loggers through the pipeline. Their current handlers (and, if they
+        propagate, their ancestors' handlers) are invoked by the writer thread instead.
+        Configure handlers before installing; handlers added to these loggers afterwards run synchronously.
+        """
+        for name in logger_names:
+            if name in self._installed:
+                continue
+            target = logging.getLogger(name)
+            handlers = list(target.handlers)
+            self._installed[name] = (target, handlers, target.propagate)
+            for handler in handlers:
+                target.removeHandler(handler)
+            target.addHandler(_QueueingHandler(self))
+            target.propagate = False
+
+        if self._writer is None or not self._writer.is_alive():
+            self._stopped.clear()
+            self._writer = threading.Thread(target=self._write_loop, name="pyvo-log-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+        return self
+
+    def uninstall(self):
+        """Writes pending records and restores the loggers' original handlers."""
+        self.close()
+        for target, handlers, propagate in self._installed.values():
+            for handler in list(target.handlers):
+                if isinstance(handler, _QueueingHandler):
+                    target.removeHandler(handler)
+            for handler in handlers:
+                target.addHandler(handler)
+            target.propagate = propagate
+        self._installed.clear()
+
+    def close(self):
+        """Stops the writer thread after writing every queued record."""
+        self._stopped.set()
+        if self._writer is not None and self._writer is not threading.current_thread():
+            self._writer.join(timeout=5)
+        self.flush()
+
+    def flush(self):
+        """Writes every queued record from the calling thread."""
+        while self._write_batch():
+            pass
+
+    def stats(self):
+        """Returns queue depth, dropped and written record counts."""
+        with self._stats_lock:
+            return {"queued": len(self._queue), "dropped": self._dropped, "written": self._written}
+
+    def _write_loop(self):
+        while not self._stopped.is_set():
+            if not self._write_batch():
+                time.sleep(self.flush_interval)
+        self.flush()
+
+    def _write_batch(self):
+        """Writes up to batch_size queued records. Returns False when the queue was empty."""
+        with self._write_lock:
+            queue = self._queue
+            batch = []
+            try:
+                for _ in range(self.batch_size):
+                    batch.append(queue.popleft())
+            except IndexError:
+                pass
+            if not batch:
+                return False
+
+            # Group records per destination handler, preserving order
+            per_handler = {}
+            for record in batch:
+                for handler in self._handlers_for(record.name):
+                    if record.levelno >= handler.level:
+                        per_handler.setdefault(handler, []).append(record)
+
+            for handler, records in per_handler.items():
+                self._write_records(handler, records)
+
+            with self._stats_lock:
+                self._written += len(batch)
+            return True
+
+    def _handlers_for(self, logger_name):
+        """Returns the original handlers a record from `logger_name` would have reached."""
+        target = logging.getLogger(logger_name)
+        handlers = []
+        while target is not None:
+            installed = self._installed.get(target.name)
+            if installed is not None:
+                handlers.extend(installed[1])
+                propagate = installed[2]
+            else:
+                handlers.extend(handler for handler in target.handlers if not isinstance(handler, _QueueingHandler))
+                propagate = target.propagate
+            if not propagate:
+                break
+            target = target.parent
+        return handlers
+
+    def _write_records(self, handler, records):
+        """Writes records to a handler; plain stream and file handlers get one write and flush per batch."""
+        stream = getattr(handler, "stream", None)
+        if not isinstance(handler, logging.StreamHandler) or isinstance(handler, BaseRotatingHandler) or stream is None:
+            for record in records:
+                handler.handle(record)
+            return
+
+        lines = []
+        for record in records:
+            if not handler.filter(record):
+                continue
+            try:
+                lines.append(handler.format(record) + handler.terminator)
+            except Exception:
+                handler.handleError(record)
+        if not lines:
+            return
+
+        handler.acquire()
+        try:
+            handler.stream.write("".join(lines))
+            handler.flush()
+        except Exception:
+            handler.handleError(records[-1])
+        finally:
+            handler.release()
+
+# The pipeline installed by enable_async_logging, if any
+_pipeline = None
+
+def enable_async_logging(logger_names=PYVO_LOGGERS, **options):
+    """
+    Routes pyvo's loggers through an AsyncLogPipeline so that logging a call only costs
+    a queue append on the caller's thread. Options are passed to AsyncLogPipeline.
+
+    :return: The installed pipeline (use its stats() for queue depth and dropped records).
+    """
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = AsyncLogPipeline(**options).install(logger_names)
+    return _pipeline
+
+def disable_async_logging():
+    """Flushes pending records and returns pyvo's loggers to synchronous delivery."""
+    global _pipeline
+    if _pipeline is not None:
+        _pipeline.uninstall()
+        _pipeline = None
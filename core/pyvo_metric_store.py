@@ -0,0 +1,115 @@
+import math
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; summaries fall back to C-level builtins over the arrays
+    np = None
+
+class ColumnarSampleStore:
+    """
+    Columnar storage for raw timing samples: one array('d') column of timestamps and one
+    of durations, 8 bytes per value with no per-sample Python objects.
+
+    Columns are preallocated and filled in place; when full they are replaced by a larger
+    copy (chunked doubling growth). With a `cap`, only the newest `cap` samples are visible
+    and the columns are trimmed back to them whenever twice the cap has been filled.
+    Buffers are never resized in place, so views handed out by `timestamps()`/`durations()`
+    are zero-copy and stay valid while new samples arrive.
+    """
+
+    def __init__(self, cap=None, initial_capacity=1024):
+        """
+        :param cap: Maximum number of samples kept (oldest are discarded first); None keeps everything.
+        :param initial_capacity: Number of samples preallocated for the first chunk.
+        """
+        if cap is not None and cap < 1:
+            raise ValueError("cap must be a positive number of samples or None.")
+        self.cap = cap
+        self._initial_capacity = initial_capacity if cap is None else min(initial_capacity, 2 * cap)
+        self.clear()
+
+    def __len__(self):
+        return self._length if self.cap is None else min(self._length, self.cap)
+
+    @property
+    def discarded(self):
+        """Number of samples dropped because of the cap."""
+        return self._appended - len(self)
+
+    def append(self, timestamp, duration):
+        """Appends one sample in amortized O(1)."""
+        if self._length == len(self._durations):
+            self._grow()
+        self._timestamps[self._length] = timestamp
+        self._durations[self._length] = duration
+        self._length += 1
+        self._appended += 1
+
+    def _grow(self):
+        """Moves the samples to a new chunk: twice as large, or (once at twice the cap) trimmed to the newest `cap`."""
+        capacity = len(self._durations)
+        if self.cap is None or capacity < 2 * self.cap:
+            capacity = 2 * capacity if self.cap is None else min(2 * capacity, 2 * self.cap)
+            keep = self._length
+        else:
+            keep = self.cap
+        start = self._length - keep
+
+        timestamps = array('d', bytes(8 * capacity))
+        durations = array('d', bytes(8 * capacity))
+        timestamps[:keep] = self._timestamps[start:self._length]
+        durations[:keep] = self._durations[start:self._length]
+        self._timestamps = timestamps
+        self._durations = durations
+        self._length = keep
+
+    def _view(self, column):
+        start = self._length - len(self)
+        if np is not None:
+            return np.frombuffer(column, dtype=np.float64, count=self._length)[start:]
+        return memoryview(column)[start:self._length]
+
+    def timestamps(self):
+        """Zero-copy view of the timestamp column (a NumPy array when NumPy is installed)."""
+        return self._view(self._timestamps)
+
+    def durations(self):
+        """Zero-copy view of the duration column (a NumPy array when NumPy is installed)."""
+        return self._view(self._durations)
+
+    def summary(self, since=None):
+        """
+        Computes count, total, mean, min, max and standard deviation of the durations with
+        vectorized operations, optionally restricted to samples with timestamp >= since.
+        """
+        durations = self.durations()
+        if since is not None:
+            if np is not None:
+                durations = durations[self.timestamps() >= since]
+            else:
+                durations = [d for t, d in zip(self.timestamps(), durations) if t >= since]
+
+        count = len(durations)
+        if not count:
+            return {"count": 0, "total": 0.0, "mean": 0.0, "min": 0.0, "max": 0.0, "stddev": 0.0}
+
+        if np is not None:
+            total = float(durations.sum())
+            mean = total / count
+            stddev = float(durations.std(ddof=1)) if count > 1 else 0.0
+            return {"count": count, "total": total, "mean": mean,
+                    "min": float(durations.min()), "max": float(durations.max()), "stddev": stddev}
+
+        total = math.fsum(durations)
+        mean = total / count
+        variance = math.fsum((d - mean) ** 2 for d in durations) / (count - 1) if count > 1 else 0.0
+        return {"count": count, "total": total, "mean": mean,
+                "min": min(durations), "max": max(durations), "stddev": math.sqrt(variance)}
+
+    def clear(self):
+        """Discards all samples (views handed out earlier keep their data)."""
+        self._timestamps = array('d', bytes(8 * self._initial_capacity))
+        self._durations = array('d', bytes(8 * self._initial_capacity))
+        self._length = 0
+        self._appended = 0
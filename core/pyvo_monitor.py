@@ -1,72 +1,255 @@
 import logging
 import time
 import functools
+import inspect
+import itertools
 import sys
+from contextlib import contextmanager
 from pyvo.core.pyvo_error_handling import handle_error
+from pyvo.core.pyvo_windows import RollingWindow, DEFAULT_WINDOWS
+from pyvo.core.pyvo_recorder import ThreadLocalRecorder
+from pyvo.core.pyvo_shards import ShardedStore
+from pyvo.core.pyvo_spans import CallTree, enter_span, exit_span
+from pyvo.core.pyvo_instrument import instrument, uninstrument
+from pyvo.core.pyvo_sampling import sampling_weight
+from pyvo.core.pyvo_iteration import IterationStats, is_generator_function, wrap_generator_function
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
+# Kind under which auto-decorated functions are marked (see pyvo_instrument)
+INSTRUMENTATION_KIND = "monitor"
+
 class PyvoMonitor:
-    def __init__(self):
-        self.function_logs = {}
-
-    def _log_function_call(self, func_name, execution_time, error=None):
-        """Logs the details of a function call including execution time and errors."""
-        if func_name not in self.function_logs:
-            self.function_logs[func_name] = {
-                'call_count': 0,
-                'total_execution_time': 0,
-                'error_count': 0,
-                'error_details': []
-            }
-        
-        self.function_logs[func_name]['call_count'] += 1
-        self.function_logs[func_name]['total_execution_time'] += execution_time
-        
+    def __init__(self, buffered=True, shards=64):
+        """
+        :param buffered: Buffer calls per thread and merge them in the background (lowest overhead);
+                         with False every call updates function_logs directly under its shard lock.
+        :param shards: Number of independently locked shards function_logs is split into.
+        """
+        self.function_logs = ShardedStore(self._new_function_log, shards=shards)
+        # Aggregated caller -> callee edges between decorated calls, bounded in size
+        self.call_tree = CallTree()
+        self.buffered = buffered
+        # Set to a new value after every change to function_logs (see snapshot)
+        self.data_version = 0
+        self._versions = itertools.count(1)
+        # Calls are buffered per thread and folded into function_logs by a background merger
+        self._recorder = ThreadLocalRecorder(self._merge_function_calls, name="pyvo-monitor-merger")
+
+    @staticmethod
+    def _new_function_log():
+        return {
+            'call_count': 0,
+            'total_execution_time': 0,
+            'total_exclusive_time': 0,
+            'error_count': 0,
+            'error_details': [],
+            'recent': RollingWindow()
+        }
+
+    def _log_function_call(self, func_name, execution_time, error=None, weight=1, iteration=None, span=None):
+        """
+        Logs the details of a function call including execution time and errors.
+        `weight` is the number of calls the measurement stands for when calls are sampled.
+        `iteration` is a (time to first item, item count) pair for generator functions.
+        `span` is the (caller, exclusive time) pair returned by exit_span for calls measured
+        inside a span; calls without one count their whole time as exclusive and add no edge.
+        """
+        if self.buffered:
+            self._recorder.record(func_name, execution_time, error, weight, iteration, span, time.monotonic())
+        else:
+            self._record_function_call(func_name, execution_time, error, weight, iteration, span, time.monotonic())
+
+    def _merge_function_calls(self, calls):
+        """Folds buffered calls into function_logs. Runs with the recorder's merge lock held."""
+        for call in calls:
+            self._record_function_call(*call)
+
+    def _record_function_call(self, func_name, execution_time, error, weight, iteration, span, called_at):
+        exclusive_time = execution_time
+        if span is not None:
+            caller, exclusive_time = span
+            self.call_tree.record(caller, func_name, execution_time, exclusive_time, weight)
+        self.function_logs.update(func_name, self._apply_function_call,
+                                  execution_time, exclusive_time, error, weight, iteration, called_at)
+        # Unique per change, so concurrent unbuffered calls can never leave it at a value a reader already saw
+        self.data_version = next(self._versions)
+
+    @staticmethod
+    def _apply_function_call(logs, execution_time, exclusive_time, error, weight, iteration, called_at):
+        """Adds one call to a function's log entry. Runs with the entry's shard lock held."""
+        logs['call_count'] += weight
+        logs['total_execution_time'] += execution_time * weight
+        logs['total_exclusive_time'] += exclusive_time * weight
+        logs['recent'].record(execution_time, error=error is not None, count=weight, now=called_at)
+
         if error:
-            self.function_logs[func_name]['error_count'] += 1
-            self.function_logs[func_name]['error_details'].append(str(error))
+            logs['error_count'] += weight
+            logs['error_details'].append(str(error))
+
+        if iteration is not None:
+            if 'iteration' not in logs:
+                logs['iteration'] = IterationStats()
+            first_item_time, items = iteration
+            logs['iteration'].record(execution_time, first_item_time, items, weight)
 
     def log_summary(self):
-        """Generates a summary of function logs."""
+        """Generates a summary of function logs from a consistent merged snapshot."""
+        with self._recorder.merged():
+            return self._build_log_summary()
+
+    @contextmanager
+    def snapshot(self):
+        """
+        Merges pending calls and yields (data_version, function_logs) with the merge lock held.
+        data_version differs from any earlier value once function_logs has changed; read the
+        entries through function_logs.locked_items().
+        """
+        with self._recorder.merged():
+            yield self.data_version, self.function_logs
+
+    def call_tree_summary(self):
+        """Returns the aggregated caller -> callee edges (see CallTree.edges) from a consistent merged snapshot."""
+        with self._recorder.merged():
+            return self.call_tree.edges()
+
+    def _build_log_summary(self):
         summary = []
-        for func_name, logs in self.function_logs.items():
+        now = time.monotonic()
+        for func_name, logs in self.function_logs.locked_items():
             avg_execution_time = logs['total_execution_time'] / logs['call_count'] if logs['call_count'] > 0 else 0
+            avg_exclusive_time = logs['total_exclusive_time'] / logs['call_count'] if logs['call_count'] > 0 else 0
             summary.append(f"Function: {func_name}")
             summary.append(f"  Total Calls: {logs['call_count']}")
             summary.append(f"  Total Errors: {logs['error_count']}")
             summary.append(f"  Average Execution Time: {avg_execution_time:.4f} seconds")
+            summary.append(f"  Average Exclusive (Self) Time: {avg_exclusive_time:.4f} seconds")
+            for label, window in logs['recent'].aggregates(DEFAULT_WINDOWS, now=now).items():
+                summary.append(f"  Last {label}: {window['count']} calls, {window['error_count']} errors, "
+                               f"average {window['avg_time']:.4f} seconds, max {window['max_time']:.4f} seconds")
+            if 'iteration' in logs:
+                iteration = logs['iteration'].summary()
+                summary.append(f"  Average Time To First Item: {iteration['avg_first_item_time']:.4f} seconds")
+                summary.append(f"  Average Consumption Time: {iteration['avg_consumption_time']:.4f} seconds")
+                summary.append(f"  Average Items Per Call: {iteration['avg_items']:.2f}")
+                summary.append(f"  Items Per Second: {iteration['items_per_second']:.2f}")
             if logs['error_count'] > 0:
                 summary.append(f"  Errors: {', '.join(logs['error_details'])}")
             summary.append("-" * 50)
+
+        edges = self.call_tree.edges()
+        if edges:
+            summary.append("Calls Between Functions (caller -> callee: calls, inclusive / exclusive seconds):")
+            for edge in edges:
+                caller = edge['caller'] if edge['caller'] is not None else "(top level)"
+                summary.append(f"  {caller} -> {edge['callee']}: {edge['count']} calls, "
+                               f"{edge['inclusive_time']:.4f} / {edge['exclusive_time']:.4f}")
+            if self.call_tree.dropped_calls:
+                summary.append(f"  ({self.call_tree.dropped_calls} calls on further caller -> callee pairs not tracked)")
+            summary.append("-" * 50)
         return summary
 
-    def auto_decorate_functions(self, module):
-        """Auto-decorates all functions in a given module to track their execution."""
-        for name, obj in module.__dict__.items():
-            if callable(obj):
-                # Only decorate functions
-                decorated_func = self._decorate_function(obj)
-                setattr(module, name, decorated_func)
-                
+    def auto_decorate_functions(self, module, recursive=True):
+        """
+        Auto-decorates the functions and methods defined in a given module (and the imported
+        submodules of a package) to track their execution. Safe to call repeatedly.
+        """
+        return instrument(module, self._decorate_function, INSTRUMENTATION_KIND, recursive=recursive)
+
+    def remove_decorations(self, module, recursive=True):
+        """Restores the functions auto-decorated by auto_decorate_functions."""
+        return uninstrument(module, INSTRUMENTATION_KIND, recursive=recursive)
+
     def _decorate_function(self, func):
-        """Decorator function to measure the execution time and log errors."""
+        """
+        Decorator function to measure the execution time and log errors.
+        Only calls selected by the function's sampling policy are timed; errors are always handled.
+        Coroutine functions get an async wrapper that measures the awaited duration.
+        Timed calls run in a span, so calls to other decorated functions are attributed to this
+        one: its exclusive time excludes them and call_tree records the caller -> callee edges.
+        """
+        if inspect.iscoroutinefunction(func):
+            return self._decorate_coroutine_function(func)
+        if is_generator_function(func):
+            return self._decorate_generator_function(func)
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
+            weight = sampling_weight(func.__name__)
+            if not weight:
+                try:
+                    return func(*args, **kwargs)
+                except Exception as e:
+                    handle_error(e)
+                    raise e
+
             start_time = time.time()
+            span = enter_span(func.__name__)
             try:
                 result = func(*args, **kwargs)
+            except Exception as e:
                 execution_time = time.time() - start_time
-                self._log_function_call(func.__name__, execution_time)
-                return result
+                self._log_function_call(func.__name__, execution_time, error=e, weight=weight,
+                                        span=exit_span(span, execution_time))
+                handle_error(e)  # Call external error handler if defined
+                raise e  # Re-raise exception after logging
+            except BaseException:
+                exit_span(span, time.time() - start_time)  # Interrupted (e.g. cancelled): not recorded
+                raise
+            execution_time = time.time() - start_time
+            self._log_function_call(func.__name__, execution_time, weight=weight, span=exit_span(span, execution_time))
+            return result
+        return wrapper
+
+    def _decorate_coroutine_function(self, func):
+        """Async counterpart of _decorate_function; timing and errors cover the awaited coroutine."""
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            weight = sampling_weight(func.__name__)
+            if not weight:
+                try:
+                    return await func(*args, **kwargs)
+                except Exception as e:
+                    handle_error(e)
+                    raise e
+
+            start_time = time.time()
+            span = enter_span(func.__name__)
+            try:
+                result = await func(*args, **kwargs)
             except Exception as e:
                 execution_time = time.time() - start_time
-                self._log_function_call(func.__name__, execution_time, error=e)
+                self._log_function_call(func.__name__, execution_time, error=e, weight=weight,
+                                        span=exit_span(span, execution_time))
                 handle_error(e)  # Call external error handler if defined
                 raise e  # Re-raise exception after logging
+            except BaseException:
+                exit_span(span, time.time() - start_time)  # Interrupted (e.g. cancelled): not recorded
+                raise
+            execution_time = time.time() - start_time
+            self._log_function_call(func.__name__, execution_time, weight=weight, span=exit_span(span, execution_time))
+            return result
         return wrapper
 
+    def _decorate_generator_function(self, func):
+        """
+        Generator counterpart of _decorate_function: the returned iterator is measured while it
+        is consumed, recording consumption time, time to first item and item count.
+        Generators are resumed from their consumer's context, so they do not open spans.
+        """
+        def start():
+            return sampling_weight(func.__name__)
+
+        def finish(weight, execution_time, first_item_time, items, error):
+            if weight:
+                self._log_function_call(func.__name__, execution_time, error=error, weight=weight,
+                                        iteration=(first_item_time, items))
+            if error is not None:
+                handle_error(error)  # Call external error handler if defined
+
+        return wrap_generator_function(func, start, finish)
+
 
 # Initialize PyvoMonitor instance
 pyvo_monitor = PyvoMonitor()
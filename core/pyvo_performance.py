@@ -1,74 +1,248 @@
 import time
 import logging
 import functools
-import statistics
+import inspect
+from contextlib import contextmanager
+from pyvo.core.pyvo_histogram import LatencyHistogram
+from pyvo.core.pyvo_windows import RollingWindow, DEFAULT_WINDOWS
+from pyvo.core.pyvo_recorder import ThreadLocalRecorder
+from pyvo.core.pyvo_sampling import sampling_weight
+from pyvo.core.pyvo_iteration import IterationStats, is_generator_function, wrap_generator_function
+from pyvo.core.pyvo_metric_store import ColumnarSampleStore
+from pyvo.core.pyvo_segment_store import SegmentWriter, SEGMENT_DIR, SEGMENT_SIZE
+from pyvo.core.pyvo_instrument import instrument, uninstrument
 
-# A dictionary to store performance data for functions
+# Logger for per-call messages; arguments are formatted lazily so an async pipeline can defer them
+logger = logging.getLogger(__name__)
+
+# A dictionary mapping function names to fixed-memory latency histograms
 performance_data = {}
 
+# Raw (timestamp, execution time) samples per function in columnar arrays, for graphs and exact summaries
+sample_data = {}
+
+# Time-sliced aggregates per function for the last 1/5/15 minutes
+rolling_windows = {}
+
+# Consumption statistics for generator and async generator functions
+iteration_data = {}
+
+# Changes whenever performance_data does, so readers can cache what they derive from it
+data_version = 0
+
+# Kind under which functions instrumented by apply_performance_tracking are marked (see pyvo_instrument)
+INSTRUMENTATION_KIND = "performance"
+
+# Maximum number of raw samples kept per function for graphs and get_sample_summary (None keeps
+# every sample). The store holds up to twice the cap before trimming, 16 bytes per sample, so
+# the default costs at most 64KB per function; latency percentiles come from the histograms,
+# which cover every call whatever the cap.
+SAMPLE_CAP = 2000
+
+# Append-only segment writer persisting every sample, set by enable_persistence()
+_segment_writer = None
+
+# Offset converting the monotonic record times into wall-clock timestamps
+_WALL_CLOCK_OFFSET = time.time() - time.monotonic()
+
+def _merge_samples(samples):
+    """
+    Folds buffered samples into the shared per-function aggregates.
+    Only called by the recorder, with its merge lock held.
+    Memory per function stays constant regardless of the number of calls.
+    """
+    global data_version
+    for function_name, execution_time, error, weight, iteration, recorded_at in samples:
+        histogram = performance_data.get(function_name)
+        if histogram is None:
+            histogram = performance_data[function_name] = LatencyHistogram()
+            sample_data[function_name] = ColumnarSampleStore(cap=SAMPLE_CAP)
+            rolling_windows[function_name] = RollingWindow()
+        histogram.record(execution_time, count=weight)
+        sample_data[function_name].append(recorded_at + _WALL_CLOCK_OFFSET, execution_time)
+        if _segment_writer is not None:
+            _segment_writer.append(function_name, recorded_at + _WALL_CLOCK_OFFSET, execution_time, error)
+        rolling_windows[function_name].record(execution_time, error=error, count=weight, now=recorded_at)
+        if iteration is not None:
+            if function_name not in iteration_data:
+                iteration_data[function_name] = IterationStats()
+            first_item_time, items = iteration
+            iteration_data[function_name].record(execution_time, first_item_time, items, weight)
+    data_version += 1
+
+# Per-thread sample buffers, merged into performance_data in the background
+_recorder = ThreadLocalRecorder(_merge_samples, name="pyvo-performance-merger")
+
+def enable_persistence(directory=SEGMENT_DIR, segment_size=SEGMENT_SIZE):
+    """
+    Persists every recorded sample to memory-mapped, append-only segment files in `directory`
+    (read them with pyvo.core.pyvo_segment_store or scripts/generate_report.py).
+    Samples are appended by the background merger, never on the measured call's thread.
+    """
+    global _segment_writer
+    with _recorder.merged():
+        if _segment_writer is None:
+            _segment_writer = SegmentWriter(directory, segment_size)
+        return _segment_writer
+
+def disable_persistence():
+    """Writes pending samples and closes the current segment file."""
+    global _segment_writer
+    with _recorder.merged():
+        if _segment_writer is not None:
+            _segment_writer.close()
+            _segment_writer = None
+
+def record_performance(function_name, execution_time, error=False, weight=1, iteration=None):
+    """
+    Records a single execution time for the given function.
+    The sample goes to the calling thread's buffer, so concurrent callers never contend on a lock.
+    `weight` is the number of calls the sample stands for when calls are sampled.
+    `iteration` is a (time to first item, item count) pair for generator functions.
+    """
+    _recorder.record(function_name, execution_time, error, weight, iteration, time.monotonic())
+
+def _finish_call(function_name, start_time, failed, weight):
+    """Stores and logs the execution time of a measured call."""
+    execution_time = time.time() - start_time
+
+    # Store the execution time in the function's latency histogram
+    record_performance(function_name, execution_time, error=failed, weight=weight)
+
+    # Log the performance metric
+    logger.info("Performance: %s executed in %.4f seconds.", function_name, execution_time)
+
 def track_performance(func):
     """
     A decorator function to track the execution time of functions.
     Logs and stores performance metrics like execution time.
+    Calls are measured according to the function's sampling policy (see PyvoConfig "sampling").
+    Coroutine functions get an async wrapper that measures the awaited duration.
+    For generator and async generator functions the returned iterator is measured instead:
+    the execution time is the time taken to consume it, plus time to first item and item count.
     """
+    function_name = func.__name__
+
+    if is_generator_function(func):
+        def start():
+            return sampling_weight(function_name) or None
+
+        def finish(weight, execution_time, first_item_time, items, error):
+            if error is not None:
+                logger.error("Error executing function %s: %s", function_name, error)
+            record_performance(function_name, execution_time, error=error is not None, weight=weight,
+                               iteration=(first_item_time, items))
+            logger.info("Performance: %s consumed in %.4f seconds (%d items).", function_name, execution_time, items)
+
+        return wrap_generator_function(func, start, finish)
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            weight = sampling_weight(function_name)
+            if not weight:
+                return await func(*args, **kwargs)  # Not sampled: run without timing or logging
+
+            start_time = time.time()  # Record the start time
+            failed = False
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                failed = True
+                logger.error("Error executing function %s: %s", function_name, e)
+                raise
+            finally:
+                _finish_call(function_name, start_time, failed, weight)
+
+        return async_wrapper
+
     @functools.wraps(func)
     def wrapper(*args, **kwargs):
+        weight = sampling_weight(function_name)
+        if not weight:
+            return func(*args, **kwargs)  # Not sampled: run without timing or logging
+
         start_time = time.time()  # Record the start time
+        failed = False
         try:
-            result = func(*args, **kwargs)
+            return func(*args, **kwargs)
         except Exception as e:
-            logging.error(f"Error executing function {func.__name__}: {e}")
+            failed = True
+            logger.error("Error executing function %s: %s", function_name, e)
             raise
         finally:
-            end_time = time.time()  # Record the end time
-            execution_time = end_time - start_time
-            function_name = func.__name__
-            
-            # Store the execution time in the performance data dictionary
-            if function_name not in performance_data:
-                performance_data[function_name] = []
-            performance_data[function_name].append(execution_time)
-            
-            # Log the performance metric
-            logging.info(f"Performance: {function_name} executed in {execution_time:.4f} seconds.")
-            
-        return result
+            _finish_call(function_name, start_time, failed, weight)
 
     return wrapper
 
-def apply_performance_tracking(module):
+def apply_performance_tracking(module, recursive=True):
     """
-    Automatically applies the @track_performance decorator to all functions in the given module.
+    Automatically applies the @track_performance decorator to the functions and methods defined
+    in the given module (and the imported submodules of a package). Safe to call repeatedly.
     """
-    for name, obj in module.__dict__.items():
-        if callable(obj) and isinstance(obj, type(functools.partial)):  # Ensure obj is a function
-            try:
-                decorated_func = track_performance(obj)
-                setattr(module, name, decorated_func)
-            except Exception as e:
-                logging.error(f"Error decorating function {name}: {e}")
+    return instrument(module, track_performance, INSTRUMENTATION_KIND, recursive=recursive)
+
+def remove_performance_tracking(module, recursive=True):
+    """Restores the functions decorated by apply_performance_tracking."""
+    return uninstrument(module, INSTRUMENTATION_KIND, recursive=recursive)
+
+@contextmanager
+def performance_snapshot():
+    """
+    Merges pending samples and yields (data_version, performance_data) with the merge lock held,
+    so the histograms do not change while the block reads them. Do not modify them.
+    """
+    with _recorder.merged():
+        yield data_version, performance_data
 
 def get_performance_summary():
     """
     Retrieves a performance summary for all tracked functions.
-    Displays the average, maximum, and minimum execution times.
+    Displays the average, maximum, minimum and p50/p90/p99/p99.9 execution times.
+    Computed from the histograms in O(buckets), independent of the number of calls.
+    "Recent Windows" holds the same figures restricted to the last 1, 5 and 15 minutes.
     Accessible via the dashboard.
     """
+    with _recorder.merged():
+        return _build_performance_summary()
+
+def _build_performance_summary():
+    """Builds the summary rows; must be called with the recorder's merge lock held."""
     summary = []
     if performance_data:
-        for function_name, times in performance_data.items():
-            avg_time = sum(times) / len(times)
-            max_time = max(times)
-            min_time = min(times)
-            stddev_time = round(statistics.stdev(times), 4) if len(times) > 1 else 0
+        now = time.monotonic()
+        for function_name, histogram in performance_data.items():
+            percentiles = histogram.values_at_percentiles((50.0, 90.0, 99.0, 99.9))
+            recent = {}
+            for label, window in rolling_windows[function_name].aggregates(DEFAULT_WINDOWS, now=now).items():
+                recent[label] = {
+                    "Average Execution Time (s)": round(window["avg_time"], 4),
+                    "Max Execution Time (s)": round(window["max_time"], 4),
+                    "Execution Count": window["count"],
+                    "Error Count": window["error_count"],
+                    "Calls Per Second": round(window["rate"], 4)
+                }
             summary.append({
                 "Function": function_name,
-                "Average Execution Time (s)": round(avg_time, 4),
-                "Max Execution Time (s)": round(max_time, 4),
-                "Min Execution Time (s)": round(min_time, 4),
-                "Standard Deviation (s)": stddev_time,
-                "Execution Count": len(times)
+                "Average Execution Time (s)": round(histogram.mean, 4),
+                "Max Execution Time (s)": round(histogram.max, 4),
+                "Min Execution Time (s)": round(histogram.min, 4),
+                "P50 Execution Time (s)": round(percentiles[50.0], 4),
+                "P90 Execution Time (s)": round(percentiles[90.0], 4),
+                "P99 Execution Time (s)": round(percentiles[99.0], 4),
+                "P99.9 Execution Time (s)": round(percentiles[99.9], 4),
+                "Standard Deviation (s)": round(histogram.stddev, 4),
+                "Execution Count": histogram.count,
+                "Recent Windows": recent
             })
+            if function_name in iteration_data:
+                iteration = iteration_data[function_name].summary()
+                summary[-1].update({
+                    "Average Time To First Item (s)": round(iteration["avg_first_item_time"], 4),
+                    "Average Consumption Time (s)": round(iteration["avg_consumption_time"], 4),
+                    "Average Items Per Call": round(iteration["avg_items"], 2),
+                    "Items Per Second": round(iteration["items_per_second"], 2)
+                })
     else:
         summary.append({"Error": "No performance data available yet."})
     
@@ -89,17 +263,33 @@ def log_performance_summary():
                 logging.info(f"    Average Execution Time: {item['Average Execution Time (s)']} seconds")
                 logging.info(f"    Max Execution Time: {item['Max Execution Time (s)']} seconds")
                 logging.info(f"    Min Execution Time: {item['Min Execution Time (s)']} seconds")
+                logging.info(f"    P50/P90/P99/P99.9 Execution Time: {item['P50 Execution Time (s)']}/{item['P90 Execution Time (s)']}/"
+                             f"{item['P99 Execution Time (s)']}/{item['P99.9 Execution Time (s)']} seconds")
                 logging.info(f"    Standard Deviation: {item['Standard Deviation (s)']} seconds")
                 logging.info(f"    Execution Count: {item['Execution Count']}")
+                if "Items Per Second" in item:
+                    logging.info(f"    Average Time To First Item: {item['Average Time To First Item (s)']} seconds")
+                    logging.info(f"    Average Consumption Time: {item['Average Consumption Time (s)']} seconds")
+                    logging.info(f"    Average Items Per Call: {item['Average Items Per Call']}")
+                    logging.info(f"    Items Per Second: {item['Items Per Second']}")
+                for label, window in item["Recent Windows"].items():
+                    logging.info(f"    Last {label}: {window['Execution Count']} calls ({window['Calls Per Second']}/s), "
+                                 f"{window['Error Count']} errors, average {window['Average Execution Time (s)']} seconds, "
+                                 f"max {window['Max Execution Time (s)']} seconds")
 
 def reset_performance_data():
     """
     Resets the stored performance data.
     This can be triggered from the dashboard to start fresh measurements.
-    Clears the performance_data dictionary.
+    Clears the performance_data, sample_data, rolling_windows and iteration_data dictionaries.
     """
-    global performance_data
-    performance_data = {}
+    global data_version
+    with _recorder.merged():
+        performance_data.clear()
+        sample_data.clear()
+        rolling_windows.clear()
+        iteration_data.clear()
+        data_version += 1
     logging.info("Performance data has been reset.")
     
     return "Performance data has been reset."
@@ -108,11 +298,27 @@ def get_performance_data_for_graph():
     """
     Returns the performance data in a format suitable for graph plotting.
     This is for use in visualizing the performance metrics as a line graph.
+    "timestamps" (wall-clock seconds) and "values" (execution times) are zero-copy views
+    of the columnar sample store, holding the newest SAMPLE_CAP executions per function.
     """
     graph_data = {}
-    for function_name, times in performance_data.items():
-        graph_data[function_name] = {
-            "timestamps": list(range(len(times))),  # Each execution has a unique timestamp
-            "values": times
-        }
+    with _recorder.merged():
+        for function_name, samples in sample_data.items():
+            graph_data[function_name] = {
+                "timestamps": samples.timestamps(),
+                "values": samples.durations()
+            }
     return graph_data
+
+def get_sample_summary(function_name, since=None):
+    """
+    Computes exact statistics (count, total, mean, min, max, standard deviation) over the raw
+    samples kept for a function (the newest SAMPLE_CAP), optionally only those recorded at or
+    after `since` (time.time()).
+    Uses vectorized operations over the columnar store.
+    """
+    with _recorder.merged():
+        samples = sample_data.get(function_name)
+        if samples is None:
+            return {"Error": f"No performance data available for {function_name}."}
+        return samples.summary(since=since)
@@ -0,0 +1,106 @@
+import threading
+import time
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter: allows bursts of up to `burst` events and `rate` events per
+    second on average. Rejected events are counted so that suppressed work stays visible.
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        """
+        :param rate: Tokens added per second.
+        :param burst: Bucket capacity, i.e. the largest burst allowed at once.
+        :param clock: Monotonic time source (injectable for tests).
+        """
+        self.rate = rate
+        self.burst = burst
+        self.rejected = 0
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._skipped = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Takes one token if available.
+
+        :return: None if the event must be suppressed, otherwise the number of events
+                 suppressed since the previous one that was allowed.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                self.rejected += 1
+                self._skipped += 1
+                return None
+            self._tokens -= 1
+            skipped, self._skipped = self._skipped, 0
+            return skipped
+
+class CircuitBreaker:
+    """
+    Stops calls to a failing dependency. After `failure_threshold` consecutive failures the
+    circuit opens and allow_request() refuses calls; once `reset_timeout` seconds have
+    passed a single probe is let through (half-open). A successful probe closes the
+    circuit again, a failed one reopens it for another `reset_timeout`.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0, clock=time.monotonic):
+        """
+        :param failure_threshold: Consecutive failures that open the circuit.
+        :param reset_timeout: Seconds the circuit stays open before a probe is allowed.
+        :param clock: Monotonic time source (injectable for tests).
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        return self._state
+
+    def allow_request(self):
+        """Returns True if a call may be made now. In the half-open state only one probe is allowed."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                return True
+            return False
+
+    def retry_in(self):
+        """
+        Seconds until allow_request() lets a call through again: 0 while closed or once a probe
+        is due, the rest of the reset timeout while open and a full one while a probe is running.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return 0.0
+            if self._state == self.HALF_OPEN:
+                return self.reset_timeout
+            return max(0.0, self.reset_timeout - (self._clock() - self._opened_at))
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = self._clock()
@@ -0,0 +1,113 @@
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+class ThreadLocalRecorder:
+    """
+    Contention-free recording buffers for instrumentation hot paths.
+
+    Every thread appends its records to its own deque, so recording never takes a
+    shared lock. A background merger thread periodically drains all per-thread
+    buffers and folds the records into the shared aggregates by calling `merge`.
+    Readers use `merged()` to drain pending records and hold the merge lock while
+    they read, which gives them a consistent snapshot of the aggregates.
+    """
+
+    def __init__(self, merge, interval=0.5, name="pyvo-recorder"):
+        """
+        :param merge: Callable receiving a list of recorded tuples; runs with the merge lock held.
+        :param interval: Seconds between background merges.
+        :param name: Name of the background merger thread.
+        """
+        self._merge = merge
+        self.interval = interval
+        self.name = name
+        self._local = threading.local()
+        self._buffers = []  # (thread, deque) pairs, one per recording thread
+        self._registry_lock = threading.Lock()
+        self._merge_lock = threading.RLock()
+        self._merger = None
+        self._closed = threading.Event()
+
+    def record(self, *item):
+        """Appends a record to the calling thread's buffer. Safe to call from any thread."""
+        try:
+            buffer = self._local.buffer
+        except AttributeError:
+            buffer = self._register_thread()
+        buffer.append(item)
+
+    def _register_thread(self):
+        """Creates the buffer for the calling thread and makes sure the merger is running."""
+        buffer = deque()
+        self._local.buffer = buffer
+        with self._registry_lock:
+            self._buffers.append((threading.current_thread(), buffer))
+            if not self._closed.is_set() and (self._merger is None or not self._merger.is_alive()):
+                self._merger = threading.Thread(target=self._merge_loop, name=self.name, daemon=True)
+                self._merger.start()
+        return buffer
+
+    def _merge_loop(self):
+        """Background loop folding the per-thread buffers into the shared aggregates."""
+        while not self._closed.wait(self.interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error merging recorded data in {self.name}: {e}")
+
+    def _drain(self):
+        """Pops every pending record from all buffers. Must be called with the merge lock held."""
+        with self._registry_lock:
+            buffers = list(self._buffers)
+
+        items = []
+        finished = set()
+        for thread, buffer in buffers:
+            popleft = buffer.popleft
+            try:
+                while True:
+                    items.append(popleft())
+            except IndexError:
+                pass
+            if not thread.is_alive() and not buffer:
+                finished.add(id(buffer))
+
+        if finished:
+            # Buffers of exited threads are empty now and will never be written again
+            with self._registry_lock:
+                self._buffers = [entry for entry in self._buffers if id(entry[1]) not in finished]
+        return items
+
+    def close(self, timeout=5.0):
+        """
+        Stops the background merger, waiting for a merge in progress, then merges what is left.
+        Records made afterwards are only merged by explicit flush() or merged() calls.
+        """
+        self._closed.set()
+        with self._registry_lock:
+            merger = self._merger
+        if merger is not None and merger is not threading.current_thread():
+            merger.join(timeout=timeout)
+        self.flush()
+
+    def flush(self):
+        """Merges all pending records into the shared aggregates."""
+        with self.merged():
+            pass
+
+    @contextmanager
+    def merged(self):
+        """
+        Context manager for readers: merges pending records and keeps the merge lock
+        for the duration of the block, so the aggregates do not change while being read.
+        """
+        with self._merge_lock:
+            items = self._drain()
+            if items:
+                self._merge(items)
+            yield
@@ -0,0 +1,122 @@
+import sys
+import threading
+import weakref
+
+def _binding_path(func):
+    """
+    Returns the (module name, attribute path) a function was defined under, from its __module__
+    and __qualname__. Returns None when no module attribute can ever hold it: for functions
+    defined inside other functions, or whose module is not imported.
+    """
+    qualname = getattr(func, "__qualname__", "")
+    module_name = getattr(func, "__module__", None)
+    if not qualname or "<locals>" in qualname or module_name not in sys.modules:
+        return None
+    return module_name, tuple(qualname.split("."))
+
+def _resolve_binding(path):
+    """
+    Finds the namespace (module or class) and attribute name for a binding path. Classes are
+    looked up at swap time, since methods are registered while their class body still runs.
+    """
+    module_name, parts = path
+    owner = sys.modules.get(module_name)
+    *names, name = parts
+    for part in names:
+        if owner is None:
+            return None
+        owner = getattr(owner, part, None)
+    if owner is None:
+        return None
+    return owner, name
+
+def _swap(owner, name, current, replacement):
+    """Rebinds owner.name from `current` to `replacement`, keeping staticmethod/classmethod wrappers."""
+    raw = vars(owner).get(name)
+    if raw is current:
+        setattr(owner, name, replacement)
+        return True
+    if isinstance(raw, (staticmethod, classmethod)) and raw.__func__ is current:
+        setattr(owner, name, type(raw)(replacement))
+        return True
+    return False
+
+class _CallSite:
+    __slots__ = ("original", "wrapper_ref", "path", "unwrapped")
+
+    def __init__(self, original, path):
+        self.original = original
+        self.path = path
+        self.wrapper_ref = None
+        # (owner, name, wrapper) while the binding holds the original; keeps the wrapper alive for rewrap()
+        self.unwrapped = None
+
+class CallSiteRegistry:
+    """
+    Registry of instrumented functions, grouped by the object that controls them (for example
+    a PyvoIntegration), used to hot-swap their call sites.
+
+    unwrap() rebinds the module or class attribute that holds each wrapper back to the original
+    function, so calls no longer pass through pyvo at all; rewrap() reinstalls the wrappers.
+    Only bindings found holding the wrapper are swapped. References copied elsewhere
+    (`from module import func`, local variables) keep the wrapper, which then takes its own
+    disabled fast path.
+
+    Groups and wrappers are held weakly: a site is dropped as soon as its wrapper is garbage
+    collected, and a group's sites go with the group. Functions no module attribute can hold
+    (defined inside other functions) are not registered at all.
+    """
+
+    def __init__(self):
+        self._sites = weakref.WeakKeyDictionary()  # group -> {id(site): _CallSite}
+        self._lock = threading.Lock()
+
+    def register(self, group, original, wrapper):
+        """Registers a wrapper of `original` under `group`. Returns False if its call site can never be swapped."""
+        path = _binding_path(original)
+        if path is None:
+            return False
+        site = _CallSite(original, path)
+        with self._lock:
+            sites = self._sites.get(group)
+            if sites is None:
+                sites = self._sites[group] = {}
+            key = id(site)
+            # dict.pop is atomic, so the callback is safe from any thread the collector runs in
+            site.wrapper_ref = weakref.ref(wrapper, lambda _, sites=sites, key=key: sites.pop(key, None))
+            sites[key] = site
+        return True
+
+    def __len__(self):
+        """Returns the number of live registered call sites."""
+        with self._lock:
+            return sum(len(sites) for sites in list(self._sites.values()))
+
+    def unwrap(self, group):
+        """Rebinds the group's wrapped call sites to the original functions. Returns the number swapped."""
+        count = 0
+        with self._lock:
+            for site in list(self._sites.get(group, {}).values()):
+                if site.unwrapped is not None:
+                    continue
+                wrapper = site.wrapper_ref()
+                binding = _resolve_binding(site.path)
+                if wrapper is not None and binding is not None and _swap(*binding, wrapper, site.original):
+                    site.unwrapped = (*binding, wrapper)
+                    count += 1
+        return count
+
+    def rewrap(self, group):
+        """Reinstalls the wrappers on the call sites unwrap() swapped. Returns the number swapped."""
+        count = 0
+        with self._lock:
+            for site in list(self._sites.get(group, {}).values()):
+                if site.unwrapped is not None:
+                    owner, name, wrapper = site.unwrapped
+                    if _swap(owner, name, site.original, wrapper):
+                        count += 1
+                    site.unwrapped = None
+        return count
+
+# Registry shared by every PyvoIntegration
+call_sites = CallSiteRegistry()
@@ -0,0 +1,115 @@
+import itertools
+import logging
+import time
+from pyvo.core.pyvo_config import pyvo_config
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+class AlwaysSample:
+    """Sampling policy that measures every call."""
+
+    def weight(self):
+        return 1
+
+class FixedRateSampler:
+    """
+    Sampling policy that measures one call out of every `rate` calls.
+    Each measured call stands for `rate` calls, so counts scaled by the weight stay accurate.
+    """
+
+    def __init__(self, rate):
+        if rate < 1:
+            raise ValueError("Sampling rate must be at least 1.")
+        self.rate = int(rate)
+        self._calls = itertools.count()  # next() on itertools.count is atomic under the GIL
+
+    def weight(self):
+        return self.rate if next(self._calls) % self.rate == 0 else 0
+
+class AdaptiveSampler:
+    """
+    Sampling policy targeting at most `max_per_second` measured calls per second.
+
+    At every second boundary the sampling interval is re-derived from the number of
+    calls seen during the previous second; within a second every interval-th call is
+    measured and carries the interval as its weight.
+    """
+
+    def __init__(self, max_per_second, clock=time.monotonic):
+        if max_per_second < 1:
+            raise ValueError("max_per_second must be at least 1.")
+        self.max_per_second = int(max_per_second)
+        self.clock = clock
+        self._calls = itertools.count()
+        self._second = int(clock())
+        self._second_start = 0
+        self._interval = 1
+
+    def weight(self):
+        call_index = next(self._calls)
+        second = int(self.clock())
+        if second != self._second:
+            calls = call_index - self._second_start
+            self._interval = max(1, -(-calls // self.max_per_second))  # ceiling division
+            self._second = second
+            self._second_start = call_index
+        interval = self._interval
+        return interval if (call_index - self._second_start) % interval == 0 else 0
+
+def build_sampling_policy(settings):
+    """
+    Builds a sampling policy from a configuration dictionary such as
+    {"mode": "fixed", "rate": 100} or {"mode": "adaptive", "max_per_second": 1000},
+    or from a bare mode name such as "always" (other settings take their defaults).
+    Unknown or missing modes and malformed settings measure every call.
+    """
+    if isinstance(settings, str):
+        settings = {"mode": settings}
+    elif settings is None:
+        settings = {}
+    elif not isinstance(settings, dict):
+        logger.warning(f"Invalid sampling settings {settings!r}, measuring every call.")
+        return AlwaysSample()
+    mode = settings.get("mode", "always")
+    try:
+        if mode == "fixed":
+            return FixedRateSampler(settings.get("rate", 1))
+        if mode == "adaptive":
+            return AdaptiveSampler(settings.get("max_per_second", 1000))
+    except (TypeError, ValueError) as e:
+        logger.warning(f"Invalid sampling settings {settings}: {e}")
+        return AlwaysSample()
+    if mode != "always":
+        logger.warning(f"Unknown sampling mode '{mode}', measuring every call.")
+    return AlwaysSample()
+
+# Sampling policies per function name, built lazily from the "sampling" configuration
+_policies = {}
+
+def get_sampling_policy(function_name):
+    """Returns the sampling policy configured for the given function (or the default policy)."""
+    policy = _policies.get(function_name)
+    if policy is None:
+        sampling = pyvo_config.get("sampling") or {}
+        if isinstance(sampling, dict):
+            settings = (sampling.get("functions") or {}).get(function_name, sampling.get("default"))
+        else:
+            settings = sampling  # A single setting for every function, e.g. "always"
+        policy = _policies[function_name] = build_sampling_policy(settings)
+    return policy
+
+def sampling_weight(function_name):
+    """
+    Decides whether the current call of `function_name` should be measured.
+
+    :return: 0 to skip the measurement, otherwise the number of calls the measurement stands for.
+    """
+    policy = _policies.get(function_name)
+    if policy is None:
+        policy = get_sampling_policy(function_name)
+    return policy.weight()
+
+def reload_sampling_policies():
+    """Discards cached policies so that changes to the "sampling" configuration take effect."""
+    _policies.clear()
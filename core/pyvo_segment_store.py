@@ -0,0 +1,410 @@
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+import zlib
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; readers fall back to struct.iter_unpack
+    np = None
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Default directory holding the append-only performance segment files
+SEGMENT_DIR = 'performance_segments'
+
+# Default size of one segment file; a new segment is started when the current one is full
+SEGMENT_SIZE = 64 * 1024 * 1024
+
+# Segment header: magic, format version, record size, committed record count
+HEADER = struct.Struct('<8sIIQ')
+COMMITTED = struct.Struct('<Q')
+COMMITTED_OFFSET = 16
+MAGIC = b'PYVOSEG1'
+VERSION = 2
+
+# Fixed-size record: timestamp, duration, function id | error flag, CRC32 of the preceding fields
+RECORD = struct.Struct('<ddII')
+RECORD_PAYLOAD = struct.Struct('<ddI')
+RECORD_CHECKSUM = struct.Struct('<20xI')  # Only the checksum field of a record
+ERROR_FLAG = 0x80000000
+
+# Records checksummed per vectorized step when validating uncommitted records
+CHECK_CHUNK = 65536
+
+NAMES_FILE = 'names.log'
+SEGMENT_PATTERN = 'segment-{:06d}.pvs'
+
+def _segment_paths(directory):
+    """Returns the segment files in `directory` in write order."""
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(name for name in os.listdir(directory) if name.startswith('segment-') and name.endswith('.pvs'))
+    return [os.path.join(directory, name) for name in names]
+
+def _crc32_table():
+    """Lookup table of the CRC32 polynomial zlib uses, for checksumming many records at once."""
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xEDB88320 if crc & 1 else crc >> 1
+        table.append(crc)
+    return np.array(table, dtype=np.uint32)
+
+_CRC32_TABLE = _crc32_table() if np is not None else None
+
+def _checked_record_count(buffer, start, end):
+    """
+    Counts the records from index `start` on whose checksum matches, up to the first that fails
+    or `end`. With NumPy, the CRC32 of a whole chunk of records is computed byte column by byte
+    column instead of one zlib call per record.
+    """
+    if np is not None:
+        index = start
+        while index < end:
+            count = min(CHECK_CHUNK, end - index)
+            rows = np.frombuffer(buffer, dtype=np.uint8, count=count * RECORD.size,
+                                 offset=HEADER.size + index * RECORD.size).reshape(count, RECORD.size)
+            checksums = rows[:, RECORD_PAYLOAD.size:].copy().view('<u4').ravel()
+            crc = np.full(count, 0xFFFFFFFF, dtype=np.uint32)
+            for column in range(RECORD_PAYLOAD.size):
+                crc = _CRC32_TABLE[(crc ^ rows[:, column]) & 0xFF] ^ (crc >> 8)
+            failed = np.flatnonzero((crc ^ 0xFFFFFFFF) != checksums)
+            del rows  # Holds an export of the buffer
+            if failed.size:
+                return index + int(failed[0]) - start
+            index += count
+        return end - start
+
+    view = memoryview(buffer)[HEADER.size + start * RECORD.size:HEADER.size + end * RECORD.size]
+    crc32 = zlib.crc32
+    payload_size = RECORD_PAYLOAD.size
+    offset = 0
+    records = RECORD_CHECKSUM.iter_unpack(view)
+    try:
+        for index, (checksum,) in enumerate(records):
+            if crc32(view[offset:offset + payload_size]) != checksum:
+                return index
+            offset += RECORD.size
+        return end - start
+    finally:
+        del records  # Holds an export of the view
+        view.release()
+
+def _valid_record_count(buffer, capacity):
+    """
+    Counts the valid records of a segment. The records the header counts as committed were
+    synced to disk before the count was written, so only the records behind them are checked,
+    from the first on up to the first whose checksum fails. A crash (pages reach the disk in any
+    order) or a copy taken while the writer runs can leave a hole with valid records behind it;
+    the records after the first invalid one are never trusted.
+    """
+    committed = min(COMMITTED.unpack_from(buffer, COMMITTED_OFFSET)[0], capacity)
+    return committed + _checked_record_count(buffer, committed, capacity)
+
+def _check_header(buffer, path):
+    magic, version, record_size, _ = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a pyvo performance segment (format version {VERSION}).")
+
+def _truncate_partial_line(path):
+    """Cuts a file back to its last newline, dropping a line left half-written by a crash."""
+    if not os.path.exists(path):
+        return
+    with open(path, 'r+b') as file:
+        content = file.read()
+        if content and not content.endswith(b'\n'):
+            file.truncate(content.rfind(b'\n') + 1)
+
+def _trim_segment(path):
+    """
+    Truncates a segment to its valid records, so nothing behind the first invalid record
+    survives, and marks them committed. Returns the number of records kept.
+    """
+    with open(path, 'r+b') as file:
+        size = os.fstat(file.fileno()).st_size
+        if size < HEADER.size:
+            return 0  # Cut short while being created; rewritten from scratch
+        buffer = mmap.mmap(file.fileno(), size)
+        try:
+            _check_header(buffer, path)
+            count = _valid_record_count(buffer, (size - HEADER.size) // RECORD.size)
+        finally:
+            buffer.close()
+        file.truncate(HEADER.size + count * RECORD.size)
+        os.fsync(file.fileno())
+        file.seek(COMMITTED_OFFSET)
+        file.write(COMMITTED.pack(count))
+    return count
+
+def read_function_names(directory=SEGMENT_DIR):
+    """Reads the function id -> name table written next to the segments."""
+    names = {}
+    path = os.path.join(directory, NAMES_FILE)
+    if os.path.exists(path):
+        with open(path, 'r') as file:
+            for line in file:
+                if not line.endswith('\n'):
+                    break  # Partially written last line
+                function_id, _, name = line.rstrip('\n').partition('\t')
+                names[int(function_id)] = name
+    return names
+
+class SegmentWriter:
+    """
+    Appends timing samples to memory-mapped, fixed-record segment files.
+
+    Each segment is preallocated to `segment_size` bytes and written through mmap, so an
+    append is a single struct.pack_into at the current offset. Every record carries a CRC32
+    written together with it; a record cut short by a crash fails the check, and readers
+    stop at the first such record, so earlier records are never affected. flush() and close()
+    sync the records and then store their count in the segment header; readers trust the
+    records counted there and only checksum the ones written since. When a segment is full
+    the writer commits it and starts the next one; close() truncates the current segment to
+    its records.
+
+    A new writer continues the last segment left by a previous process: it first cuts that
+    segment back to its valid records, dropping any record after a hole that readers skip
+    anyway, so appending cannot fill the hole and expose the stale records behind it.
+    """
+
+    def __init__(self, directory=SEGMENT_DIR, segment_size=SEGMENT_SIZE):
+        self.directory = directory
+        self.capacity = max(1, (segment_size - HEADER.size) // RECORD.size)
+        self.segment_size = HEADER.size + self.capacity * RECORD.size
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+        # Appending behind a partial last line would corrupt both names, so drop it first
+        names_path = os.path.join(directory, NAMES_FILE)
+        _truncate_partial_line(names_path)
+        self._function_ids = {name: function_id for function_id, name in read_function_names(directory).items()}
+        self._names_file = open(names_path, 'a')
+
+        self._file = None
+        self._map = None
+        self._segment_number = 0
+        paths = _segment_paths(directory)
+        if paths:
+            self._segment_number = int(os.path.basename(paths[-1])[8:14])
+            try:
+                count = _trim_segment(paths[-1])
+            except ValueError as e:
+                logger.warning(f"Starting a new segment after {paths[-1]}: {e}")
+                count = self.capacity
+            if count < self.capacity:
+                self._open_segment(paths[-1], count)
+                return
+        self._start_next_segment()
+
+    def _open_segment(self, path, count=0):
+        """Maps a segment at its full size and continues after its first `count` records."""
+        self._file = open(path, 'r+b' if count else 'w+b')
+        self._file.truncate(self.segment_size)
+        if not count:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, 0))
+            self._file.flush()
+        self._map = mmap.mmap(self._file.fileno(), self.segment_size)
+        self._segment_capacity = self.capacity
+        self._count = count
+        self._committed = count
+        self._offset = HEADER.size + count * RECORD.size
+
+    def _start_next_segment(self):
+        self._close_segment()
+        self._segment_number += 1
+        path = os.path.join(self.directory, SEGMENT_PATTERN.format(self._segment_number))
+        self._open_segment(path)
+
+    def _commit(self):
+        """Syncs the written records, then stores their count in the header so readers trust them."""
+        if self._map is not None and self._committed != self._count:
+            self._map.flush()
+            COMMITTED.pack_into(self._map, COMMITTED_OFFSET, self._count)
+            self._map.flush(0, min(mmap.PAGESIZE, len(self._map)))
+            self._committed = self._count
+
+    def _close_segment(self):
+        if self._map is not None:
+            self._commit()
+            self._map.close()
+            # Drops the unused preallocated space; a later writer extends the segment again
+            self._file.truncate(HEADER.size + self._count * RECORD.size)
+            self._file.close()
+            self._map = None
+            self._file = None
+
+    def _function_id(self, function_name):
+        function_id = self._function_ids.get(function_name)
+        if function_id is None:
+            function_id = len(self._function_ids)
+            self._names_file.write(f"{function_id}\t{function_name}\n")
+            self._names_file.flush()
+            self._function_ids[function_name] = function_id
+        return function_id
+
+    def append(self, function_name, timestamp, duration, error=False):
+        """Appends one sample in O(1)."""
+        with self._lock:
+            if self._count >= self._segment_capacity:
+                self._start_next_segment()
+            function_id = self._function_id(function_name)
+            if error:
+                function_id |= ERROR_FLAG
+            checksum = zlib.crc32(RECORD_PAYLOAD.pack(timestamp, duration, function_id))
+            RECORD.pack_into(self._map, self._offset, timestamp, duration, function_id, checksum)
+            self._offset += RECORD.size
+            self._count += 1
+
+    def flush(self):
+        """Writes the current segment's records to disk and commits them in its header."""
+        with self._lock:
+            self._commit()
+
+    def close(self):
+        with self._lock:
+            self._close_segment()
+            self._names_file.close()
+
+def _map_segment(path):
+    """Memory-maps a segment read-only and returns (file, map, number of valid records)."""
+    file = open(path, 'rb')
+    size = os.fstat(file.fileno()).st_size
+    if size < HEADER.size:
+        file.close()
+        return None
+    buffer = mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ)
+    try:
+        _check_header(buffer, path)
+        count = _valid_record_count(buffer, (size - HEADER.size) // RECORD.size)
+    except ValueError:
+        buffer.close()
+        file.close()
+        raise
+    return file, buffer, count
+
+def copy_segment(path, destination):
+    """
+    Copies the header and valid records of a segment to `destination`, leaving out the unused
+    preallocated space, and marks the records committed in the copy.
+    Returns the number of records copied.
+    """
+    mapped = _map_segment(path)
+    if mapped is None:
+        return 0
+    file, buffer, count = mapped
+    view = memoryview(buffer)[HEADER.size:HEADER.size + count * RECORD.size]
+    try:
+        with open(destination, 'wb') as target:
+            target.write(HEADER.pack(MAGIC, VERSION, RECORD.size, count))
+            target.write(view)
+    finally:
+        view.release()
+        buffer.close()
+        file.close()
+    return count
+
+def iter_records(directory=SEGMENT_DIR):
+    """
+    Streams (function name, timestamp, duration, error) tuples from every segment in order,
+    reading through mmap without loading whole files.
+    """
+    names = read_function_names(directory)
+    for path in _segment_paths(directory):
+        mapped = _map_segment(path)
+        if mapped is None:
+            continue
+        file, buffer, count = mapped
+        view = memoryview(buffer)[HEADER.size:HEADER.size + count * RECORD.size]
+        try:
+            for timestamp, duration, function_id, _ in RECORD.iter_unpack(view):
+                name = names.get(function_id & ~ERROR_FLAG, str(function_id & ~ERROR_FLAG))
+                yield name, timestamp, duration, bool(function_id & ERROR_FLAG)
+        finally:
+            view.release()
+            buffer.close()
+            file.close()
+
+def _aggregate_segment(buffer, count, add):
+    """Feeds per-function aggregates of one mapped segment to `add`."""
+    if np is not None:
+        dtype = np.dtype([('timestamp', '<f8'), ('duration', '<f8'), ('function_id', '<u4'), ('crc', '<u4')])
+        records = np.frombuffer(buffer, dtype=dtype, count=count, offset=HEADER.size)
+        raw_ids = records['function_id']
+        ids = raw_ids & np.uint32(~ERROR_FLAG & 0xFFFFFFFF)
+        errors = (raw_ids & np.uint32(ERROR_FLAG)) != 0
+
+        # Group records by function id once, then reduce every group in a single vectorized pass
+        order = np.argsort(ids, kind='stable')
+        sorted_ids = ids[order]
+        durations = records['duration'][order]
+        starts = np.flatnonzero(np.r_[True, sorted_ids[1:] != sorted_ids[:-1]])
+        counts = np.diff(np.r_[starts, sorted_ids.size])
+        sums = np.add.reduceat(durations, starts)
+        squares = np.add.reduceat(durations * durations, starts)
+        minimums = np.minimum.reduceat(durations, starts)
+        maximums = np.maximum.reduceat(durations, starts)
+        error_counts = np.add.reduceat(errors[order].astype(np.int64), starts)
+        for index, start in enumerate(starts):
+            add(int(sorted_ids[start]), int(counts[index]), int(error_counts[index]), float(sums[index]),
+                float(squares[index]), float(minimums[index]), float(maximums[index]))
+        return
+
+    view = memoryview(buffer)[HEADER.size:HEADER.size + count * RECORD.size]
+    try:
+        for _, duration, function_id, _ in RECORD.iter_unpack(view):
+            add(function_id & ~ERROR_FLAG, 1, 1 if function_id & ERROR_FLAG else 0,
+                duration, duration * duration, duration, duration)
+    finally:
+        view.release()
+
+def summarize_segments(directory=SEGMENT_DIR):
+    """
+    Computes per-function count, error count, average, min, max and standard deviation over
+    all segments. Each segment is mapped read-only and, when NumPy is installed, aggregated
+    with vectorized operations directly on the mapped memory.
+
+    :return: Dictionary mapping function names to their statistics.
+    """
+    names = read_function_names(directory)
+    totals = {}
+
+    def add(function_id, count, errors, total, squares, minimum, maximum):
+        stats = totals.setdefault(function_id, [0, 0, 0.0, 0.0, math.inf, -math.inf])
+        stats[0] += count
+        stats[1] += errors
+        stats[2] += total
+        stats[3] += squares
+        stats[4] = min(stats[4], minimum)
+        stats[5] = max(stats[5], maximum)
+
+    for path in _segment_paths(directory):
+        mapped = _map_segment(path)
+        if mapped is None:
+            continue
+        file, buffer, count = mapped
+        try:
+            if count:
+                _aggregate_segment(buffer, count, add)
+        finally:
+            buffer.close()
+            file.close()
+
+    summary = {}
+    for function_id, (count, errors, total, squares, minimum, maximum) in totals.items():
+        mean = total / count
+        variance = (squares - total * total / count) / (count - 1) if count > 1 else 0.0
+        summary[names.get(function_id, str(function_id))] = {
+            "count": count,
+            "error_count": errors,
+            "average_execution_time": mean,
+            "max_execution_time": maximum,
+            "min_execution_time": minimum,
+            "standard_deviation_execution_time": math.sqrt(variance) if variance > 0 else 0.0,
+        }
+    return summary
@@ -0,0 +1,61 @@
+import threading
+from collections.abc import Mapping
+
+class ShardedStore(Mapping):
+    """
+    Per-key aggregate entries split across shards, each guarded by its own lock.
+
+    A key always lands in the shard selected by its hash, so updates to one function's
+    entry are serialized (counters stay exact) while updates to functions in other
+    shards proceed in parallel. Threads only contend when they hit the same shard.
+    Read-only access follows the Mapping interface; mutate entries through update().
+    """
+
+    def __init__(self, factory, shards=64):
+        """
+        :param factory: Callable creating the entry for a key on its first update.
+        :param shards: Number of shards; rounded up to a power of two.
+        """
+        count = 1
+        while count < shards:
+            count *= 2
+        self._mask = count - 1
+        self._factory = factory
+        self._locks = [threading.Lock() for _ in range(count)]
+        self._entries = [{} for _ in range(count)]
+
+    def update(self, key, apply, *args):
+        """Calls apply(entry, *args) on the key's entry (created if missing) with its shard lock held."""
+        index = hash(key) & self._mask
+        with self._locks[index]:
+            entries = self._entries[index]
+            entry = entries.get(key)
+            if entry is None:
+                entry = entries[key] = self._factory()
+            apply(entry, *args)
+
+    def locked_items(self):
+        """
+        Yields (key, entry) pairs while holding the lock of the shard being read, so each
+        entry is seen in a consistent state. Consume the iterator promptly.
+        """
+        for lock, entries in zip(self._locks, self._entries):
+            with lock:
+                yield from list(entries.items())
+
+    def clear(self):
+        for lock, entries in zip(self._locks, self._entries):
+            with lock:
+                entries.clear()
+
+    def __getitem__(self, key):
+        return self._entries[hash(key) & self._mask][key]
+
+    def __iter__(self):
+        for lock, entries in zip(self._locks, self._entries):
+            with lock:
+                keys = list(entries)
+            yield from keys
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries)
@@ -0,0 +1,89 @@
+import contextvars
+import threading
+
+# The innermost measured call of the current thread or asyncio task
+_current_span = contextvars.ContextVar("pyvo_current_span", default=None)
+
+# Default maximum number of distinct caller -> callee edges kept by a CallTree
+MAX_CALL_EDGES = 10000
+
+class Span:
+    """One measured call in progress: its name, the enclosing call and the time spent in callees."""
+
+    __slots__ = ("name", "parent", "child_time", "_token")
+
+    def __init__(self, name, parent):
+        self.name = name
+        self.parent = parent
+        self.child_time = 0.0
+        self._token = None
+
+def enter_span(name):
+    """
+    Starts a span for a measured call, nested under the current one. Context variables are
+    per thread and are copied into asyncio tasks, so nesting follows the actual call path.
+    """
+    span = Span(name, _current_span.get())
+    span._token = _current_span.set(span)
+    return span
+
+def exit_span(span, duration):
+    """
+    Ends a span started by enter_span and charges its duration to the parent.
+
+    :return: (caller name or None for a top-level call, exclusive time). Exclusive time is the
+             duration minus time spent in measured callees; callees running concurrently
+             (e.g. gathered tasks) can exceed the duration, so it never goes below zero.
+    """
+    _current_span.reset(span._token)
+    parent = span.parent
+    if parent is not None:
+        parent.child_time += duration
+    return (parent.name if parent is not None else None), max(0.0, duration - span.child_time)
+
+class CallTree:
+    """
+    Aggregated caller -> callee edges with call counts and inclusive/exclusive time.
+    At most `max_edges` distinct edges are kept; calls on further new edges are only counted
+    in `dropped_calls`, so memory stays bounded however many call paths the program takes.
+    """
+
+    def __init__(self, max_edges=MAX_CALL_EDGES):
+        self.max_edges = max_edges
+        self.dropped_calls = 0
+        self._edges = {}  # (caller, callee) -> [call count, inclusive time, exclusive time]
+        self._lock = threading.Lock()
+
+    def record(self, caller, callee, inclusive_time, exclusive_time, weight=1):
+        """Adds `weight` calls of `callee` made from `caller` (None for top-level calls)."""
+        key = (caller, callee)
+        with self._lock:
+            edge = self._edges.get(key)
+            if edge is None:
+                if len(self._edges) >= self.max_edges:
+                    self.dropped_calls += weight
+                    return
+                edge = self._edges[key] = [0, 0.0, 0.0]
+            edge[0] += weight
+            edge[1] += inclusive_time * weight
+            edge[2] += exclusive_time * weight
+
+    def edges(self):
+        """
+        Returns a list of edge dictionaries (caller, callee, count, inclusive_time, exclusive_time),
+        largest inclusive time first. Each edge sums every call of the callee from that caller,
+        whichever path led to the caller, so the edges form a call graph rather than a tree:
+        expanding them into one would charge a callee's calls to every path through its caller.
+        """
+        with self._lock:
+            items = [(key, list(edge)) for key, edge in self._edges.items()]
+        edges = [{"caller": caller, "callee": callee, "count": count,
+                  "inclusive_time": inclusive, "exclusive_time": exclusive}
+                 for (caller, callee), (count, inclusive, exclusive) in items]
+        edges.sort(key=lambda edge: edge["inclusive_time"], reverse=True)
+        return edges
+
+    def clear(self):
+        with self._lock:
+            self._edges.clear()
+            self.dropped_calls = 0
@@ -0,0 +1,257 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pyvo.core.pyvo_windows import RollingWindow
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Default directory of the spool; one subdirectory per endpoint
+SPOOL_DIR = "monitor_spool"
+
+# Default cap on the bytes kept on disk across all endpoints
+SPOOL_MAX_BYTES = 64 * 1024 * 1024
+
+BATCH_SUFFIX = ".batch"
+ENDPOINT_FILE = "endpoint"
+
+class _Entry:
+    __slots__ = ("path", "size", "records", "created")
+
+    def __init__(self, path, size, records, created):
+        self.path = path
+        self.size = size
+        self.records = records
+        self.created = created
+
+class _Endpoint:
+    """Spooled batches of one endpoint, oldest first."""
+
+    def __init__(self, url, directory, next_sequence=0):
+        self.url = url
+        self.directory = directory
+        self.entries = deque()
+        self.next_sequence = next_sequence
+        self.draining = False
+        self.retry_at = 0.0
+        self.backoff = 0.0
+
+class MetricSpool:
+    """
+    Size-capped on-disk spool of payloads that could not be delivered, replayed in the background.
+
+    Every payload is written to its own segment file `<sequence>-<records>.batch` in a directory
+    per endpoint (written to a temporary name and renamed, so a crash never leaves a partial
+    file), which lets the spool survive process restarts: pending files are picked up again
+    on start. A replay thread drains the endpoints with pending files, at most `max_concurrency`
+    at once and one payload at a time per endpoint, so each endpoint receives its payloads in
+    the order they were spooled. An endpoint whose replay fails is retried with exponential
+    backoff. When the spool exceeds `max_bytes` the oldest payloads are deleted and counted
+    as dropped.
+    """
+
+    def __init__(self, send, directory=SPOOL_DIR, max_bytes=SPOOL_MAX_BYTES, max_concurrency=2,
+                 min_backoff=1.0, max_backoff=60.0, clock=time.monotonic):
+        """
+        :param send: Callable send(url, payload) returning True once the payload was delivered.
+        :param directory: Directory holding the spool.
+        :param max_bytes: Maximum bytes of spooled payloads across all endpoints.
+        :param max_concurrency: Maximum number of endpoints replayed at the same time.
+        :param min_backoff: Seconds before retrying an endpoint after its first failed replay.
+        :param max_backoff: Upper bound of the doubling retry delay.
+        :param clock: Function returning the current time in seconds.
+        """
+        self.send = send
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_concurrency = max_concurrency
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.clock = clock
+
+        self._endpoints = {}  # url -> _Endpoint
+        self._bytes = 0
+        self._counters = {"spooled": 0, "replayed": 0, "dropped": 0}  # records
+        self._replays = RollingWindow()
+        self._condition = threading.Condition()
+        self._pool = None
+        self._worker = None
+        self._stopped = False
+
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        if self._bytes:
+            self._start()
+
+    def _load(self):
+        """Indexes the payloads left by a previous process."""
+        for name in sorted(os.listdir(self.directory)):
+            directory = os.path.join(self.directory, name)
+            try:
+                with open(os.path.join(directory, ENDPOINT_FILE), encoding="utf-8") as file:
+                    url = file.read().strip()
+            except OSError:
+                continue
+            endpoint = _Endpoint(url, directory)
+            for file_name in sorted(os.listdir(directory)):
+                path = os.path.join(directory, file_name)
+                if file_name.endswith(".tmp"):
+                    os.remove(path)
+                    continue
+                if not file_name.endswith(BATCH_SUFFIX):
+                    continue
+                try:
+                    sequence, records = file_name[:-len(BATCH_SUFFIX)].split("-")
+                    stat = os.stat(path)
+                except (ValueError, OSError):
+                    logger.warning(f"Ignoring unexpected file in the spool: {path}")
+                    continue
+                endpoint.entries.append(_Entry(path, stat.st_size, int(records), stat.st_mtime))
+                endpoint.next_sequence = int(sequence) + 1
+                self._bytes += stat.st_size
+            self._endpoints[url] = endpoint
+        if self._bytes:
+            logger.info(f"Found {self._bytes} bytes of spooled payloads in {self.directory}")
+
+    def _endpoint(self, url):
+        endpoint = self._endpoints.get(url)
+        if endpoint is None:
+            directory = os.path.join(self.directory, hashlib.sha1(url.encode("utf-8")).hexdigest()[:16])
+            os.makedirs(directory, exist_ok=True)
+            with open(os.path.join(directory, ENDPOINT_FILE), "w", encoding="utf-8") as file:
+                file.write(url)
+            endpoint = self._endpoints[url] = _Endpoint(url, directory)
+        return endpoint
+
+    def pending(self, url):
+        """Returns whether payloads for `url` are waiting; newer payloads must then be spooled behind them."""
+        endpoint = self._endpoints.get(url)
+        return bool(endpoint is not None and (endpoint.entries or endpoint.draining))
+
+    def append(self, url, payload, records):
+        """Writes a payload of `records` records for `url` behind the ones already spooled."""
+        with self._condition:
+            endpoint = self._endpoint(url)
+            path = os.path.join(endpoint.directory, f"{endpoint.next_sequence:016d}-{records}{BATCH_SUFFIX}")
+            endpoint.next_sequence += 1
+            with open(path + ".tmp", "wb") as file:
+                file.write(payload)
+            os.replace(path + ".tmp", path)
+            endpoint.entries.append(_Entry(path, len(payload), records, time.time()))
+            self._bytes += len(payload)
+            self._counters["spooled"] += records
+            self._evict()
+            self._start()
+            self._condition.notify()
+
+    def _evict(self):
+        """Deletes the oldest payloads until the spool fits in max_bytes. Called with the condition held."""
+        while self._bytes > self.max_bytes:
+            candidates = [endpoint for endpoint in self._endpoints.values() if endpoint.entries]
+            if not candidates:
+                return
+            endpoint = min(candidates, key=lambda candidate: candidate.entries[0].created)
+            entry = endpoint.entries.popleft()
+            self._remove(entry)
+            self._counters["dropped"] += entry.records
+            logger.warning(f"Spool over {self.max_bytes} bytes, dropped {entry.records} records for {endpoint.url}")
+
+    def _remove(self, entry):
+        self._bytes -= entry.size
+        try:
+            os.remove(entry.path)
+        except OSError:
+            pass
+
+    def stats(self):
+        """
+        Returns the spooled payloads, records and bytes, the age in seconds of the oldest payload,
+        the replay rate (records per second over the last minute) and the spooled, replayed and
+        dropped record counters.
+        """
+        with self._condition:
+            entries = [entry for endpoint in self._endpoints.values() for entry in endpoint.entries]
+            stats = dict(self._counters)
+            stats["batches"] = len(entries)
+            stats["records"] = sum(entry.records for entry in entries)
+            stats["bytes"] = self._bytes
+            stats["oldest_age"] = time.time() - min(entry.created for entry in entries) if entries else 0.0
+            stats["replay_rate"] = self._replays.aggregate(60)["rate"]
+        return stats
+
+    def _start(self):
+        """Starts the replay thread. Called with the condition held or before it is shared."""
+        if self._worker is None and not self._stopped:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="pyvo-spool-replay")
+            self._worker = threading.Thread(target=self._run, name="pyvo-spool", daemon=True)
+            self._worker.start()
+
+    def close(self, timeout=5.0):
+        """Stops replaying. Spooled payloads stay on disk for the next process."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._worker is not None:
+            self._worker.join(timeout=timeout)
+            self._pool.shutdown(wait=True)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._stopped:
+                    return
+                now = self.clock()
+                due = [endpoint for endpoint in self._endpoints.values()
+                       if endpoint.entries and not endpoint.draining and endpoint.retry_at <= now]
+                if not due:
+                    waiting = [endpoint.retry_at - now for endpoint in self._endpoints.values()
+                               if endpoint.entries and not endpoint.draining]
+                    self._condition.wait(min(waiting) if waiting else None)
+                    continue
+                for endpoint in due:
+                    endpoint.draining = True
+            for endpoint in due:
+                self._pool.submit(self._drain, endpoint)
+
+    def _drain(self, endpoint):
+        """Replays one endpoint's payloads in order until it is empty or a replay fails."""
+        try:
+            while not self._stopped:
+                with self._condition:
+                    if not endpoint.entries:
+                        endpoint.backoff = 0.0
+                        return
+                    entry = endpoint.entries[0]
+                try:
+                    with open(entry.path, "rb") as file:
+                        payload = file.read()
+                except OSError:
+                    payload = None  # Evicted meanwhile
+
+                if payload is not None:
+                    try:
+                        delivered = self.send(endpoint.url, payload)
+                    except Exception as e:
+                        logger.error(f"Error replaying spooled payload to {endpoint.url}: {e}")
+                        delivered = False
+                    if not delivered:
+                        with self._condition:
+                            endpoint.backoff = min(self.max_backoff, max(self.min_backoff, endpoint.backoff * 2))
+                            endpoint.retry_at = self.clock() + endpoint.backoff
+                        return
+
+                with self._condition:
+                    if endpoint.entries and endpoint.entries[0] is entry:
+                        endpoint.entries.popleft()
+                        self._remove(entry)
+                        if payload is not None:
+                            self._counters["replayed"] += entry.records
+                            self._replays.record(0.0, count=entry.records)
+        finally:
+            with self._condition:
+                endpoint.draining = False
+                self._condition.notify()
@@ -0,0 +1,89 @@
+import time
+from array import array
+
+# Rolling windows reported in summaries, as (label, length in seconds)
+DEFAULT_WINDOWS = (("1m", 60), ("5m", 300), ("15m", 900))
+
+class RollingWindow:
+    """
+    A ring buffer of time-sliced aggregates (call count, error count, total and max
+    execution time) for a single function.
+
+    Time is divided into fixed slices; each record lands in the slice for the current
+    time and slices older than the horizon are overwritten as the ring wraps around,
+    so memory stays constant. Aggregates over the last N seconds are computed from at
+    most horizon / slice_seconds slices.
+    """
+
+    def __init__(self, slice_seconds=5, horizon_seconds=900, clock=time.monotonic):
+        """
+        :param slice_seconds: Width of one time slice in seconds (the window granularity).
+        :param horizon_seconds: Longest window that can be queried, in seconds.
+        :param clock: Function returning the current time in seconds.
+        """
+        if slice_seconds <= 0 or horizon_seconds < slice_seconds:
+            raise ValueError("horizon_seconds must be at least one positive slice_seconds.")
+        self.slice_seconds = slice_seconds
+        self.horizon_seconds = horizon_seconds
+        self.clock = clock
+
+        # One extra slice so a full horizon is still available while the current slice fills up
+        self._slice_count = int(horizon_seconds // slice_seconds) + 1
+        self._epochs = array('q', [-1]) * self._slice_count
+        self._counts = array('Q', [0]) * self._slice_count
+        self._errors = array('Q', [0]) * self._slice_count
+        self._totals = array('d', [0.0]) * self._slice_count
+        self._maxes = array('d', [0.0]) * self._slice_count
+
+    def record(self, execution_time, error=False, count=1, now=None):
+        """Adds one execution (or `count` identical executions) to the current slice."""
+        epoch = int((self.clock() if now is None else now) // self.slice_seconds)
+        index = epoch % self._slice_count
+        if self._epochs[index] != epoch:
+            # The slot still holds an expired slice: recycle it for the current one
+            self._epochs[index] = epoch
+            self._counts[index] = 0
+            self._errors[index] = 0
+            self._totals[index] = 0.0
+            self._maxes[index] = 0.0
+        self._counts[index] += count
+        if error:
+            self._errors[index] += count
+        self._totals[index] += execution_time * count
+        if execution_time > self._maxes[index]:
+            self._maxes[index] = execution_time
+
+    def aggregate(self, window_seconds, now=None):
+        """
+        Aggregates the slices covering the last `window_seconds` seconds.
+
+        :return: Dictionary with count, error_count, total_time, avg_time, max_time and rate (calls/s).
+        """
+        window_seconds = min(window_seconds, self.horizon_seconds)
+        current_epoch = int((self.clock() if now is None else now) // self.slice_seconds)
+        oldest_epoch = current_epoch - int(window_seconds // self.slice_seconds) + 1
+
+        count = errors = 0
+        total = max_time = 0.0
+        for index in range(self._slice_count):
+            epoch = self._epochs[index]
+            if oldest_epoch <= epoch <= current_epoch:
+                count += self._counts[index]
+                errors += self._errors[index]
+                total += self._totals[index]
+                if self._maxes[index] > max_time:
+                    max_time = self._maxes[index]
+
+        return {
+            "count": count,
+            "error_count": errors,
+            "total_time": total,
+            "avg_time": total / count if count else 0.0,
+            "max_time": max_time,
+            "rate": count / window_seconds,
+        }
+
+    def aggregates(self, windows=DEFAULT_WINDOWS, now=None):
+        """Returns {label: aggregate} for every (label, seconds) pair in `windows`."""
+        now = self.clock() if now is None else now
+        return {label: self.aggregate(seconds, now=now) for label, seconds in windows}
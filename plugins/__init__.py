@@ -1,42 +1,52 @@
 """
 This module is responsible for initializing the Pyvo plugins package.
-It provides an interface for dynamic loading and management of various plugins 
+It provides an interface for dynamic loading and management of various plugins
 that extend the functionality of Pyvo.
+
+Plugin modules are imported on first access (e.g. `from pyvo.plugins import StatsdPlugin`),
+so importing the package neither pulls in every plugin's dependencies nor instantiates anything.
 """
+import importlib
+
+# Module defining each available plugin class, imported when the class is first requested
+_PLUGIN_MODULES = {
+    'PyvoIntegrationPlugin': '.pyvo_integration_plugin',
+    'PerformancePlugin': '.performance_plugin',
+    'LoggingPlugin': '.logging_plugin',
+    'ExternalMonitorPlugin': '.external_monitor_plugin',
+    'PrometheusPlugin': '.prometheus_plugin',
+    'StatsdPlugin': '.statsd_plugin',
+    'CustomPlugin': '.custom_plugin',
+}
 
-# Import necessary plugins for use in the Pyvo framework
-from .pyvo_integration_plugin import CustomIntegrationPlugin
-from .performance_plugin import CustomPerformancePlugin
-from .logging_plugin import CustomLoggingPlugin
-from .external_monitor_plugin import ExternalMonitorPlugin
-from .custom_plugin import CustomPlugin
+# Names of all available plugins in this package for easy access
+available_plugins = list(_PLUGIN_MODULES)
 
-# Define a list of all available plugins in this package for easy access
-available_plugins = [
-    CustomIntegrationPlugin,
-    CustomPerformancePlugin,
-    CustomLoggingPlugin,
-    ExternalMonitorPlugin,
-    CustomPlugin
-]
+def __getattr__(name):
+    if name in _PLUGIN_MODULES:
+        plugin_class = getattr(importlib.import_module(_PLUGIN_MODULES[name], __name__), name)
+        globals()[name] = plugin_class
+        return plugin_class
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def load_plugin(plugin_class, **kwargs):
     """
     Dynamically loads a specified plugin class and initializes it with optional configurations.
     This can be used to initialize and configure specific plugins based on the requirements.
 
-    :param plugin_class: The plugin class to load.
+    :param plugin_class: The plugin class to load, or its name.
     :param kwargs: Optional keyword arguments for configuring the plugin.
     :return: An instance of the specified plugin class.
     """
-    if plugin_class not in available_plugins:
-        raise ValueError(f"Plugin {plugin_class.__name__} not found in available plugins.")
-    
+    name = plugin_class if isinstance(plugin_class, str) else plugin_class.__name__
+    if name not in _PLUGIN_MODULES:
+        raise ValueError(f"Plugin {name} not found in available plugins.")
+
     try:
         # Instantiate and return the plugin class, passing any extra configuration parameters
-        return plugin_class(**kwargs)
+        return __getattr__(name)(**kwargs)
     except Exception as e:
-        raise RuntimeError(f"Failed to load plugin {plugin_class.__name__}: {str(e)}")
+        raise RuntimeError(f"Failed to load plugin {name}: {str(e)}")
 
 def load_all_plugins():
     """
@@ -49,20 +59,16 @@ def load_all_plugins():
         try:
             plugins.append(load_plugin(plugin))
         except Exception as e:
-            print(f"Error loading plugin {plugin.__name__}: {e}")
+            print(f"Error loading plugin {plugin}: {e}")
     return plugins
 
-# Example initialization: Automatically load all plugins when the package is imported
-loaded_plugins = load_all_plugins()
-
-# Optionally, expose all the loaded plugins for direct access
-__all__ = ['CustomIntegrationPlugin', 'CustomPerformancePlugin', 'CustomLoggingPlugin', 'ExternalMonitorPlugin', 'CustomPlugin', 'loaded_plugins']
+__all__ = available_plugins + ['available_plugins', 'load_plugin', 'load_all_plugins']
 
 # Example of how to load a single plugin with configuration:
 if __name__ == "__main__":
     try:
         plugin_config = {'logging_enabled': True, 'dashboard_enabled': False}
-        performance_plugin = load_plugin(CustomPerformancePlugin, **plugin_config)
+        performance_plugin = load_plugin('PerformancePlugin', **plugin_config)
         print(f"Loaded plugin: {performance_plugin.__class__.__name__}")
     except Exception as e:
         print(f"Error loading plugin: {e}")
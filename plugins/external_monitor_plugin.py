@@ -1,9 +1,233 @@
+import atexit
+import gzip
+import json
 import logging
+import threading
 import time
 import os
+import inspect
+from collections import deque
+import functools
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
+from pyvo.core.pyvo_histogram import LatencyHistogram, DEFAULT_PERCENTILES
+from pyvo.core.pyvo_spool import MetricSpool, SPOOL_MAX_BYTES
+
+# (connect, read) timeout in seconds for each batch upload
+BATCH_TIMEOUT = (2.0, 5.0)
+
+def post_batch(session, logger, timeout, url, payload):
+    """Posts one gzip-compressed batch. Returns whether the endpoint accepted it."""
+    try:
+        response = session.post(url, data=payload, timeout=timeout, headers={
+            "Content-Type": "application/json", "Content-Encoding": "gzip"})
+        if response.status_code == 200:
+            return True
+        logger.error(f"Failed to send batch to {url}, Status Code: {response.status_code}")
+    except Exception as e:
+        logger.error(f"Error sending batch to the external monitoring service: {str(e)}")
+    return False
+
+class BatchExporter:
+    """
+    Buffers metric and error records in memory and ships them from a background thread.
+
+    add() only appends to a bounded deque. The worker flushes when `batch_size` records are
+    waiting or every `flush_interval` seconds, posting one gzip-compressed JSON document
+    ({"metrics": [...], "errors": [...]}) per batch. Records that do not fit in the buffer are
+    dropped and counted. stats() reports buffer depth, flush latency and drop/failure counters.
+
+    With a MetricSpool, batches the endpoint does not accept are written to disk instead of
+    being lost, and later batches queue up behind them until the spool has replayed them.
+    """
+
+    def __init__(self, session, url, logger, api_key=None, max_buffer_size=10000, batch_size=500,
+                 flush_interval=1.0, timeout=BATCH_TIMEOUT, compresslevel=6, spool=None):
+        """
+        :param session: requests.Session used for the uploads.
+        :param url: Endpoint receiving the batches.
+        :param max_buffer_size: Maximum number of records waiting to be sent.
+        :param batch_size: Maximum number of records per batch; a full batch is flushed right away.
+        :param flush_interval: Maximum seconds a record waits before its batch is flushed.
+        :param timeout: (connect, read) timeout in seconds for each upload.
+        :param compresslevel: gzip compression level of the batch payloads.
+        :param spool: Optional MetricSpool keeping undelivered batches on disk for replay.
+        """
+        self.session = session
+        self.url = url
+        self.logger = logger
+        self.api_key = api_key
+        self.max_buffer_size = max_buffer_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.compresslevel = compresslevel
+        self.spool = spool
+
+        self._buffer = deque()  # (enqueue time, kind, record)
+        self._condition = threading.Condition()
+        self._send_lock = threading.Lock()
+        self._counters = {"sent": 0, "dropped": 0, "failed": 0, "spooled": 0, "batches": 0, "bytes_sent": 0}
+        self._last_flush_latency = 0.0
+        self._max_flush_latency = 0.0
+        self._stopped = False
+        self._worker = None
+
+    def add(self, kind, record):
+        """Buffers a record ("metrics" or "errors") without blocking. Returns False if it was dropped."""
+        with self._condition:
+            if self._stopped or len(self._buffer) >= self.max_buffer_size:
+                self._counters["dropped"] += 1
+                return False
+            self._buffer.append((time.monotonic(), kind, record))
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify()
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="pyvo-metric-exporter", daemon=True)
+                self._worker.start()
+                atexit.register(self.close)
+        return True
+
+    def stats(self):
+        """
+        Returns buffer depth, the flush latency (seconds from the oldest record of the last and of
+        the slowest batch being buffered until the batch was delivered) and the record counters.
+        """
+        with self._condition:
+            stats = dict(self._counters)
+            stats["buffered"] = len(self._buffer)
+            stats["last_flush_latency"] = self._last_flush_latency
+            stats["max_flush_latency"] = self._max_flush_latency
+        if self.spool is not None:
+            stats["spool"] = self.spool.stats()
+        return stats
+
+    def flush(self):
+        """Sends every buffered record from the calling thread."""
+        while self._send_batch():
+            pass
+
+    def close(self, timeout=5.0):
+        """Stops accepting records and sends (or spools) what is buffered."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        if self._worker is not None and self._worker is not threading.current_thread():
+            self._worker.join(timeout=timeout)
+        self.flush()
+        if self.spool is not None:
+            self.spool.close(timeout=timeout)
+
+    def _run(self):
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            with self._condition:
+                timeout = deadline - time.monotonic()
+                if not self._stopped and len(self._buffer) < self.batch_size and timeout > 0:
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    return
+            if time.monotonic() >= deadline:
+                while self._send_batch():
+                    pass
+                deadline = time.monotonic() + self.flush_interval
+            else:
+                # Woken by a full batch: the partial remainder waits for the interval
+                while self._send_batch(full_only=True):
+                    pass
+
+    def _send_batch(self, full_only=False):
+        """
+        Uploads up to batch_size buffered records. Returns False when the buffer was empty, or
+        with `full_only` when fewer than batch_size records were waiting.
+        """
+        with self._send_lock:
+            with self._condition:
+                size = len(self._buffer)
+                if full_only and size < self.batch_size:
+                    return False
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, size))]
+            if not batch:
+                return False
+
+            document = {"metrics": [], "errors": []}
+            for _, kind, record in batch:
+                document[kind].append(record)
+            if self.api_key:
+                document["api_key"] = self.api_key
+            payload = gzip.compress(json.dumps(document, separators=(",", ":")).encode("utf-8"), self.compresslevel)
+
+            # Keep the endpoint's order: while older batches wait in the spool, new ones queue behind them
+            delivered = False
+            if self.spool is None or not self.spool.pending(self.url):
+                delivered = self._post(self.url, payload)
+            spooled = False
+            if not delivered and self.spool is not None:
+                try:
+                    self.spool.append(self.url, payload, len(batch))
+                    spooled = True
+                except OSError as e:
+                    self.logger.error(f"Error spooling batch of {len(batch)} records: {str(e)}")
+
+            latency = time.monotonic() - batch[0][0]
+            with self._condition:
+                if spooled:
+                    self._counters["spooled"] += len(batch)
+                elif delivered:
+                    self._counters["sent"] += len(batch)
+                    self._counters["batches"] += 1
+                    self._counters["bytes_sent"] += len(payload)
+                    self._last_flush_latency = latency
+                    self._max_flush_latency = max(self._max_flush_latency, latency)
+                else:
+                    self._counters["failed"] += len(batch)
+            return True
+
+    def _post(self, url, payload):
+        return post_batch(self.session, self.logger, self.timeout, url, payload)
+
+class FunctionCallSummary:
+    """
+    Streaming summary of one function's calls: success/error counts plus a LatencyHistogram
+    holding exact count, total, min and max and approximate percentiles of the execution times.
+    Memory is constant regardless of the number of calls, and summaries of separate chunks of
+    calls can be merged.
+    """
+
+    def __init__(self):
+        self.success_count = 0
+        self.error_count = 0
+        self.histogram = LatencyHistogram()
+
+    def add(self, execution_time, success):
+        if success:
+            self.success_count += 1
+        else:
+            self.error_count += 1
+        self.histogram.record(execution_time)
+
+    def merge(self, other):
+        """Adds another function's summary into this one."""
+        self.success_count += other.success_count
+        self.error_count += other.error_count
+        self.histogram.merge(other.histogram)
+        return self
+
+    def as_dict(self, percentiles=DEFAULT_PERCENTILES):
+        histogram = self.histogram
+        summary = {
+            'count': histogram.count,
+            'success_count': self.success_count,
+            'error_count': self.error_count,
+            'total_time': histogram.total,
+            'avg_time': histogram.mean,
+            'max_time': histogram.max,
+            'min_time': histogram.min,
+        }
+        for percentile, value in histogram.values_at_percentiles(percentiles).items():
+            summary[f'p{percentile:g}_time'] = value
+        return summary
 
 class ExternalMonitorPlugin:
     """
@@ -12,12 +236,20 @@ class ExternalMonitorPlugin:
     Datadog, or any HTTP-based monitoring platform.
     """
 
-    def __init__(self, monitor_url=None, api_key=None):
+    def __init__(self, monitor_url=None, api_key=None, batch_size=500, flush_interval=1.0, max_buffer_size=10000,
+                 spool_dir=None, spool_max_bytes=SPOOL_MAX_BYTES):
         """
         Initializes the external monitor plugin with the monitoring URL and optional API key.
         
         :param monitor_url: URL of the external monitoring service.
         :param api_key: Optional API key for authentication with the external service.
+        :param batch_size: Maximum number of records per batch sent to `monitor_url + "/batch"`.
+        :param flush_interval: Maximum seconds a record is buffered before being sent.
+        :param max_buffer_size: Maximum number of buffered records; further records are dropped and counted.
+        :param spool_dir: Directory spooling batches the service does not accept, replayed once it recovers
+                          (also across restarts). Defaults to the MONITOR_SPOOL_DIR environment variable;
+                          without either, spooling is off and undelivered batches are counted as failed.
+        :param spool_max_bytes: Maximum size of the spool; the oldest batches are dropped beyond it.
         """
         # Use environment variables if arguments are not provided
         self.monitor_url = monitor_url or os.getenv("MONITOR_URL")
@@ -37,15 +269,28 @@ class ExternalMonitorPlugin:
         file_handler.setFormatter(formatter)
         self.logger.addHandler(file_handler)
 
-        # Set up retry logic for HTTP requests
+        # Set up retry logic for HTTP requests; uploads happen off the monitored call's thread
         self.session = requests.Session()
-        retries = Retry(total=3, backoff_factor=1, status_forcelist=[500, 502, 503, 504])
+        retries = Retry(total=2, backoff_factor=0.1, status_forcelist=[500, 502, 503, 504])
         self.session.mount('https://', HTTPAdapter(max_retries=retries))
         self.session.mount('http://', HTTPAdapter(max_retries=retries))
 
+        # Spooling to disk is opt-in; replays are posted the same way as the exporter's own uploads
+        spool = None
+        spool_dir = spool_dir or os.getenv("MONITOR_SPOOL_DIR")
+        if spool_dir:
+            spool = MetricSpool(functools.partial(post_batch, self.session, self.logger, BATCH_TIMEOUT),
+                                directory=spool_dir, max_bytes=spool_max_bytes)
+
+        # Function and error records are buffered and sent in compressed batches
+        self.exporter = BatchExporter(self.session, self.monitor_url + "/batch", self.logger, api_key=self.api_key,
+                                      max_buffer_size=max_buffer_size, batch_size=batch_size,
+                                      flush_interval=flush_interval, spool=spool)
+
     def send_function_metrics(self, func_name, execution_time, success, error_message=None):
         """
         Sends function execution metrics to the external monitoring system.
+        The record is buffered and sent with the next batch.
         
         :param func_name: Name of the function being monitored.
         :param execution_time: Time taken by the function to execute in seconds.
@@ -59,22 +304,12 @@ class ExternalMonitorPlugin:
             "error_message": error_message,
             "timestamp": int(time.time())
         }
-
-        if self.api_key:
-            metrics_data["api_key"] = self.api_key
-
-        try:
-            response = self.session.post(self.monitor_url, json=metrics_data)
-            if response.status_code == 200:
-                self.logger.info(f"Successfully sent metrics for function: {func_name}")
-            else:
-                self.logger.error(f"Failed to send metrics for function: {func_name}, Status Code: {response.status_code}")
-        except Exception as e:
-            self.logger.error(f"Error sending metrics to the external monitoring service: {str(e)}")
+        self.exporter.add("metrics", metrics_data)
 
     def send_error_metrics(self, error_type, error_message):
         """
         Sends error data to the external monitoring system.
+        The record is buffered and sent with the next batch.
         
         :param error_type: Type of the error (e.g., ValueError, ZeroDivisionError).
         :param error_message: Error message to send.
@@ -84,18 +319,14 @@ class ExternalMonitorPlugin:
             "error_message": error_message,
             "timestamp": int(time.time())
         }
+        self.exporter.add("errors", error_data)
 
-        if self.api_key:
-            error_data["api_key"] = self.api_key
-
-        try:
-            response = self.session.post(self.monitor_url + "/errors", json=error_data)
-            if response.status_code == 200:
-                self.logger.info(f"Successfully sent error metrics: {error_type}")
-            else:
-                self.logger.error(f"Failed to send error metrics: {error_type}, Status Code: {response.status_code}")
-        except Exception as e:
-            self.logger.error(f"Error sending error metrics to the external monitoring service: {str(e)}")
+    def get_exporter_stats(self):
+        """
+        Returns buffer depth, flush latency and sent/dropped/failed/spooled counters of the batch
+        exporter, and under "spool" the spool's size, oldest age and replay rate.
+        """
+        return self.exporter.stats()
 
     def send_performance_summary(self, performance_summary):
         """
@@ -150,8 +381,12 @@ class ExternalMonitorPlugin:
         :param func: The function to monitor.
         :param args: Function arguments.
         :param kwargs: Function keyword arguments.
-        :return: The result of the function call.
+        :return: The result of the function call. For coroutine functions, a coroutine that
+                 must be awaited; its metrics cover the awaited execution.
         """
+        if inspect.iscoroutinefunction(func):
+            return self._monitor_coroutine(func, args, kwargs)
+
         start_time = time.time()
         try:
             result = func(*args, **kwargs)
@@ -164,81 +399,133 @@ class ExternalMonitorPlugin:
             self.send_error_metrics(type(e).__name__, str(e))
             raise e
 
-    def get_function_call_summary(self, function_calls):
+    async def _monitor_coroutine(self, func, args, kwargs):
+        """Awaits a coroutine function and sends metrics for the awaited execution."""
+        start_time = time.time()
+        try:
+            result = await func(*args, **kwargs)
+            execution_time = time.time() - start_time
+            self.send_function_metrics(func.__name__, execution_time, success=True)
+            return result
+        except Exception as e:
+            execution_time = time.time() - start_time
+            self.send_function_metrics(func.__name__, execution_time, success=False, error_message=str(e))
+            self.send_error_metrics(type(e).__name__, str(e))
+            raise e
+
+    def accumulate_function_calls(self, function_calls, summaries=None):
         """
-        Aggregates function call data into a summary.
-        
-        :param function_calls: List of function call data, where each entry is a dict containing 
+        Folds function call data into per-function streaming summaries in a single pass.
+        Pass the result of an earlier call as `summaries` to continue it with another chunk.
+
+        :param function_calls: Iterable (for example a generator) of dicts containing
                                'func_name', 'execution_time', and 'success' information.
-        :return: Dictionary with function call summary (e.g., count, average execution time, etc.).
+        :param summaries: Partial summaries to add to, as returned by this method.
+        :return: Dictionary mapping function names to FunctionCallSummary objects.
         """
-        function_summary = {}
+        summaries = {} if summaries is None else summaries
         for call in function_calls:
             func_name = call['func_name']
-            if func_name not in function_summary:
-                function_summary[func_name] = {'count': 0, 'success_count': 0, 'error_count': 0, 'total_time': 0}
-            function_summary[func_name]['count'] += 1
-            if call['success']:
-                function_summary[func_name]['success_count'] += 1
-            else:
-                function_summary[func_name]['error_count'] += 1
-            function_summary[func_name]['total_time'] += call['execution_time']
+            summary = summaries.get(func_name)
+            if summary is None:
+                summary = summaries[func_name] = FunctionCallSummary()
+            summary.add(call['execution_time'], call['success'])
+        return summaries
+
+    def merge_function_call_summaries(self, *partials):
+        """Merges partial summaries (from accumulate_function_calls over separate chunks) into a new one."""
+        merged = {}
+        for partial in partials:
+            for func_name, summary in partial.items():
+                if func_name not in merged:
+                    merged[func_name] = FunctionCallSummary()
+                merged[func_name].merge(summary)
+        return merged
+
+    def get_function_call_summary(self, function_calls, percentiles=DEFAULT_PERCENTILES):
+        """
+        Aggregates function call data into a summary in one streaming pass.
+        
+        :param function_calls: Iterable of function call data, where each entry is a dict containing 
+                               'func_name', 'execution_time', and 'success' information, or partial
+                               summaries returned by accumulate_function_calls/merge_function_call_summaries.
+        :param percentiles: Percentiles of the execution time to include (approximate, as 'p50_time' etc.).
+        :return: Dictionary with function call summary (e.g., count, average execution time, etc.).
+        """
+        if not isinstance(function_calls, dict):
+            function_calls = self.accumulate_function_calls(function_calls)
+        return {func_name: summary.as_dict(percentiles) for func_name, summary in function_calls.items()}
 
-        # Compute averages and other metrics
-        for func_name, summary in function_summary.items():
-            summary['avg_time'] = summary['total_time'] / summary['count']
-            summary['max_time'] = max(call['execution_time'] for call in function_calls if call['func_name'] == func_name)
-            summary['min_time'] = min(call['execution_time'] for call in function_calls if call['func_name'] == func_name)
+    def accumulate_performance_data(self, performance_data, histogram=None):
+        """
+        Records execution times into a LatencyHistogram in a single pass. Pass an earlier
+        result as `histogram` to continue it; histograms of separate chunks can be merged
+        with LatencyHistogram.merge.
 
-        return function_summary
+        :param performance_data: Iterable of execution times in seconds.
+        :param histogram: Partial histogram to add to.
+        :return: The LatencyHistogram.
+        """
+        histogram = LatencyHistogram() if histogram is None else histogram
+        for execution_time in performance_data:
+            histogram.record(execution_time)
+        return histogram
 
-    def get_performance_summary(self, performance_data):
+    def get_performance_summary(self, performance_data, percentiles=DEFAULT_PERCENTILES):
         """
-        Aggregates performance data and computes statistics.
+        Aggregates performance data and computes statistics in one streaming pass.
         
-        :param performance_data: List of performance data, including execution times.
-        :return: Dictionary containing the performance summary (average, max, min execution time).
+        :param performance_data: Iterable of execution times, or a LatencyHistogram returned by
+                                 accumulate_performance_data.
+        :param percentiles: Percentiles of the execution time to include (approximate).
+        :return: Dictionary containing the performance summary (average, max, min and percentile execution times).
         """
-        if not performance_data:
+        histogram = performance_data
+        if not isinstance(histogram, LatencyHistogram):
+            histogram = self.accumulate_performance_data(performance_data)
+        if not histogram.count:
             return {"message": "No performance data available."}
 
-        avg_time = sum(performance_data) / len(performance_data)
-        max_time = max(performance_data)
-        min_time = min(performance_data)
-
-        return {
-            "average_execution_time": avg_time,
-            "max_execution_time": max_time,
-            "min_execution_time": min_time
+        summary = {
+            "average_execution_time": histogram.mean,
+            "max_execution_time": histogram.max,
+            "min_execution_time": histogram.min,
+            "execution_count": histogram.count
         }
-
+        for percentile, value in histogram.values_at_percentiles(percentiles).items():
+            summary[f"p{percentile:g}_execution_time"] = value
+        return summary
 
 # Example Usage:
-# Initialize the external monitor plugin with environment variables
-monitor_plugin = ExternalMonitorPlugin()
-
-# Example function to monitor
-@monitor_plugin.monitor_function
-def sample_function(x, y):
-    if y == 0:
-        raise ZeroDivisionError("Cannot divide by zero!")
-    return x / y
-
-# Call the function to trigger monitoring
-try:
-    result = sample_function(10, 2)
-except Exception as e:
-    print(f"Error occurred: {str(e)}")
-
-# Example of sending performance summary
-performance_data = [0.5, 1.2, 0.3, 0.8]
-performance_summary = monitor_plugin.get_performance_summary(performance_data)
-monitor_plugin.send_performance_summary(performance_summary)
-
-# Example of sending function call summary
-function_calls = [
-    {"func_name": "sample_function", "execution_time": 0.5, "success": True},
-    {"func_name": "sample_function", "execution_time": 0.8, "success": False},
-]
-function_call_summary = monitor_plugin.get_function_call_summary(function_calls)
-monitor_plugin.send_function_call_summary(function_call_summary)
+if __name__ == "__main__":
+    # Initialize the external monitor plugin with environment variables
+    monitor_plugin = ExternalMonitorPlugin()
+
+    # Example function to monitor
+    def sample_function(x, y):
+        if y == 0:
+            raise ZeroDivisionError("Cannot divide by zero!")
+        return x / y
+
+    # Call the function to trigger monitoring
+    try:
+        result = monitor_plugin.monitor_function(sample_function, 10, 2)
+    except Exception as e:
+        print(f"Error occurred: {str(e)}")
+
+    # Example of sending performance summary
+    performance_data = [0.5, 1.2, 0.3, 0.8]
+    performance_summary = monitor_plugin.get_performance_summary(performance_data)
+    monitor_plugin.send_performance_summary(performance_summary)
+
+    # Example of sending function call summary
+    function_calls = [
+        {"func_name": "sample_function", "execution_time": 0.5, "success": True},
+        {"func_name": "sample_function", "execution_time": 0.8, "success": False},
+    ]
+    function_call_summary = monitor_plugin.get_function_call_summary(function_calls)
+    monitor_plugin.send_function_call_summary(function_call_summary)
+
+    # Send the buffered records and show the exporter counters
+    monitor_plugin.exporter.close()
+    print(monitor_plugin.get_exporter_stats())
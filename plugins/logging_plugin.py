@@ -46,7 +46,7 @@ class LoggingPlugin:
         Logs an exception's details at the ERROR level.
         :param exception: The exception object
         """
-        self.logger.exception(f"Exception occurred: {exception}")
+        self.logger.exception("Exception occurred: %s", exception)
 
     def enable_function_logging(self, func):
         """
@@ -55,14 +55,14 @@ class LoggingPlugin:
         :return: The decorated function
         """
         def wrapper(*args, **kwargs):
-            self.logger.info(f"Calling {func.__name__} with arguments: {args} and {kwargs}")
+            self.logger.info("Calling %s with arguments: %s and %s", func.__name__, args, kwargs)
             start_time = time.time()  # Start time for performance tracking
             try:
                 result = func(*args, **kwargs)
                 end_time = time.time()  # End time for performance tracking
                 execution_time = end_time - start_time
-                self.logger.info(f"Function {func.__name__} returned: {result}")
-                self.logger.info(f"Execution time: {execution_time:.4f} seconds")
+                self.logger.info("Function %s returned: %s", func.__name__, result)
+                self.logger.info("Execution time: %.4f seconds", execution_time)
                 return result
             except Exception as e:
                 self.log_exception(e)
@@ -0,0 +1,179 @@
+import gzip
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pyvo.core.pyvo_monitor import pyvo_monitor
+from pyvo.core.pyvo_performance import performance_snapshot
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Upper bounds (seconds) of the exported latency histogram buckets, as in the Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _cumulative_buckets(histogram, bounds):
+    """
+    Folds a LatencyHistogram's fine-grained buckets into cumulative counts for `bounds`.
+    A bucket counts towards a bound when its upper edge is within it, so counts are exact up to
+    the histogram's precision.
+    """
+    counts = []
+    running = 0
+    fine_buckets = histogram.buckets()
+    pending = next(fine_buckets, None)
+    for bound in bounds:
+        while pending is not None and pending[0] <= bound:
+            running += pending[1]
+            pending = next(fine_buckets, None)
+        counts.append(running)
+    return counts
+
+class PrometheusPlugin:
+    """
+    Serves pyvo's metrics in the Prometheus text exposition format from an embedded HTTP
+    endpoint, so a scraper pulls aggregates instead of pyvo pushing every call.
+
+    Exports per-function call and error counters from PyvoMonitor.function_logs and latency
+    histograms from the performance tracker's histograms. The rendered page is cached and
+    only rebuilt when either source reports a new data version, so scrapes between metric
+    changes cost a cache lookup.
+    """
+
+    def __init__(self, host="127.0.0.1", port=9464, path="/metrics", monitor=None, buckets=DEFAULT_BUCKETS):
+        """
+        :param host: Interface the endpoint listens on.
+        :param port: Port of the endpoint (0 picks a free one; see `port` after start()).
+        :param path: URL path serving the metrics.
+        :param monitor: PyvoMonitor to export; defaults to the shared pyvo_monitor.
+        :param buckets: Ascending upper bounds (seconds) of the exported histogram buckets.
+        """
+        self.host = host
+        self.port = port
+        self.path = path
+        self.monitor = monitor or pyvo_monitor
+        self.buckets = tuple(sorted(buckets))
+        self.renders = 0
+        self._cache_key = None
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Starts serving in a daemon thread. Returns the bound (host, port)."""
+        if self._server is not None:
+            return self._server.server_address
+        plugin = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != plugin.path:
+                    self.send_error(404)
+                    return
+                gzipped = "gzip" in self.headers.get("Accept-Encoding", "")
+                try:
+                    body = plugin.render(gzipped)
+                except Exception as e:
+                    logger.error(f"Error rendering metrics: {e}")
+                    self.send_error(500)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                if gzipped:
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug("%s - %s", self.address_string(), format % args)
+
+        self._server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="pyvo-prometheus", daemon=True)
+        self._thread.start()
+        logger.info(f"Serving Prometheus metrics on http://{self.host}:{self.port}{self.path}")
+        return self._server.server_address
+
+    def stop(self):
+        """Stops the endpoint."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = self._thread = None
+
+    def render(self, gzipped=False):
+        """
+        Returns the metrics page as bytes (gzip-compressed if requested).
+        Rebuilt only when the monitor's or the performance tracker's data version changed.
+        """
+        with self._cache_lock:
+            with self.monitor.snapshot() as (monitor_version, function_logs):
+                with performance_snapshot() as (performance_version, histograms):
+                    key = (monitor_version, performance_version)
+                    if key != self._cache_key:
+                        self._cache = {"identity": self._build(function_logs, histograms)}
+                        self._cache_key = key
+                        self.renders += 1
+            if gzipped and "gzip" not in self._cache:
+                self._cache["gzip"] = gzip.compress(self._cache["identity"])
+            return self._cache["gzip" if gzipped else "identity"]
+
+    def _build(self, function_logs, histograms):
+        lines = []
+        calls = []
+        errors = []
+        exclusive = []
+        for func_name, logs in function_logs.locked_items():
+            label = f'{{function="{_escape_label(func_name)}"}}'
+            calls.append(f"pyvo_function_calls_total{label} {logs['call_count']}")
+            errors.append(f"pyvo_function_errors_total{label} {logs['error_count']}")
+            exclusive.append(f"pyvo_function_exclusive_seconds_total{label} {_format_value(float(logs['total_exclusive_time']))}")
+
+        lines.append("# HELP pyvo_function_calls_total Calls of monitored functions.")
+        lines.append("# TYPE pyvo_function_calls_total counter")
+        lines.extend(calls)
+        lines.append("# HELP pyvo_function_errors_total Calls of monitored functions that raised.")
+        lines.append("# TYPE pyvo_function_errors_total counter")
+        lines.extend(errors)
+        lines.append("# HELP pyvo_function_exclusive_seconds_total Time spent in monitored functions, excluding monitored callees.")
+        lines.append("# TYPE pyvo_function_exclusive_seconds_total counter")
+        lines.extend(exclusive)
+
+        lines.append("# HELP pyvo_function_duration_seconds Execution time of performance-tracked functions.")
+        lines.append("# TYPE pyvo_function_duration_seconds histogram")
+        for func_name, histogram in histograms.items():
+            name = _escape_label(func_name)
+            for bound, count in zip(self.buckets, _cumulative_buckets(histogram, self.buckets)):
+                lines.append(f'pyvo_function_duration_seconds_bucket{{function="{name}",le="{bound}"}} {count}')
+            lines.append(f'pyvo_function_duration_seconds_bucket{{function="{name}",le="+Inf"}} {histogram.count}')
+            lines.append(f'pyvo_function_duration_seconds_sum{{function="{name}"}} {_format_value(histogram.total)}')
+            lines.append(f'pyvo_function_duration_seconds_count{{function="{name}"}} {histogram.count}')
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+# Example Usage:
+if __name__ == "__main__":
+    import time
+    from pyvo.core.pyvo_performance import track_performance
+
+    @track_performance
+    def sample_function(x):
+        time.sleep(0.01)
+        return x * 2
+
+    plugin = PrometheusPlugin(port=9464)
+    plugin.start()
+    for i in range(10):
+        sample_function(i)
+    print(plugin.render().decode("utf-8"))
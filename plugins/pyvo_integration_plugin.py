@@ -1,8 +1,5 @@
 import logging
 from pyvo.core.pyvo_integration import PyvoIntegration
-from pyvo.core.pyvo_monitor import pyvo_monitoring
-from pyvo.core.pyvo_error_handling import pyvo_error_handling
-from pyvo.core.pyvo_performance import pyvo_performance_tracking
 
 class PyvoIntegrationPlugin:
     """
@@ -28,37 +25,17 @@ class PyvoIntegrationPlugin:
         """
         Integrates the provided function with Pyvo functionality, enabling monitoring,
         logging, performance tracking, and error handling based on the plugin settings.
+        The features follow later update_settings() calls; with all of them off, the
+        function's call site is swapped back to the original.
         """
-        if self.enable_monitoring:
-            func = self._apply_monitoring(func)  # Apply Pyvo monitoring functionality
-        if self.enable_logging:
-            func = self._add_logging(func)  # Add logging functionality
-        if self.enable_performance:
-            func = pyvo_performance_tracking(func)  # Track performance of the function
-        if self.enable_error_handling:
-            func = pyvo_error_handling(func)  # Add error handling functionality
-        return func
-    
-    def _apply_monitoring(self, func):
-        """
-        Apply monitoring functionality to a function.
-        """
-        return pyvo_monitoring(func)
+        return self.pyvo_integration.integrate(func)
 
-    def _add_logging(self, func):
-        """
-        Adds logging functionality to a function by creating a wrapper that logs its calls.
-        """
-        def wrapper(*args, **kwargs):
-            logging.info(f"Calling function {func.__name__} with arguments: {args}, {kwargs}")
-            try:
-                result = func(*args, **kwargs)
-                logging.info(f"Function {func.__name__} returned: {result}")
-                return result
-            except Exception as e:
-                logging.error(f"Error occurred in function {func.__name__} with arguments {args} and {kwargs}: {e}")
-                raise
-        return wrapper
+    def _apply_settings(self):
+        """Applies the plugin settings to its PyvoIntegration, which hot-swaps integrated functions."""
+        self.pyvo_integration.enable_monitoring = self.enable_monitoring
+        self.pyvo_integration.enable_logging = self.enable_logging
+        self.pyvo_integration.enable_performance = self.enable_performance
+        self.pyvo_integration.enable_error_handling = self.enable_error_handling
 
     def log_summary(self):
         """
@@ -83,12 +60,7 @@ class PyvoIntegrationPlugin:
         self.enable_logging = True
         self.enable_performance = True
         self.enable_error_handling = True
-        self.pyvo_integration = PyvoIntegration(
-            enable_monitoring=self.enable_monitoring,
-            enable_logging=self.enable_logging,
-            enable_performance=self.enable_performance,
-            enable_error_handling=self.enable_error_handling
-        )
+        self._apply_settings()
         logging.info("Pyvo integration settings have been reset to default.")
 
     def update_settings(self, enable_monitoring=None, enable_logging=None, enable_performance=None, enable_error_handling=None):
@@ -104,13 +76,8 @@ class PyvoIntegrationPlugin:
         if enable_error_handling is not None:
             self.enable_error_handling = enable_error_handling
         
-        # Only re-initialize PyvoIntegration if settings have been changed
-        self.pyvo_integration = PyvoIntegration(
-            enable_monitoring=self.enable_monitoring,
-            enable_logging=self.enable_logging,
-            enable_performance=self.enable_performance,
-            enable_error_handling=self.enable_error_handling
-        )
+        # Update the integration in place so already integrated functions follow the new settings
+        self._apply_settings()
         logging.info("Pyvo integration settings have been updated.")
 
     def get_integration_status(self):
@@ -127,39 +94,39 @@ class PyvoIntegrationPlugin:
 
 
 # Example of how to use the plugin
-
-def sample_function(x, y):
-    if y == 0:
-        raise ValueError("Cannot divide by zero!")
-    return x / y
-
-# Initialize the plugin with desired settings
-plugin = PyvoIntegrationPlugin(enable_logging=True, enable_monitoring=True, enable_performance=True, enable_error_handling=True)
-
-# Integrate the sample function with Pyvo
-integrated_function = plugin.integrate_function(sample_function)
-
-# Test the integrated function
-try:
-    result = integrated_function(10, 2)
-    print(f"Function result: {result}")
-except Exception as e:
-    print(f"Error: {e}")
-
-# Display the current integration status
-print(plugin.get_integration_status())
-
-# Update the settings dynamically
-plugin.update_settings(enable_logging=False)
-print(plugin.get_integration_status())
-
-# Log the summary of the integration
-print(plugin.log_summary())
-
-# Reset the integration settings to their defaults
-plugin.reset_integration()
-print(plugin.get_integration_status())
-
-# This plugin can be used to wrap any function with the desired Pyvo functionality.
-# The integrated_function can then be used just like the original function, but with the additional benefits of logging, performance tracking, and error handling.
-# By using the plugin, developers can integrate Pyvo's capabilities into their applications without modifying their existing functions directly.
+if __name__ == "__main__":
+    def sample_function(x, y):
+        if y == 0:
+            raise ValueError("Cannot divide by zero!")
+        return x / y
+
+    # Initialize the plugin with desired settings
+    plugin = PyvoIntegrationPlugin(enable_logging=True, enable_monitoring=True, enable_performance=True, enable_error_handling=True)
+
+    # Integrate the sample function with Pyvo
+    integrated_function = plugin.integrate_function(sample_function)
+
+    # Test the integrated function
+    try:
+        result = integrated_function(10, 2)
+        print(f"Function result: {result}")
+    except Exception as e:
+        print(f"Error: {e}")
+
+    # Display the current integration status
+    print(plugin.get_integration_status())
+
+    # Update the settings dynamically
+    plugin.update_settings(enable_logging=False)
+    print(plugin.get_integration_status())
+
+    # Log the summary of the integration
+    print(plugin.log_summary())
+
+    # Reset the integration settings to their defaults
+    plugin.reset_integration()
+    print(plugin.get_integration_status())
+
+    # This plugin can be used to wrap any function with the desired Pyvo functionality.
+    # The integrated_function can then be used just like the original function, but with the additional benefits of logging, performance tracking, and error handling.
+    # By using the plugin, developers can integrate Pyvo's capabilities into their applications without modifying their existing functions directly.
@@ -0,0 +1,206 @@
+import atexit
+import inspect
+import logging
+import re
+import socket
+import threading
+import time
+from pyvo.core.pyvo_recorder import ThreadLocalRecorder
+
+# Initialize logger
+logger = logging.getLogger(__name__)
+
+# Payload size keeping a datagram within a 1500 byte Ethernet MTU (minus IP and UDP headers)
+DEFAULT_MAX_PACKET_SIZE = 1432
+
+# Characters with a meaning in the StatsD line protocol
+_UNSAFE_NAME_CHARACTERS = re.compile(r"[^A-Za-z0-9_.\-]")
+
+def _metric_name(name):
+    return _UNSAFE_NAME_CHARACTERS.sub("_", name)
+
+def _pack(lines, max_packet_size):
+    """
+    Packs newline-separated metric lines into as few datagrams of at most `max_packet_size`
+    bytes as possible. A line longer than the limit is sent on its own.
+    """
+    packets = []
+    current = []
+    size = 0
+    for line in lines:
+        encoded = line.encode("utf-8")
+        added = len(encoded) + (1 if current else 0)
+        if current and size + added > max_packet_size:
+            packets.append(b"\n".join(current))
+            current = []
+            size = 0
+            added = len(encoded)
+        current.append(encoded)
+        size += added
+    if current:
+        packets.append(b"\n".join(current))
+    return packets
+
+class StatsdPlugin:
+    """
+    Fire-and-forget StatsD exporter with client-side aggregation.
+
+    Monitored calls are appended to a per-thread buffer and nothing else happens on the caller's
+    thread. Every `flush_interval` seconds a background thread folds the buffered calls into one
+    aggregate per function and sends, per function, a call counter, an error counter, a timer
+    carrying the mean duration with sample rate 1/calls (so the agent's count and sum stay exact)
+    and a gauge with the interval's maximum. The lines are packed into MTU-sized datagrams sent
+    from a non-blocking UDP socket; send failures are counted, never raised.
+    """
+
+    def __init__(self, host="127.0.0.1", port=8125, prefix="pyvo", flush_interval=1.0,
+                 max_packet_size=DEFAULT_MAX_PACKET_SIZE):
+        """
+        :param host: Host of the StatsD agent.
+        :param port: UDP port of the StatsD agent.
+        :param prefix: Prefix of every metric name.
+        :param flush_interval: Seconds over which calls are aggregated before being sent.
+        :param max_packet_size: Maximum payload bytes per datagram.
+        """
+        self.address = (host, port)
+        self.prefix = prefix
+        self.max_packet_size = max_packet_size
+        self._socket = None
+        self._sockaddr = None
+        self._resolve()
+        self._names = {}  # function name -> sanitized metric name prefix
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "metrics_sent": 0, "packets_sent": 0, "bytes_sent": 0, "packets_dropped": 0}
+        self._recorder = ThreadLocalRecorder(self._send_aggregates, interval=flush_interval, name="pyvo-statsd")
+        atexit.register(self.flush)
+
+    def record(self, func_name, execution_time, error=False):
+        """Buffers one call of `func_name`; `execution_time` is in seconds. Never blocks or raises."""
+        self._recorder.record(func_name, execution_time, error)
+
+    def monitor_function(self, func, *args, **kwargs):
+        """
+        Calls `func` and records its execution time and whether it raised.
+
+        :param func: The function to monitor.
+        :param args: Function arguments.
+        :param kwargs: Function keyword arguments.
+        :return: The result of the function call. For coroutine functions, a coroutine that
+                 must be awaited; its metrics cover the awaited execution.
+        """
+        if inspect.iscoroutinefunction(func):
+            return self._monitor_coroutine(func, args, kwargs)
+
+        start_time = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            self._recorder.record(func.__name__, time.perf_counter() - start_time, True)
+            raise
+        self._recorder.record(func.__name__, time.perf_counter() - start_time, False)
+        return result
+
+    async def _monitor_coroutine(self, func, args, kwargs):
+        """Awaits a coroutine function and records the awaited execution."""
+        start_time = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            self._recorder.record(func.__name__, time.perf_counter() - start_time, True)
+            raise
+        self._recorder.record(func.__name__, time.perf_counter() - start_time, False)
+        return result
+
+    def flush(self):
+        """Aggregates and sends the buffered calls now instead of at the next interval."""
+        self._recorder.flush()
+
+    def close(self):
+        """Stops the background flushes, sends the buffered calls and closes the socket."""
+        atexit.unregister(self.flush)
+        # Joins the flush thread first, so no flush in progress can send on the closed socket
+        self._recorder.close()
+        if self._socket is not None:
+            self._socket.close()
+
+    def _resolve(self):
+        """
+        Looks up the agent's address and opens a socket for it, so sends never wait on DNS.
+        Returns whether it succeeded; a failed lookup is retried at the next flush.
+        """
+        try:
+            family, _, _, _, sockaddr = socket.getaddrinfo(*self.address, socket.AF_INET, socket.SOCK_DGRAM)[0]
+        except OSError as e:
+            logger.warning(f"Cannot resolve StatsD agent {self.address[0]}: {e}")
+            return False
+        sock = socket.socket(family, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        self._socket, self._sockaddr = sock, sockaddr
+        return True
+
+    def stats(self):
+        """Returns the counts of recorded calls, sent metric lines, sent and dropped packets and sent bytes."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _send_aggregates(self, calls):
+        """Folds one interval's calls into per-function aggregates and sends them. Runs with the recorder's merge lock held."""
+        aggregates = {}
+        for func_name, execution_time, error in calls:
+            aggregate = aggregates.get(func_name)
+            if aggregate is None:
+                aggregates[func_name] = [1, 1 if error else 0, execution_time, execution_time]
+            else:
+                aggregate[0] += 1
+                if error:
+                    aggregate[1] += 1
+                aggregate[2] += execution_time
+                if execution_time > aggregate[3]:
+                    aggregate[3] = execution_time
+
+        lines = []
+        for func_name, (count, errors, total, maximum) in aggregates.items():
+            name = self._names.get(func_name)
+            if name is None:
+                name = self._names[func_name] = f"{self.prefix}.{_metric_name(func_name)}"
+            lines.append(f"{name}.calls:{count}|c")
+            if errors:
+                lines.append(f"{name}.errors:{errors}|c")
+            sample_rate = f"|@{1 / count:.6g}" if count > 1 else ""
+            lines.append(f"{name}.time:{total / count * 1000:.6g}|ms{sample_rate}")
+            lines.append(f"{name}.time.max:{maximum * 1000:.6g}|g")
+
+        packets = _pack(lines, self.max_packet_size)
+        sent = dropped = sent_bytes = 0
+        if self._socket is None and not self._resolve():
+            dropped = len(packets)
+            packets = []
+        for packet in packets:
+            try:
+                self._socket.sendto(packet, self._sockaddr)
+                sent += 1
+                sent_bytes += len(packet)
+            except OSError as e:
+                # Includes a full socket buffer (BlockingIOError) and an unreachable agent
+                dropped += 1
+                logger.debug("Dropped StatsD packet: %s", e)
+
+        with self._stats_lock:
+            self._stats["calls"] += len(calls)
+            self._stats["metrics_sent"] += len(lines)
+            self._stats["packets_sent"] += sent
+            self._stats["bytes_sent"] += sent_bytes
+            self._stats["packets_dropped"] += dropped
+
+
+# Example Usage:
+if __name__ == "__main__":
+    statsd_plugin = StatsdPlugin()
+
+    def sample_function(x, y):
+        return x / y
+
+    for i in range(100):
+        statsd_plugin.monitor_function(sample_function, i, 2)
+    statsd_plugin.flush()
+    print(statsd_plugin.stats())
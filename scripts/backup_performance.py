@@ -1,22 +1,32 @@
-import json
+import os
 import shutil
 import time
+from pyvo.core.pyvo_segment_store import SEGMENT_DIR, NAMES_FILE, copy_segment
 
-PERFORMANCE_FILE = 'performance_data.json'
 BACKUP_DIR = 'performance_backups'
 
-def backup_performance_data():
-    if os.path.exists(PERFORMANCE_FILE):
+def backup_performance_data(directory=SEGMENT_DIR):
+    """
+    Copies the segments and their function name table to a timestamped backup directory.
+    Each segment is copied as its header and valid records only, without the preallocated
+    space behind them. A copy taken while pyvo is writing holds the records written up to
+    that moment, stopping at the first one still being written; flush or stop the writer
+    first (SegmentWriter.flush/close, pyvo_performance.disable_persistence) for a complete copy.
+    """
+    if os.path.isdir(directory):
         timestamp = time.strftime("%Y-%m-%d_%H-%M-%S")
-        backup_file = os.path.join(BACKUP_DIR, f"performance_backup_{timestamp}.json")
-        
-        if not os.path.exists(BACKUP_DIR):
-            os.makedirs(BACKUP_DIR)
-        
-        shutil.copy(PERFORMANCE_FILE, backup_file)
-        print(f"Performance data backed up to {backup_file}")
+        backup_dir = os.path.join(BACKUP_DIR, f"performance_backup_{timestamp}")
+        os.makedirs(backup_dir)
+
+        # Copy the name table first so every function id in the copied segments resolves
+        names_path = os.path.join(directory, NAMES_FILE)
+        if os.path.isfile(names_path):
+            shutil.copy(names_path, backup_dir)
+        for name in sorted(n for n in os.listdir(directory) if n.endswith('.pvs')):
+            copy_segment(os.path.join(directory, name), os.path.join(backup_dir, name))
+        print(f"Performance data backed up to {backup_dir}")
     else:
-        print(f"No performance data file found.")
+        print("No performance data found.")
 
 if __name__ == "__main__":
     backup_performance_data()
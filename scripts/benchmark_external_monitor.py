@@ -0,0 +1,88 @@
+import gzip
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pyvo.plugins.external_monitor_plugin import ExternalMonitorPlugin
+
+CALLS = 20000
+DIRECT_CALLS = 2000  # Posting every record is slow; keep that run short
+
+class CollectorHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the monitoring service: accepts single records and gzip batches and counts records."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        document = json.loads(body)
+        records = len(document.get("metrics", ())) + len(document.get("errors", ())) if "metrics" in document else 1
+        with self.server.lock:
+            self.server.records += records
+            self.server.requests += 1
+            self.server.bytes += int(self.headers.get("Content-Length", 0))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+def start_collector():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), CollectorHandler)
+    server.lock = threading.Lock()
+    server.records = server.requests = server.bytes = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def reset(server):
+    with server.lock:
+        server.records = server.requests = server.bytes = 0
+
+def sample_function(x):
+    return x * 2
+
+def run_direct(plugin, calls):
+    """The previous behaviour: one synchronous JSON POST per monitored call."""
+    url = plugin.monitor_url
+    start = time.perf_counter()
+    for i in range(calls):
+        call_start = time.time()
+        sample_function(i)
+        plugin.session.post(url, json={"func_name": "sample_function", "execution_time": time.time() - call_start,
+                                       "success": True, "error_message": None, "timestamp": int(time.time()),
+                                       "api_key": plugin.api_key})
+    return time.perf_counter() - start
+
+def run_batched(plugin, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        plugin.monitor_function(sample_function, i)
+    recorded = time.perf_counter() - start
+    plugin.exporter.flush()
+    return recorded, time.perf_counter() - start
+
+def run_benchmark():
+    logging.disable(logging.CRITICAL)
+    server = start_collector()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    plugin = ExternalMonitorPlugin(monitor_url=url, api_key="benchmark", max_buffer_size=CALLS)
+
+    elapsed = run_direct(plugin, DIRECT_CALLS)
+    print(f"Direct POST per call:  {DIRECT_CALLS / elapsed:10.0f} calls/s "
+          f"({server.requests} requests, {server.bytes / server.records:.0f} bytes/record)")
+
+    reset(server)
+    recorded, delivered = run_batched(plugin, CALLS)
+    stats = plugin.get_exporter_stats()
+    print(f"Batched gzip export:   {CALLS / recorded:10.0f} calls/s on the caller, "
+          f"{server.records / delivered:.0f} records/s delivered "
+          f"({server.requests} requests, {server.bytes / server.records:.1f} bytes/record)")
+    print(f"Exporter stats: {stats}")
+
+    plugin.exporter.close()
+    server.shutdown()
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,74 @@
+import importlib
+import logging
+import os
+import sys
+import tempfile
+import time
+from pyvo.core.pyvo_import_hook import install_import_hook, uninstall_import_hook
+
+PACKAGE = "pyvo_hook_bench"
+MODULES = 50
+FUNCTIONS_PER_MODULE = 60  # 3000 functions in total
+REPEAT = 10
+
+def generate_package(directory):
+    """Writes a package of MODULES modules with FUNCTIONS_PER_MODULE functions (plus one class) each."""
+    package_dir = os.path.join(directory, PACKAGE)
+    os.makedirs(package_dir)
+    with open(os.path.join(package_dir, "__init__.py"), "w") as file:
+        file.write("")
+    for module_index in range(MODULES):
+        lines = ["import os", "from collections import OrderedDict", ""]
+        for function_index in range(FUNCTIONS_PER_MODULE):
+            lines.append(f"def function_{function_index}(x):\n    return x + {function_index}\n")
+        lines.append("class Service:\n    def handle(self, x):\n        return x\n")
+        with open(os.path.join(package_dir, f"module_{module_index}.py"), "w") as file:
+            file.write("\n".join(lines))
+
+def import_package():
+    """Imports every module of the package from scratch and returns the elapsed seconds."""
+    for name in [name for name in sys.modules if name == PACKAGE or name.startswith(PACKAGE + ".")]:
+        del sys.modules[name]
+    importlib.invalidate_caches()
+    start = time.perf_counter()
+    for module_index in range(MODULES):
+        importlib.import_module(f"{PACKAGE}.module_{module_index}")
+    return time.perf_counter() - start
+
+def best_of(repeat=REPEAT):
+    return min(import_package() for _ in range(repeat))
+
+def run_benchmark():
+    # Keep log handlers out of the measurement
+    logging.disable(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory() as directory:
+        generate_package(directory)
+        sys.path.insert(0, directory)
+        try:
+            import_package()  # Warm up: writes the bytecode cache
+            baseline = best_of()
+
+            install_import_hook(include=["unrelated_package.*"], kinds=["monitor"])
+            not_matching = best_of()
+
+            install_import_hook(include=[PACKAGE + ".*"], kinds=["monitor"])
+            monitor = best_of()
+
+            install_import_hook(include=[PACKAGE + ".*"], kinds=["monitor", "performance"])
+            both = best_of()
+            uninstall_import_hook()
+        finally:
+            sys.path.remove(directory)
+
+    functions = MODULES * (FUNCTIONS_PER_MODULE + 1)
+    print(f"Importing {MODULES} modules with {functions} functions (best of {REPEAT}):")
+    print(f"  no hook:                      {baseline * 1000:8.1f} ms")
+    print(f"  hook, no module matched:      {not_matching * 1000:8.1f} ms")
+    print(f"  hook, monitor:                {monitor * 1000:8.1f} ms "
+          f"({(monitor - baseline) / functions * 1e6:.1f} us per function)")
+    print(f"  hook, monitor + performance:  {both * 1000:8.1f} ms "
+          f"({(both - baseline) / functions * 1e6:.1f} us per function)")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,61 @@
+import logging
+import timeit
+from pyvo.core.pyvo_integration import PyvoIntegration
+
+CALLS = 200000
+
+def sample_function(x, y):
+    return x + y
+
+def hot_swapped_function(x, y):
+    return x + y
+
+def stacked_integrate(integration, func):
+    """The previous integrate(): one nested closure per enabled feature, fixed at decoration time."""
+    if integration.enable_monitoring:
+        func = integration.monitor(func)
+    if integration.enable_error_handling:
+        func = integration.error_handling(func)
+    if integration.enable_logging:
+        func = integration.logging(func)
+    if integration.enable_performance:
+        func = integration.performance(func)
+    return func
+
+def per_call_overhead(func, calls=CALLS):
+    """Returns the best-of-five per-call time in microseconds, minus the cost of a bare call."""
+    best = min(timeit.repeat(lambda: func(1, 2), number=calls, repeat=5))
+    bare = min(timeit.repeat(lambda: sample_function(1, 2), number=calls, repeat=5))
+    return (best - bare) / calls * 1e6
+
+def run_benchmark():
+    # Keep handlers out of the measurement: only the wrapper machinery is compared
+    logging.getLogger("pyvo_integration").setLevel(logging.CRITICAL)
+
+    cases = {
+        "all features": dict(enable_monitoring=True, enable_logging=True, enable_performance=True, enable_error_handling=True),
+        "performance only": dict(enable_monitoring=False, enable_logging=False, enable_performance=True, enable_error_handling=False),
+        "all disabled": dict(enable_monitoring=False, enable_logging=False, enable_performance=False, enable_error_handling=False),
+    }
+
+    print(f"Per-call overhead over a bare call ({CALLS} calls, best of 5):")
+    for name, settings in cases.items():
+        integration = PyvoIntegration(**settings)
+        stacked = per_call_overhead(stacked_integrate(integration, sample_function))
+        fused = per_call_overhead(integration.integrate(sample_function))
+        print(f"  {name:<18} stacked: {stacked:6.3f} us   fused: {fused:6.3f} us")
+    print("  (with every feature disabled, stacking applies no wrapper at all, while the fused wrapper")
+    print("   stays in place to follow the runtime switches; only its swappable call sites are unwrapped)")
+
+    # A module-level integrated function: switching every feature off swaps its binding back to the original
+    global hot_swapped_function
+    integration = PyvoIntegration()
+    hot_swapped_function = integration.integrate(hot_swapped_function)
+    enabled = per_call_overhead(lambda x, y: hot_swapped_function(x, y)) - per_call_overhead(lambda x, y: sample_function(x, y))
+    for feature in ("monitoring", "logging", "performance", "error_handling"):
+        setattr(integration, f"enable_{feature}", False)
+    disabled = per_call_overhead(lambda x, y: hot_swapped_function(x, y)) - per_call_overhead(lambda x, y: sample_function(x, y))
+    print(f"  {'hot-swapped':<18} enabled: {enabled:6.3f} us   disabled (unwrapped): {disabled:6.3f} us")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,69 @@
+import logging
+import socket
+import threading
+import time
+from pyvo.plugins.statsd_plugin import StatsdPlugin
+
+CALLS = 1000000
+FUNCTIONS = 50
+FLUSH_INTERVAL = 0.2
+
+def start_listener():
+    """Local stand-in for the StatsD agent counting received datagrams and bytes."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * 1024 * 1024)
+    sock.settimeout(0.2)
+    received = {"packets": 0, "bytes": 0, "lines": 0}
+    stop = threading.Event()
+
+    def receive():
+        while not stop.is_set():
+            try:
+                packet = sock.recv(65535)
+            except socket.timeout:
+                continue
+            received["packets"] += 1
+            received["bytes"] += len(packet)
+            received["lines"] += packet.count(b"\n") + 1
+
+    thread = threading.Thread(target=receive, daemon=True)
+    thread.start()
+    return sock, received, stop, thread
+
+def run_benchmark():
+    logging.disable(logging.CRITICAL)
+    sock, received, stop, thread = start_listener()
+    plugin = StatsdPlugin(port=sock.getsockname()[1], flush_interval=FLUSH_INTERVAL)
+
+    functions = []
+    for index in range(FUNCTIONS):
+        def work(value):
+            return value
+        work.__name__ = f"work_{index}"
+        functions.append(work)
+
+    start = time.perf_counter()
+    for call in range(CALLS):
+        plugin.monitor_function(functions[call % FUNCTIONS], call)
+    elapsed = time.perf_counter() - start
+    plugin.flush()
+    time.sleep(0.5)
+    stop.set()
+    thread.join()
+    plugin.close()
+    sock.close()
+
+    # One unaggregated timer line per call, one datagram each, for comparison
+    naive_bytes = sum(len(f"pyvo.work_{call % FUNCTIONS}.time:0.000412|ms") for call in range(CALLS))
+    scale = 1000000 / CALLS
+    stats = plugin.stats()
+    print(f"{CALLS} monitored calls over {FUNCTIONS} functions, {FLUSH_INTERVAL}s aggregation interval:")
+    print(f"  caller overhead:   {elapsed / CALLS * 1e6:.2f} us per call ({CALLS / elapsed:.0f} calls/s)")
+    print(f"  per million calls: {received['packets'] * scale:.0f} packets, {received['bytes'] * scale / 1024:.1f} KiB "
+          f"({received['lines'] * scale:.0f} metric lines)")
+    print(f"  unaggregated:      {CALLS * scale:.0f} packets, {naive_bytes * scale / 1024:.1f} KiB")
+    print(f"  exporter stats:    {stats}")
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,360 @@
+import gzip
+import json
+import logging
+import math
+import random
+import socket
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+import requests
+from pyvo.core.pyvo_monitor import PyvoMonitor
+from pyvo.core.pyvo_performance import record_performance, reset_performance_data
+from pyvo.core.pyvo_spool import MetricSpool
+from pyvo.plugins.external_monitor_plugin import BatchExporter, ExternalMonitorPlugin, FunctionCallSummary
+from pyvo.plugins.prometheus_plugin import PrometheusPlugin
+from pyvo.plugins.statsd_plugin import StatsdPlugin
+
+CALLS = 3000
+FUNCTIONS = 200  # Enough metric lines to need several datagrams per flush
+MAX_PACKET_SIZE = 512
+
+@pytest.fixture
+def listener():
+    """Local stand-in for the StatsD agent."""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(0.5)
+    yield sock
+    sock.close()
+
+def _receive_all(sock):
+    packets = []
+    try:
+        while True:
+            packets.append(sock.recv(65535))
+    except socket.timeout:
+        return packets
+
+def test_statsd_aggregates_and_packs_into_datagrams(listener):
+    plugin = StatsdPlugin(port=listener.getsockname()[1], flush_interval=60, max_packet_size=MAX_PACKET_SIZE)
+    functions = []
+    for index in range(FUNCTIONS):
+        def work(value):
+            if value % 10 == 0:
+                raise ValueError(value)
+            return value
+        work.__name__ = f"work_{index}"
+        functions.append(work)
+
+    for call in range(CALLS):
+        try:
+            plugin.monitor_function(functions[call % FUNCTIONS], call)
+        except ValueError:
+            pass
+    plugin.flush()
+    packets = _receive_all(listener)
+    plugin.close()
+
+    assert all(len(packet) <= MAX_PACKET_SIZE for packet in packets)
+    lines = [line for packet in packets for line in packet.decode().split("\n")]
+    # Aggregated client-side: calls, time and time.max per function plus errors for the failing
+    # tenth of the functions, instead of lines per call
+    assert len(packets) < len(lines) == 3 * FUNCTIONS + FUNCTIONS // 10
+
+    calls = errors = timings = 0
+    for line in lines:
+        name, value = line.split(":", 1)
+        fields = value.split("|")
+        if name.endswith(".calls"):
+            assert fields[1] == "c"
+            calls += int(fields[0])
+        elif name.endswith(".errors"):
+            errors += int(fields[0])
+        elif name.endswith(".time"):
+            assert fields[1] == "ms"
+            timings += round(1 / float(fields[2][1:]))
+    assert calls == timings == CALLS
+    assert errors == CALLS // 10
+    assert plugin.stats() == {"calls": CALLS, "metrics_sent": len(lines), "packets_sent": len(packets),
+                              "bytes_sent": sum(len(packet) for packet in packets), "packets_dropped": 0}
+
+def test_statsd_never_raises_into_the_instrumented_function():
+    # Nothing listens on the port and the host is unresolvable: sends fail, calls are unaffected
+    plugin = StatsdPlugin(host="statsd.invalid", port=9, flush_interval=60)
+    assert plugin.monitor_function(lambda x: x * 2, 21) == 42
+    plugin.flush()
+    assert plugin.stats()["packets_dropped"] == 1
+    plugin.close()
+
+def test_statsd_close_stops_the_flush_thread_before_closing_the_socket(listener):
+    plugin = StatsdPlugin(port=listener.getsockname()[1], flush_interval=0.01)
+    plugin.record("work", 0.002)
+    merger = plugin._recorder._merger
+    assert merger.is_alive()
+
+    plugin.close()
+    assert not merger.is_alive()
+    assert b"pyvo.work.calls:1|c" in b"\n".join(_receive_all(listener))
+    assert plugin.stats()["packets_dropped"] == 0
+
+SPOOL_URL = "http://monitor.invalid/batch"
+
+def test_spool_replays_in_order_after_a_restart(tmp_path):
+    # The endpoint is down: every payload stays on disk when the process stops
+    down = MetricSpool(lambda url, payload: False, directory=str(tmp_path), min_backoff=60.0)
+    for index in range(5):
+        down.append(SPOOL_URL, f"batch {index}".encode(), records=2)
+    down.close()
+
+    received = []
+    def send(url, payload):
+        received.append((url, payload))
+        return True
+
+    spool = MetricSpool(send, directory=str(tmp_path))
+    deadline = time.monotonic() + 5.0
+    while spool.pending(SPOOL_URL) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    spool.close()
+
+    assert received == [(SPOOL_URL, f"batch {index}".encode()) for index in range(5)]
+    stats = spool.stats()
+    assert stats["replayed"] == 10 and stats["batches"] == stats["bytes"] == 0
+    assert not any(path.suffix == ".batch" for path in tmp_path.rglob("*"))
+
+def test_external_monitor_spools_only_when_configured(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The plugin writes its debug log to the working directory
+    monkeypatch.delenv("MONITOR_SPOOL_DIR", raising=False)
+    plugin = ExternalMonitorPlugin(monitor_url="http://monitor.invalid", api_key="key")
+    assert plugin.exporter.spool is None
+    assert not (tmp_path / "monitor_spool").exists()
+
+    spooling = ExternalMonitorPlugin(monitor_url="http://monitor.invalid", api_key="key", spool_dir=str(tmp_path / "spool"))
+    assert spooling.exporter.spool.directory == str(tmp_path / "spool")
+    spooling.exporter.close()
+
+def test_prometheus_endpoint_exports_counters_and_histograms():
+    reset_performance_data()
+    monitor = PyvoMonitor(buffered=False)
+
+    def work(fail):
+        if fail:
+            raise ValueError("failed")
+    work.__name__ = 'odd"name\\with\nbreak'
+    work = monitor._decorate_function(work)
+    for fail in (False, False, True):
+        try:
+            work(fail)
+        except ValueError:
+            pass
+    for duration in (0.003, 0.02, 2.0):
+        record_performance("timed", duration)
+
+    plugin = PrometheusPlugin(port=0, monitor=monitor)
+    host, port = plugin.start()
+    try:
+        url = f"http://{host}:{port}/metrics"
+        with urllib.request.urlopen(url) as response:
+            assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+            lines = response.read().decode("utf-8").splitlines()
+        request = urllib.request.Request(url, headers={"Accept-Encoding": "gzip"})
+        with urllib.request.urlopen(request) as response:
+            assert response.headers["Content-Encoding"] == "gzip"
+            assert gzip.decompress(response.read()).decode("utf-8").splitlines() == lines
+    finally:
+        plugin.stop()
+
+    label = 'function="odd\\"name\\\\with\\nbreak"'
+    assert "# TYPE pyvo_function_calls_total counter" in lines
+    assert f"pyvo_function_calls_total{{{label}}} 3" in lines
+    assert f"pyvo_function_errors_total{{{label}}} 1" in lines
+    assert "# TYPE pyvo_function_duration_seconds histogram" in lines
+    assert 'pyvo_function_duration_seconds_bucket{function="timed",le="0.005"} 1' in lines
+    assert 'pyvo_function_duration_seconds_bucket{function="timed",le="0.025"} 2' in lines
+    assert 'pyvo_function_duration_seconds_bucket{function="timed",le="1.0"} 2' in lines
+    assert 'pyvo_function_duration_seconds_bucket{function="timed",le="2.5"} 3' in lines
+    assert 'pyvo_function_duration_seconds_bucket{function="timed",le="+Inf"} 3' in lines
+    assert 'pyvo_function_duration_seconds_count{function="timed"} 3' in lines
+    total = next(line for line in lines if line.startswith('pyvo_function_duration_seconds_sum{function="timed"}'))
+    assert float(total.split()[-1]) == pytest.approx(2.023)
+    reset_performance_data()
+
+def test_prometheus_render_is_cached_until_the_data_changes():
+    monitor = PyvoMonitor(buffered=False)
+    work = monitor._decorate_function(lambda: None)
+    work()
+    plugin = PrometheusPlugin(monitor=monitor)
+
+    page = plugin.render()
+    assert plugin.render() is page and plugin.render(gzipped=True) == plugin.render(gzipped=True)
+    assert plugin.renders == 1
+
+    work()
+    assert plugin.render() != page
+    assert plugin.renders == 2
+    record_performance("cached", 0.01)
+    plugin.render()
+    assert plugin.renders == 3
+    reset_performance_data()
+
+class _BatchCollector(BaseHTTPRequestHandler):
+    """Stand-in monitoring service recording every batch it receives."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.server.requests.append((self.path, self.headers["Content-Encoding"], json.loads(gzip.decompress(body))))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def batch_collector():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _BatchCollector)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _exporter(server, **kwargs):
+    url = f"http://127.0.0.1:{server.server_address[1]}/batch"
+    return BatchExporter(requests.Session(), url, logging.getLogger("test_exporter"), api_key="key", **kwargs)
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def test_batch_exporter_sends_full_batches_and_drains_on_close(batch_collector):
+    exporter = _exporter(batch_collector, batch_size=10, flush_interval=60)
+    for index in range(25):
+        assert exporter.add("metrics" if index % 5 else "errors", {"index": index})
+
+    # Full batches go out right away; the partial one waits for the interval or close()
+    assert _wait_for(lambda: len(batch_collector.requests) == 2)
+    time.sleep(0.1)
+    assert len(batch_collector.requests) == 2
+    exporter.close()
+
+    assert [len(document["metrics"]) + len(document["errors"]) for _, _, document in batch_collector.requests] == [10, 10, 5]
+    path, encoding, document = batch_collector.requests[0]
+    assert (path, encoding, document["api_key"]) == ("/batch", "gzip", "key")
+    assert [record["index"] for record in document["errors"]] == [0, 5]
+    stats = exporter.stats()
+    assert (stats["sent"], stats["batches"], stats["dropped"], stats["failed"], stats["buffered"]) == (25, 3, 0, 0, 0)
+
+def test_batch_exporter_flushes_partial_batches_every_interval(batch_collector):
+    exporter = _exporter(batch_collector, batch_size=1000, flush_interval=0.05)
+    for index in range(3):
+        exporter.add("metrics", {"index": index})
+    assert _wait_for(lambda: len(batch_collector.requests) == 1)
+    assert [record["index"] for record in batch_collector.requests[0][2]["metrics"]] == [0, 1, 2]
+    assert exporter.stats()["last_flush_latency"] >= 0.04
+    exporter.close()
+
+def test_batch_exporter_drops_and_counts_records_beyond_its_buffer(batch_collector):
+    exporter = _exporter(batch_collector, max_buffer_size=5, batch_size=1000, flush_interval=60)
+    accepted = [exporter.add("metrics", {"index": index}) for index in range(8)]
+    assert accepted == [True] * 5 + [False] * 3
+    assert exporter.stats()["dropped"] == 3 and exporter.stats()["buffered"] == 5
+
+    exporter.close()
+    assert not exporter.add("metrics", {"index": 8})  # Closed exporters drop as well
+    assert [record["index"] for record in batch_collector.requests[0][2]["metrics"]] == [0, 1, 2, 3, 4]
+    stats = exporter.stats()
+    assert (stats["sent"], stats["dropped"], stats["buffered"]) == (5, 4, 0)
+
+def _calls(count, seed=3):
+    rng = random.Random(seed)
+    for index in range(count):
+        yield {"func_name": f"func_{index % 4}", "execution_time": rng.expovariate(100.0), "success": index % 9 != 0}
+
+def _list_summary(function_calls):
+    """The summary as computed over a list of all calls, before streaming summaries."""
+    summary = {}
+    for call in function_calls:
+        entry = summary.setdefault(call["func_name"], {"count": 0, "success_count": 0, "error_count": 0,
+                                                       "total_time": 0, "times": []})
+        entry["count"] += 1
+        entry["success_count" if call["success"] else "error_count"] += 1
+        entry["total_time"] += call["execution_time"]
+        entry["times"].append(call["execution_time"])
+    for entry in summary.values():
+        times = sorted(entry.pop("times"))
+        entry.update(avg_time=entry["total_time"] / entry["count"], max_time=times[-1], min_time=times[0],
+                     p99_time=times[math.ceil(len(times) * 0.99) - 1])
+    return summary
+
+def _assert_summaries_match(streamed, expected):
+    assert set(streamed) == set(expected)
+    for func_name, entry in expected.items():
+        result = streamed[func_name]
+        for key in ("count", "success_count", "error_count", "max_time", "min_time"):
+            assert result[key] == entry[key], (func_name, key)
+        for key in ("total_time", "avg_time"):
+            assert result[key] == pytest.approx(entry[key]), (func_name, key)
+        assert result["p99_time"] == pytest.approx(entry["p99_time"], rel=0.01)
+
+@pytest.fixture
+def monitor_plugin(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # The plugin writes its debug log to the working directory
+    monkeypatch.delenv("MONITOR_SPOOL_DIR", raising=False)
+    plugin = ExternalMonitorPlugin(monitor_url="http://monitor.invalid", api_key="key")
+    yield plugin
+    plugin.exporter.close()
+
+def test_streamed_call_summary_matches_the_list_summary(monitor_plugin):
+    expected = _list_summary(list(_calls(5000)))
+    _assert_summaries_match(monitor_plugin.get_function_call_summary(_calls(5000)), expected)
+
+    # Summaries of separate chunks merge into the summary of all calls
+    calls = list(_calls(5000))
+    first = monitor_plugin.accumulate_function_calls(iter(calls[:1234]))
+    second = monitor_plugin.accumulate_function_calls(iter(calls[1234:]))
+    merged = monitor_plugin.merge_function_call_summaries(first, second)
+    _assert_summaries_match(monitor_plugin.get_function_call_summary(merged), expected)
+    assert all(isinstance(summary, FunctionCallSummary) for summary in merged.values())
+
+    # Continuing a partial summary with the next chunk gives the same result
+    continued = monitor_plugin.accumulate_function_calls(iter(calls[1234:]),
+                                                         monitor_plugin.accumulate_function_calls(iter(calls[:1234])))
+    _assert_summaries_match(monitor_plugin.get_function_call_summary(continued), expected)
+
+def test_streamed_performance_summary_matches_the_list_summary(monitor_plugin):
+    times = [call["execution_time"] for call in _calls(3000)]
+    summary = monitor_plugin.get_performance_summary(time for time in times)
+    assert summary["execution_count"] == len(times)
+    assert summary["average_execution_time"] == pytest.approx(sum(times) / len(times))
+    assert (summary["max_execution_time"], summary["min_execution_time"]) == (max(times), min(times))
+
+    histogram = monitor_plugin.accumulate_performance_data(times[:1000])
+    histogram.merge(monitor_plugin.accumulate_performance_data(times[1000:]))
+    assert monitor_plugin.get_performance_summary(histogram) == pytest.approx(summary)
+    assert monitor_plugin.get_performance_summary(iter([])) == {"message": "No performance data available."}
+
+def test_statsd_resolves_the_agent_once(listener, monkeypatch):
+    lookups = []
+    getaddrinfo = socket.getaddrinfo
+
+    def counting_getaddrinfo(*args, **kwargs):
+        lookups.append(args[0])
+        return getaddrinfo(*args, **kwargs)
+    monkeypatch.setattr(socket, "getaddrinfo", counting_getaddrinfo)
+
+    plugin = StatsdPlugin(host="localhost", port=listener.getsockname()[1], flush_interval=60, max_packet_size=64)
+    for flush in range(3):
+        for index in range(20):
+            plugin.record(f"work_{index}", 0.001)
+        plugin.flush()
+    plugin.close()
+
+    assert len(_receive_all(listener)) == plugin.stats()["packets_sent"] > 3
+    assert lookups == ["localhost"]
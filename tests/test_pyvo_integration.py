@@ -0,0 +1,112 @@
+import asyncio
+import importlib
+import sys
+import pytest
+from pyvo.core.pyvo_import_hook import install_import_hook, uninstall_import_hook
+from pyvo.core.pyvo_instrument import instrumented_kinds
+from pyvo.core.pyvo_integration import PyvoIntegration
+from pyvo.core.pyvo_monitor import pyvo_monitor
+
+PACKAGE = "pyvo_hook_test_package"
+
+@pytest.fixture
+def package(tmp_path):
+    """A throwaway package with an included and an excluded module, removed from sys.modules afterwards."""
+    package_dir = tmp_path / PACKAGE
+    package_dir.mkdir()
+    (package_dir / "__init__.py").write_text("")
+    source = "def add(x, y):\n    return x + y\n\nclass Service:\n    def handle(self, x):\n        return x\n"
+    (package_dir / "service.py").write_text(source)
+    (package_dir / "skipped.py").write_text(source)
+    sys.path.insert(0, str(tmp_path))
+    yield
+    uninstall_import_hook()
+    sys.path.remove(str(tmp_path))
+    for name in [name for name in sys.modules if name == PACKAGE or name.startswith(PACKAGE + ".")]:
+        del sys.modules[name]
+
+def test_import_hook_instruments_matching_modules(package):
+    finder = install_import_hook(include=[PACKAGE + ".*"], exclude=[PACKAGE + ".skipped"], kinds=["monitor"])
+    assert sys.meta_path[0] is finder
+
+    service = importlib.import_module(PACKAGE + ".service")
+    skipped = importlib.import_module(PACKAGE + ".skipped")
+    assert instrumented_kinds(service.add) == ("monitor",)
+    assert instrumented_kinds(service.Service.handle) == ("monitor",)
+    assert instrumented_kinds(skipped.add) == ()
+    assert service.add(1, 2) == 3
+    assert service.Service().handle(4) == 4
+
+    # Instrumenting again is a no-op; uninstrumenting restores the original functions
+    pyvo_monitor.auto_decorate_functions(service, recursive=False)
+    assert instrumented_kinds(service.add) == ("monitor",)
+    pyvo_monitor.remove_decorations(service, recursive=False)
+    assert instrumented_kinds(service.add) == ()
+    assert instrumented_kinds(service.Service.handle) == ()
+    assert service.add(1, 2) == 3
+
+def test_uninstalled_hook_leaves_imports_alone(package):
+    install_import_hook(include=[PACKAGE + ".*"], kinds=["monitor"])
+    uninstall_import_hook()
+    assert not any(type(finder).__name__ == "InstrumentingFinder" for finder in sys.meta_path)
+
+    service = importlib.import_module(PACKAGE + ".service")
+    assert instrumented_kinds(service.add) == ()
+
+class _RecordingIntegration(PyvoIntegration):
+    """Records which feature hooks ran instead of logging."""
+
+    def __init__(self, **features):
+        self.events = []
+        super().__init__(**features)
+
+    def monitor_before(self, func, args, kwargs):
+        self.events.append("before")
+
+    def monitor_after(self, func, args, kwargs):
+        self.events.append("after")
+
+    def log_function_call(self, func, args, kwargs, result):
+        self.events.append(("logged", result))
+
+    def log_performance_data(self, func, start_time, weight=1):
+        self.events.append("timed")
+
+    def handle_error(self, error, func, args, kwargs):
+        self.events.append(("error", str(error)))
+
+def _divide(x, y):
+    return x / y
+
+@pytest.mark.parametrize("features, events", [
+    (dict(enable_monitoring=False, enable_logging=False, enable_error_handling=False), ["timed"]),
+    (dict(enable_monitoring=False, enable_logging=False, enable_performance=False), []),
+    (dict(enable_monitoring=False, enable_performance=False, enable_error_handling=False), [("logged", 2.0)]),
+    (dict(enable_logging=False, enable_performance=False, enable_error_handling=False), ["before", "after"]),
+    (dict(), ["before", "after", ("logged", 2.0), "timed"]),
+])
+def test_integrated_function_runs_only_the_enabled_features(features, events):
+    integration = _RecordingIntegration(**features)
+    divide = integration.integrate(_divide)
+    assert divide(4, 2) == 2.0
+    assert integration.events == events
+
+    integration.events.clear()
+    with pytest.raises(ZeroDivisionError):
+        divide(1, 0)
+    handled = integration.enable_error_handling
+    assert (("error", "division by zero") in integration.events) == handled
+
+def test_integrated_coroutine_follows_runtime_switches():
+    integration = _RecordingIntegration(enable_monitoring=False, enable_logging=False, enable_error_handling=False)
+
+    async def double(x):
+        return 2 * x
+    double = integration.integrate(double)
+
+    assert asyncio.run(double(3)) == 6
+    assert integration.events == ["timed"]
+    integration.enable_performance = False
+    integration.enable_error_handling = True
+    assert asyncio.run(double(4)) == 8
+    assert integration.events == ["timed"]
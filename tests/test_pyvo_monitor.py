@@ -0,0 +1,164 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from pyvo.core.pyvo_monitor import PyvoMonitor
+from pyvo.core.pyvo_error_shipper import ErrorShipper
+from pyvo.core.pyvo_error_handling import ErrorStore, ErrorSummaryPublisher
+
+THREADS = 64
+CALLS_PER_THREAD = 2000
+FUNCTIONS = 8
+
+def _hammer(monitor):
+    """Calls FUNCTIONS decorated functions from THREADS threads released at the same moment."""
+    functions = []
+    for index in range(FUNCTIONS):
+        def work(value):
+            return value
+        work.__name__ = f"work_{index}"
+        functions.append(monitor._decorate_function(work))
+
+    barrier = threading.Barrier(THREADS)
+
+    def run(offset):
+        barrier.wait()
+        for call in range(CALLS_PER_THREAD):
+            functions[(offset + call) % FUNCTIONS](call)
+
+    threads = [threading.Thread(target=run, args=(offset,)) for offset in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+@pytest.mark.parametrize("buffered", [True, False])
+def test_no_lost_increments_across_64_threads(buffered):
+    monitor = PyvoMonitor(buffered=buffered, shards=4)
+    _hammer(monitor)
+    monitor.log_summary()  # Merges any buffered calls
+
+    expected = THREADS * CALLS_PER_THREAD // FUNCTIONS
+    assert len(monitor.function_logs) == FUNCTIONS
+    for name, logs in monitor.function_logs.locked_items():
+        assert logs['call_count'] == expected, name
+        assert logs['error_count'] == 0
+    assert sum(logs['call_count'] for _, logs in monitor.function_logs.locked_items()) == THREADS * CALLS_PER_THREAD
+
+class _CollectorHandler(BaseHTTPRequestHandler):
+    """Stand-in error collector recording every batch it receives."""
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        if self.server.delay:
+            time.sleep(self.server.delay)
+        self.server.batches.append(json.loads(body))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def collector():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _CollectorHandler)
+    server.batches = []
+    server.delay = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def _collector_url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/errors"
+
+def test_error_shipper_sends_batches(collector):
+    shipper = ErrorShipper(_collector_url(collector), batch_size=10, flush_interval=0.05)
+    for index in range(25):
+        assert shipper.submit({"error_message": f"failure {index}"})
+    shipper.close()
+
+    assert [len(batch["errors"]) for batch in collector.batches] == [10, 10, 5]
+    assert collector.batches[0]["module"] == "pyvo"
+    assert shipper.stats() == {"queued": 0, "sent": 25, "dropped": 0, "failed": 0, "circuit": "closed"}
+
+def test_error_shipper_never_blocks_on_slow_collector(collector):
+    collector.delay = 0.5
+    shipper = ErrorShipper(_collector_url(collector), max_queue_size=20, batch_size=5, flush_interval=0.01,
+                           timeout=(1.0, 0.2))
+    started = time.monotonic()
+    accepted = sum(shipper.submit({"error_message": "slow"}) for _ in range(100))
+    assert time.monotonic() - started < 0.2
+
+    shipper.close(timeout=2.0)
+    stats = shipper.stats()
+    assert stats["dropped"] == 100 - accepted > 0
+    assert stats["failed"] > 0  # Requests exceeding the read timeout are counted, not retried
+    assert stats["sent"] + stats["failed"] + stats["queued"] == accepted
+
+def test_call_edges_of_a_diamond_are_listed_once():
+    monitor = PyvoMonitor(buffered=False)
+
+    def leaf():
+        time.sleep(0.001)
+
+    def left():
+        leaf()
+
+    def right():
+        leaf()
+        leaf()
+
+    def top():
+        left()
+        right()
+
+    leaf, left, right, top = (monitor._decorate_function(f) for f in (leaf, left, right, top))
+    for _ in range(3):
+        top()
+
+    edges = {(edge["caller"], edge["callee"]): edge for edge in monitor.call_tree_summary()}
+    assert {key: edge["count"] for key, edge in edges.items()} == {
+        (None, "top"): 3, ("top", "left"): 3, ("top", "right"): 3, ("left", "leaf"): 3, ("right", "leaf"): 6}
+    top_edge = edges[(None, "top")]
+    assert top_edge["exclusive_time"] < top_edge["inclusive_time"]
+    assert edges[("right", "leaf")]["inclusive_time"] >= 0.006
+
+    # Each edge is printed once, with no per-path expansion of shared callees
+    lines = [line for line in monitor.log_summary() if line.startswith("  ") and " -> " in line]
+    assert len(lines) == 5
+    assert lines[0].startswith("  (top level) -> top: 3 calls")
+
+def _raise(error):
+    try:
+        raise error
+    except Exception as caught:
+        return caught
+
+def test_error_summary_is_not_tracked_or_rendered_without_subscribers():
+    store = ErrorStore()
+    publisher = ErrorSummaryPublisher(store, interval=60)
+    for index in range(100):
+        store.add_error(_raise(ValueError(f"bad {index % 3}")))
+        publisher.mark_dirty()
+    publisher.publish()
+    assert publisher._thread is None
+    assert all(group._stack_trace is None for group in store.groups.values())
+
+    deltas = []
+    publisher.subscribe(deltas.append)
+    assert [group["count"] for group in deltas[0]["groups"]] == [100]
+    assert publisher._thread is not None
+
+    store.add_error(_raise(KeyError("missing")))
+    publisher.mark_dirty()
+    publisher.publish()
+    assert [group["error_type"] for group in deltas[1]["groups"]] == ["KeyError"]
+
+    # After the last subscriber leaves, changes are no longer collected
+    publisher.unsubscribe(deltas.append)
+    store.add_error(_raise(KeyError("missing")))
+    assert store.take_changes() == ([], [])
@@ -0,0 +1,128 @@
+import math
+import os
+import random
+import pytest
+from pyvo.core import pyvo_segment_store as segment_store
+from pyvo.core.pyvo_config import pyvo_config
+from pyvo.core.pyvo_sampling import AdaptiveSampler, AlwaysSample, get_sampling_policy
+from pyvo.core.pyvo_histogram import LatencyHistogram
+from pyvo.core.pyvo_metric_store import ColumnarSampleStore
+
+SAMPLES = 20000
+SEGMENT_SIZE = 4096  # A few dozen records per segment
+
+def test_histogram_percentiles_within_relative_error():
+    rng = random.Random(7)
+    values = [rng.lognormvariate(-6, 1.5) for _ in range(SAMPLES)]
+    histogram = LatencyHistogram(significant_figures=2)
+    for value in values:
+        histogram.record(value)
+
+    ordered = sorted(values)
+    for percentile, reported in histogram.values_at_percentiles((50.0, 90.0, 99.0, 99.9)).items():
+        exact = ordered[math.ceil(SAMPLES * percentile / 100.0) - 1]
+        assert reported == pytest.approx(exact, rel=0.01)
+    assert histogram.count == SAMPLES
+    assert histogram.min == min(values) and histogram.max == max(values)
+
+    # Merging two halves gives the same percentiles as recording everything into one histogram
+    first, second = LatencyHistogram(), LatencyHistogram()
+    for index, value in enumerate(values):
+        (first if index % 2 else second).record(value)
+    first.merge(second)
+    assert first.values_at_percentiles() == histogram.values_at_percentiles()
+
+def test_sample_store_keeps_the_newest_samples_within_its_cap():
+    store = ColumnarSampleStore(cap=100, initial_capacity=16)
+    for index in range(1000):
+        store.append(float(index), index / 1000.0)
+        assert len(store._durations) <= 200  # Memory never exceeds twice the cap
+
+    assert len(store) == 100 and store.discarded == 900
+    assert list(store.timestamps()) == [float(index) for index in range(900, 1000)]
+    view = store.durations()
+    store.append(1000.0, 1.0)
+    assert list(view)[-1] == pytest.approx(0.999)  # Earlier views stay valid while samples arrive
+
+    summary = store.summary(since=990.0)
+    assert summary["count"] == 11
+    assert summary["max"] == 1.0
+    assert summary["mean"] == pytest.approx((sum(range(990, 1000)) / 1000.0 + 1.0) / 11)
+
+def _write(directory, count, name="work"):
+    writer = segment_store.SegmentWriter(str(directory), segment_size=SEGMENT_SIZE)
+    for index in range(count):
+        writer.append(name, float(index), 0.001)
+    writer.close()
+
+@pytest.mark.parametrize("vectorized", [True, False])
+def test_segment_readers_stop_at_a_torn_record(tmp_path, monkeypatch, vectorized):
+    if not vectorized:
+        monkeypatch.setattr(segment_store, "np", None)
+    writer = segment_store.SegmentWriter(str(tmp_path), segment_size=SEGMENT_SIZE)
+    for index in range(20):
+        writer.append("work", float(index), 0.001)
+        if index == 2:
+            writer.flush()  # Commits the first three records in the header
+    path = segment_store._segment_paths(str(tmp_path))[-1]
+    # A torn write in the middle of the uncommitted records leaves valid records behind a hole
+    with open(path, "r+b") as file:
+        file.seek(segment_store.HEADER.size + 5 * segment_store.RECORD.size + 4)
+        file.write(b"\xff\xff\xff\xff")
+    # Crash: the writer goes away without committing
+    writer._map.close()
+    writer._file.close()
+
+    assert [timestamp for _, timestamp, _, _ in segment_store.iter_records(str(tmp_path))] == [0.0, 1.0, 2.0, 3.0, 4.0]
+
+    # A new writer continues the segment but drops the records behind the hole first
+    _write(tmp_path, 3, name="later")
+    assert segment_store._segment_paths(str(tmp_path)) == [path]
+    records = list(segment_store.iter_records(str(tmp_path)))
+    assert [name for name, _, _, _ in records] == ["work"] * 5 + ["later"] * 3
+    # Closing truncates the segment to its records and commits them all
+    assert os.path.getsize(path) == segment_store.HEADER.size + 8 * segment_store.RECORD.size
+    with open(path, "rb") as file:
+        assert segment_store.HEADER.unpack(file.read(segment_store.HEADER.size))[3] == 8
+
+def test_segment_writer_drops_a_partial_name_line(tmp_path):
+    _write(tmp_path, 2)
+    with open(tmp_path / segment_store.NAMES_FILE, "a") as file:
+        file.write("1\tcut_sh")
+
+    _write(tmp_path, 2, name="other")
+    assert segment_store.read_function_names(str(tmp_path)) == {0: "work", 1: "other"}
+    assert [name for name, _, _, _ in segment_store.iter_records(str(tmp_path))] == ["work", "work", "other", "other"]
+
+def test_backup_of_a_flushed_writer_holds_every_record(tmp_path, monkeypatch):
+    from pyvo.scripts import backup_performance
+
+    monkeypatch.chdir(tmp_path)
+    writer = segment_store.SegmentWriter(str(tmp_path / "segments"), segment_size=SEGMENT_SIZE)
+    for index in range(100):
+        writer.append("work", float(index), 0.001)
+    writer.flush()
+    backup_performance.backup_performance_data(str(tmp_path / "segments"))
+    writer.close()
+
+    (backup,) = (tmp_path / backup_performance.BACKUP_DIR).iterdir()
+    assert list(segment_store.iter_records(str(backup))) == list(segment_store.iter_records(str(tmp_path / "segments")))
+    assert len(list(segment_store.iter_records(str(backup)))) == 100
+    # Only the header and the records are copied, not the preallocated rest of the segments
+    segments = sorted(backup.glob("*.pvs"))
+    assert sum(path.stat().st_size for path in segments) == \
+        len(segments) * segment_store.HEADER.size + 100 * segment_store.RECORD.size
+
+def test_sampling_accepts_a_bare_mode_name(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # update_config saves the configuration to the working directory
+    original = pyvo_config.get("sampling")
+    try:
+        pyvo_config.update_config("sampling", "adaptive")
+        assert pyvo_config.get("sampling") == "adaptive"
+        assert isinstance(get_sampling_policy("any_function"), AdaptiveSampler)
+
+        pyvo_config.update_config("sampling", 100)  # Rejected: neither a dictionary nor a mode name
+        assert pyvo_config.get("sampling") == "adaptive"
+    finally:
+        pyvo_config.update_config("sampling", original)
+    assert isinstance(get_sampling_policy("any_function"), AlwaysSample)